@@ -50,10 +50,15 @@ INSTALLED_APPS = [
     'likes',
     'bookmarks',
     'posts',
+    'search',
+    'tags',
+    'trending',
     'chat',
 ]
 
 MIDDLEWARE = [
+    'core.profiling.ProfilerMiddleware',
+    'core.querylog.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -83,12 +88,85 @@ TEMPLATES = [
 WSGI_APPLICATION = 'Sociopathy.wsgi.application'
 ASGI_APPLICATION = 'Sociopathy.asgi.application'
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 50000,
+        },
+    }
+}
+
 CHANNEL_LAYERS = {
     'default': {
         'BACKEND': 'channels.layers.InMemoryChannelLayer',
     }
 }
 
+# Background work (see core/background.py). The test runner switches it to
+# inline execution so tests stay deterministic.
+BACKGROUND_TASKS_ASYNC = True
+BACKGROUND_WORKERS = 2
+
+TEST_RUNNER = 'core.test_runner.InlineBackgroundTestRunner'
+
+# Seconds to coalesce likes/replies on a post before recomputing its score.
+POST_SCORE_UPDATE_DELAY = 2.0
+
+# Logged-out feed pages are cached whole for this many seconds (0 turns
+# the cache off); a stale page is still served for up to
+# ANONYMOUS_FEED_CACHE_STALE seconds while one request renders a new one.
+ANONYMOUS_FEED_CACHE_TIMEOUT = 30
+ANONYMOUS_FEED_CACHE_STALE = 120
+
+# Trending: engagement counted in 5-minute buckets over a sliding window.
+TRENDING_WINDOW_HOURS = 6
+TRENDING_UPDATE_DELAY = 2.0
+# Order of the feed's non-followed posts: 'recommendation' or 'trending'.
+FEED_DISCOVERY_ORDER = 'recommendation'
+
+# Write-behind likes (see likes/buffer.py): likes are answered at once and
+# written in batches every LIKE_FLUSH_INTERVAL seconds. Helps when a viral
+# post's likes contend on one row; pages may lag the click by the interval.
+LIKE_WRITE_BEHIND = False
+LIKE_FLUSH_INTERVAL = 0.3
+
+# Comment trees on the post page: reply levels shown below each top-level
+# comment and replies shown per node before a "more replies" link.
+COMMENT_TREE_MAX_DEPTH = 3
+COMMENT_TREE_MAX_CHILDREN = 5
+
+# Post search index (see search/backends). None picks the FTS5 index on
+# SQLite and search.backends.database.DatabaseBackend (unindexed) elsewhere.
+SEARCH_BACKEND = None
+
+# Uploads stream to temporary files (see core/uploads.py). Anything past
+# UPLOAD_MAX_BYTES is discarded while it is read; images are further capped
+# by size and by pixel count before they are decoded.
+FILE_UPLOAD_HANDLERS = ['core.uploads.LimitedUploadHandler']
+UPLOAD_MAX_BYTES = 25 * 1024 * 1024
+UPLOAD_IMAGE_MAX_BYTES = 10 * 1024 * 1024
+UPLOAD_IMAGE_MAX_PIXELS = 40_000_000
+
+# Query count, DB time and N+1 detection per request and consumer event
+# (see core/querylog.py), logged to the 'core.queries' logger. A query shape
+# run more than QUERY_LOG_N_PLUS_ONE_THRESHOLD times is reported as an N+1.
+QUERY_LOG_ENABLED = True
+QUERY_LOG_N_PLUS_ONE_THRESHOLD = 5
+QUERY_LOG_HEADERS = DEBUG
+
+# Sampling profiler (see core/profiling.py): requests with a signed
+# X-Profile header, plus a random PROFILER_SAMPLE_RATE fraction of traffic,
+# are sampled every PROFILER_INTERVAL seconds. Each profile is written to a
+# file under PROFILER_DIR (shared by all processes) and kept for
+# PROFILER_RETENTION seconds; see the export_profiles command.
+PROFILER_SAMPLE_RATE = 0.0
+PROFILER_INTERVAL = 0.005
+PROFILER_TOKEN_MAX_AGE = 60 * 60
+PROFILER_RETENTION = 24 * 60 * 60
+PROFILER_DIR = BASE_DIR / 'profiles'
+PROFILER_MAX_STACKS = 2000
+
 
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
@@ -138,6 +216,24 @@ USE_TZ = True
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Media is served by core.views.serve_media. Set MEDIA_SENDFILE_HEADER to
+# 'X-Accel-Redirect' (nginx, with an internal location at
+# MEDIA_SENDFILE_PREFIX aliased to MEDIA_ROOT) or 'X-Sendfile' to let the
+# front server send the file after Django has checked access.
+MEDIA_SENDFILE_HEADER = None
+MEDIA_SENDFILE_PREFIX = '/protected-media/'
+MEDIA_CACHE_MAX_AGE = 24 * 60 * 60
+
+# Uploads are stored once per distinct content; see core/storage.py.
+STORAGES = {
+    'default': {
+        'BACKEND': 'core.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [
     BASE_DIR / "static",
@@ -25,4 +25,8 @@ urlpatterns = [
     path('', include('bookmarks.urls')),
     path('', include('accounts.urls')),
     path('', include('relationships.urls')),
+    path('', include('search.urls')),
+    path('', include('tags.urls')),
+    path('', include('trending.urls')),
+    path('', include('core.urls')),
 ]
@@ -4,20 +4,21 @@ from django.contrib.auth.forms import UserCreationForm
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 
+from core.uploads import BoundedImageField
 from .models import Profile
 
 User = get_user_model()
 
 
 class RegisterForm(UserCreationForm):
-    avatar = forms.ImageField(
+    avatar = BoundedImageField(
         required=False,
         widget=forms.ClearableFileInput(
             attrs={"class": "auth__file", "accept": "image/*"}
         ),
         label="Аватар",
     )
-    cover_image = forms.ImageField(
+    cover_image = BoundedImageField(
         required=False,
         widget=forms.ClearableFileInput(
             attrs={"class": "auth__file", "accept": "image/*"}
@@ -73,6 +74,10 @@ class ProfileForm(forms.ModelForm):
     class Meta:
         model = Profile
         fields = ("bio", "avatar", "cover_image")
+        field_classes = {
+            "avatar": BoundedImageField,
+            "cover_image": BoundedImageField,
+        }
         widgets = {
             "bio": forms.Textarea(
                 attrs={
@@ -129,6 +134,8 @@ class ProfileForm(forms.ModelForm):
             if new_username != self.user.username:
                 self.user.username = new_username
                 profile.username_last_changed = timezone.now()
+        if self.changed_data:
+            profile.version += 1
 
         if commit:
             if self.user:
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from accounts import stats
+
+
+class Command(BaseCommand):
+    help = "Recount follower, following, post and received-like counts of every profile."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=stats.DEFAULT_BATCH_SIZE,
+            help=f"How many profiles to check per query (default: {stats.DEFAULT_BATCH_SIZE}).",
+        )
+
+    def handle(self, *args, **options):
+        checked, created, fixed = stats.reconcile(options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Checked {checked} profiles, created {created}, fixed {fixed}.")
+        )
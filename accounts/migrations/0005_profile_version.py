@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0004_profile_theme_preferences"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="version",
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_profile_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='avatar_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='cover_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
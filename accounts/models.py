@@ -53,6 +53,10 @@ class Profile(models.Model):
         upload_to='cover_pics'
     )
 
+    # Resized derivatives of the avatar and cover (see core.images).
+    avatar_variants = models.JSONField(default=dict, blank=True, editable=False)
+    cover_variants = models.JSONField(default=dict, blank=True, editable=False)
+
     theme_preference = models.CharField(
         max_length=10,
         choices=(
@@ -69,6 +73,10 @@ class Profile(models.Model):
         verbose_name="Акцент",
     )
 
+    # Bumped whenever the public face of the profile (username, avatar, ...)
+    # changes; part of the cache key of rendered post and comment cards.
+    version = models.PositiveIntegerField(default=1, editable=False)
+
     following = models.ManyToManyField(
         "self",
         through="relationships.Follow",
@@ -94,4 +102,25 @@ class Profile(models.Model):
         return reverse('accounts:profile_detail', kwargs={'username': self.user.username})
     
     def __str__(self):
-        return f"Profile of {self.user.username}"
\ No newline at end of file
+        return f"Profile of {self.user.username}"
+
+class ProfileStats(models.Model):
+    """Counters shown in the profile header, kept up to date by
+    accounts.signals; see accounts.stats."""
+
+    profile = models.OneToOneField(
+        Profile,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats"
+    )
+
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+    # Top-level posts, as listed on the profile.
+    posts_count = models.PositiveIntegerField(default=0)
+    # Likes on all of the author's posts and replies.
+    likes_received = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Stats of {self.profile}"
@@ -0,0 +1,49 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from likes.models import Like
+from likes.signals import likes_changed
+from posts.models import Post
+from relationships.models import Follow
+from . import stats
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, **kwargs):
+    if created:
+        stats.adjust_profile(instance.user_from_id, "following_count", 1)
+        stats.adjust_profile(instance.user_to_id, "followers_count", 1)
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow(sender, instance, **kwargs):
+    stats.adjust_profile(instance.user_from_id, "following_count", -1)
+    stats.adjust_profile(instance.user_to_id, "followers_count", -1)
+
+
+@receiver(post_save, sender=Post)
+def count_post(sender, instance, created, **kwargs):
+    if created and not instance.parent_post_id:
+        stats.adjust_user(instance.author_id, "posts_count", 1)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post(sender, instance, **kwargs):
+    if not instance.parent_post_id:
+        stats.adjust_user(instance.author_id, "posts_count", -1)
+
+
+@receiver(post_save, sender=Like)
+def count_like(sender, instance, created, **kwargs):
+    if created:
+        stats.adjust_post_author(instance.post_id, "likes_received", 1)
+
+
+@receiver(post_delete, sender=Like)
+def uncount_like(sender, instance, **kwargs):
+    stats.adjust_post_author(instance.post_id, "likes_received", -1)
+
+
+@receiver(likes_changed)
+def count_like_toggle(sender, post_id, liked, **kwargs):
+    stats.adjust_post_author(post_id, "likes_received", 1 if liked else -1)
@@ -0,0 +1,122 @@
+"""Profile header counters (``ProfileStats``).
+
+Follower, following, post and received-like counts are stored per
+profile and moved by one ``UPDATE`` on every follow, post and like event
+(see ``accounts.signals``), so showing them costs a single row read no
+matter how popular the author is.  A profile's row is created the first
+time it is needed, from a real count; ``reconcile_profile_stats``
+recounts everything and fixes drift.
+"""
+
+from django.db import transaction
+from django.db.models import Count, F, Subquery
+
+from likes.models import Like
+from posts.models import Post
+from relationships.models import Follow
+from .models import Profile, ProfileStats
+
+FIELDS = ("followers_count", "following_count", "posts_count", "likes_received")
+DEFAULT_BATCH_SIZE = 2000
+
+
+def _adjust(queryset, field, delta):
+    if delta < 0:
+        queryset = queryset.filter(**{f"{field}__gte": -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+def adjust_profile(profile_id, field, delta):
+    _adjust(ProfileStats.objects.filter(pk=profile_id), field, delta)
+
+
+def adjust_user(user_id, field, delta):
+    _adjust(ProfileStats.objects.filter(profile__user_id=user_id), field, delta)
+
+
+def adjust_post_author(post_id, field, delta):
+    author = Post.objects.filter(pk=post_id).values("author_id")[:1]
+    _adjust(ProfileStats.objects.filter(profile__user_id=Subquery(author)), field, delta)
+
+
+def actual_counts(profile_ids):
+    """``{profile_id: {field: value}}`` counted from the source tables."""
+    counts = {profile_id: dict.fromkeys(FIELDS, 0) for profile_id in profile_ids}
+    sources = (
+        ("followers_count", Follow.objects.filter(user_to__in=profile_ids), "user_to"),
+        ("following_count", Follow.objects.filter(user_from__in=profile_ids), "user_from"),
+        (
+            "posts_count",
+            Post.objects.filter(author__profile__in=profile_ids, parent_post__isnull=True),
+            "author__profile",
+        ),
+        (
+            "likes_received",
+            Like.objects.filter(post__author__profile__in=profile_ids),
+            "post__author__profile",
+        ),
+    )
+    for field, queryset, group in sources:
+        rows = queryset.order_by().values(group).annotate(total=Count("pk"))
+        for row in rows.values_list(group, "total"):
+            counts[row[0]][field] = row[1]
+    return counts
+
+
+def get_stats(profile):
+    """The profile's ``ProfileStats``, counted and stored on first use.
+
+    The row is created empty and locked before the count, so events from
+    then on move it instead of being dropped for lack of a row.  One whose
+    source row is committed just before the count but adjusts after the
+    lock is counted twice; ``reconcile_profile_stats`` fixes that.
+    """
+    try:
+        return profile.stats
+    except ProfileStats.DoesNotExist:
+        pass
+    stats, created = ProfileStats.objects.get_or_create(profile=profile)
+    if created:
+        with transaction.atomic():
+            stats = ProfileStats.objects.select_for_update().get(pk=profile.pk)
+            for field, value in actual_counts([profile.pk])[profile.pk].items():
+                setattr(stats, field, value)
+            stats.save(update_fields=FIELDS)
+    return stats
+
+
+def reconcile(batch_size=DEFAULT_BATCH_SIZE):
+    """Recount every profile's stats.  Returns ``(checked, created, fixed)``."""
+    checked = created = fixed = 0
+    last_pk = 0
+    while True:
+        profile_ids = list(
+            Profile.objects.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not profile_ids:
+            break
+        last_pk = profile_ids[-1]
+        checked += len(profile_ids)
+
+        counts = actual_counts(profile_ids)
+        existing = ProfileStats.objects.in_bulk(profile_ids)
+        missing = [
+            ProfileStats(profile_id=profile_id, **counts[profile_id])
+            for profile_id in profile_ids
+            if profile_id not in existing
+        ]
+        drifted = []
+        for profile_id, stats in existing.items():
+            actual = counts[profile_id]
+            if any(getattr(stats, field) != actual[field] for field in FIELDS):
+                for field in FIELDS:
+                    setattr(stats, field, actual[field])
+                drifted.append(stats)
+        ProfileStats.objects.bulk_create(missing, ignore_conflicts=True)
+        if drifted:
+            ProfileStats.objects.bulk_update(drifted, FIELDS)
+        created += len(missing)
+        fixed += len(drifted)
+    return checked, created, fixed
@@ -1,3 +1,109 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models.signals import post_save
 from django.test import TestCase
+from django.urls import reverse
+
+from core.testing import QueryBudgetMixin
+from likes.models import Like
+from likes.toggles import toggle_like
+from posts.models import Post
+from relationships.models import Follow
+from .models import Profile, ProfileStats
+from .stats import get_stats
+
+
+class ProfilePostsPaginationTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="tester", password="pass12345"
+        )
+        Profile.objects.create(user=self.user)
+        for index in range(12):
+            Post.objects.create(author=self.user, content=f"Post {index}")
+        self.client.login(username="tester", password="pass12345")
+
+    def test_profile_posts_are_cursor_paginated(self):
+        url = reverse("accounts:profile_detail", args=["tester"])
+        first = self.client.get(url).context["page_obj"]
+        self.assertEqual(len(first), 10)
+        self.assertTrue(first.has_next())
+
+        second = self.client.get(url, {"cursor": first.next_cursor}).context["page_obj"]
+        self.assertEqual(len(second), 2)
+        self.assertFalse(second.has_next())
+        self.assertFalse({post.id for post in first} & {post.id for post in second})
+
+
+class ProfileStatsTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.author = User.objects.create_user(username="author", password="pass12345")
+        self.fan = User.objects.create_user(username="fan", password="pass12345")
+        self.author_profile = Profile.objects.create(user=self.author)
+        self.fan_profile = Profile.objects.create(user=self.fan)
+        self.post = Post.objects.create(author=self.author, content="Hello")
+        Like.objects.create(user=self.fan, post=self.post)
+
+    def assertStats(self, profile, followers, following, posts, likes):
+        stats = ProfileStats.objects.get(profile=profile)
+        self.assertEqual(
+            (stats.followers_count, stats.following_count, stats.posts_count, stats.likes_received),
+            (followers, following, posts, likes),
+        )
+
+    def test_stats_are_counted_once_then_kept_up_to_date(self):
+        self.assertStats(get_stats(self.author_profile), 0, 0, 1, 1)
+        get_stats(self.fan_profile)
+
+        Follow.objects.create(user_from=self.fan_profile, user_to=self.author_profile)
+        reply = Post.objects.create(author=self.fan, content="Hi", parent_post=self.post)
+        Post.objects.create(author=self.author, content="Second")
+        Like.objects.create(user=self.author, post=reply)
+        toggle_like(self.author.id, self.post.id)
+        self.assertStats(self.author_profile, 1, 0, 2, 2)
+        self.assertStats(self.fan_profile, 0, 1, 0, 1)
+
+        toggle_like(self.fan.id, self.post.id)
+        Follow.objects.all().delete()
+        self.post.delete()
+        self.assertStats(self.author_profile, 0, 0, 1, 0)
+        self.assertStats(self.fan_profile, 0, 0, 0, 0)
+
+    def test_follow_while_stats_are_first_counted(self):
+        def follow_meanwhile(sender, instance, created, **kwargs):
+            if created and instance.profile_id == self.author_profile.pk:
+                Follow.objects.create(user_from=self.fan_profile, user_to=self.author_profile)
+
+        post_save.connect(follow_meanwhile, sender=ProfileStats)
+        self.addCleanup(post_save.disconnect, follow_meanwhile, sender=ProfileStats)
+        get_stats(self.author_profile)
+
+        self.assertStats(self.author_profile, 1, 0, 1, 1)
+
+    def test_reconcile_creates_and_fixes_rows(self):
+        get_stats(self.author_profile)
+        ProfileStats.objects.filter(profile=self.author_profile).update(likes_received=40)
+
+        out = StringIO()
+        call_command("reconcile_profile_stats", stdout=out)
+        self.assertIn("Checked 2 profiles, created 1, fixed 1.", out.getvalue())
+        self.assertStats(self.author_profile, 0, 0, 1, 1)
+        self.assertStats(self.fan_profile, 0, 0, 0, 0)
+
+    def test_profile_header_reads_stored_stats(self):
+        for index in range(30):
+            fan = get_user_model().objects.create_user(username=f"fan{index}", password="pass12345")
+            Like.objects.create(user=fan, post=self.post)
+        self.client.login(username="fan", password="pass12345")
+        url = reverse("accounts:profile_detail", args=["author"])
+        self.client.get(url)
 
-# Create your tests here.
+        with self.assertQueryBudget(14):
+            response = self.client.get(url)
+        self.assertEqual(response.context["stats"].likes_received, 31)
+        self.assertContains(response, "<span>31</span>", html=True)
@@ -8,14 +8,20 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.db.models import Exists, OuterRef
 from django.views.decorators.http import require_GET, require_http_methods, require_POST
 
+from core.pagination import CursorPaginator
 from .forms import RegisterForm, ProfileForm
 from .models import Profile
+from .stats import get_stats
 from likes.models import Like
 from bookmarks.models import Bookmark
 from posts.models import Post
+from relationships import graph
 
 User = get_user_model()
 
+PROFILE_POSTS_PER_PAGE = 10
+PROFILE_POSTS_ORDERING = ("-created_at", "-id")
+
 
 @require_http_methods(["GET", "POST"])
 def register_view(request):
@@ -83,7 +89,7 @@ def username_check(request):
 @login_required
 def profile_view(request):
 	profile, _ = Profile.objects.get_or_create(user=request.user)
-	total_likes = Like.objects.filter(post__author=profile.user).count()
+	profile_stats = get_stats(profile)
 	posts = (
 		Post.objects.filter(author=profile.user, parent_post__isnull=True)
 		.select_related("author", "author__profile")
@@ -95,8 +101,11 @@ def profile_view(request):
 				Bookmark.objects.filter(user=request.user, post=OuterRef("pk"))
 			),
 		)
-		.order_by("-created_at")
+		.order_by(*PROFILE_POSTS_ORDERING)
 	)
+	page_obj = CursorPaginator(
+		posts, PROFILE_POSTS_PER_PAGE, PROFILE_POSTS_ORDERING
+	).get_page(request.GET.get("cursor"))
 	return render(
 		request,
 		"accounts/profile.html",
@@ -104,8 +113,9 @@ def profile_view(request):
 			"profile": profile,
 			"is_owner": True,
 			"follow_state": None,
-			"total_likes": total_likes,
-			"posts": posts,
+			"stats": profile_stats,
+			"posts": page_obj,
+			"page_obj": page_obj,
 		},
 	)
 
@@ -114,8 +124,8 @@ def profile_view(request):
 def profile_detail_view(request, username):
 	user = get_object_or_404(User, username=username)
 	profile, _ = Profile.objects.get_or_create(user=user)
-	viewer_profile, _ = Profile.objects.get_or_create(user=request.user)
-	total_likes = Like.objects.filter(post__author=profile.user).count()
+	Profile.objects.get_or_create(user=request.user)
+	profile_stats = get_stats(profile)
 	posts = (
 		Post.objects.filter(author=profile.user, parent_post__isnull=True)
 		.select_related("author", "author__profile")
@@ -127,20 +137,13 @@ def profile_detail_view(request, username):
 				Bookmark.objects.filter(user=request.user, post=OuterRef("pk"))
 			),
 		)
-		.order_by("-created_at")
+		.order_by(*PROFILE_POSTS_ORDERING)
 	)
+	page_obj = CursorPaginator(
+		posts, PROFILE_POSTS_PER_PAGE, PROFILE_POSTS_ORDERING
+	).get_page(request.GET.get("cursor"))
 
-	following = profile.followers.filter(pk=viewer_profile.pk).exists()
-	followed_by = profile.following.filter(pk=viewer_profile.pk).exists()
-
-	if following and followed_by:
-		follow_state = "friends"
-	elif followed_by and not following:
-		follow_state = "mutual"
-	elif following:
-		follow_state = "following"
-	else:
-		follow_state = "none"
+	follow_state = graph.follow_state(request.user.pk, user.pk)
 
 	return render(
 		request,
@@ -149,8 +152,9 @@ def profile_detail_view(request, username):
 			"profile": profile,
 			"is_owner": user == request.user,
 			"follow_state": follow_state,
-			"total_likes": total_likes,
-			"posts": posts,
+			"stats": profile_stats,
+			"posts": page_obj,
+			"page_obj": page_obj,
 		},
 	)
 
@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+# Sent (sender=Bookmark) when a bookmark is added or removed through
+# bookmarks.toggles, which doesn't send post_save/post_delete.
+# Arguments: user_id, post_id, bookmarked, created_at (of the bookmark).
+bookmarks_changed = Signal()
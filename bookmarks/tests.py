@@ -44,3 +44,22 @@ class BookmarkTests(TestCase):
         self.assertFalse(
             Bookmark.objects.filter(user=self.user, post=self.post).exists()
         )
+
+    def test_bookmark_state_is_idempotent(self):
+        self.client.login(username="tester", password="pass12345")
+        url = reverse("bookmarks:state", args=[self.post.id])
+
+        self.assertTrue(self.client.put(url).json()["changed"])
+        self.assertFalse(self.client.put(url).json()["changed"])
+        self.assertEqual(Bookmark.objects.filter(user=self.user, post=self.post).count(), 1)
+        self.assertEqual(
+            self.client.delete(url).json(), {"bookmarked": False, "changed": True}
+        )
+        self.assertFalse(self.client.delete(url).json()["changed"])
+
+        missing = reverse("bookmarks:state", args=[self.post.id + 1])
+        self.assertEqual(self.client.put(missing).status_code, 404)
+        self.assertEqual(
+            self.client.post(reverse("bookmarks:toggle", args=[self.post.id + 1])).status_code,
+            404,
+        )
@@ -0,0 +1,52 @@
+"""Adding and removing bookmarks atomically (see core.toggles)."""
+
+from django.db import transaction
+
+from core import toggles
+from posts.models import Post
+from .models import Bookmark
+from .signals import bookmarks_changed
+
+
+def _add(user_id, post_id):
+    created_at = toggles.add_row(Bookmark, user_id, post_id)
+    if created_at is None and not Post.objects.filter(pk=post_id).exists():
+        raise Post.DoesNotExist
+    return created_at
+
+
+def _finish(user_id, post_id, bookmarked, created_at):
+    if created_at is None:
+        return False
+    bookmarks_changed.send(
+        sender=Bookmark,
+        user_id=user_id,
+        post_id=post_id,
+        bookmarked=bookmarked,
+        created_at=created_at,
+    )
+    return True
+
+
+def set_bookmark(user_id, post_id, bookmarked):
+    """Make the bookmark exist or not; safe to repeat.  Returns ``changed``.
+
+    Adding a bookmark to a missing post raises ``Post.DoesNotExist``.
+    """
+    with transaction.atomic():
+        if bookmarked:
+            created_at = _add(user_id, post_id)
+        else:
+            created_at = toggles.remove_row(Bookmark, user_id, post_id)
+        return _finish(user_id, post_id, bookmarked, created_at)
+
+
+def toggle_bookmark(user_id, post_id):
+    """Remove the bookmark if there is one, else add it.  Returns ``bookmarked``."""
+    with transaction.atomic():
+        created_at = toggles.remove_row(Bookmark, user_id, post_id)
+        bookmarked = created_at is None
+        if bookmarked:
+            created_at = _add(user_id, post_id)
+        _finish(user_id, post_id, bookmarked, created_at)
+    return bookmarked
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import BookmarkListView, toggle_bookmark, remove_bookmark
+from .views import BookmarkListView, bookmark_state, toggle_bookmark, remove_bookmark
 
 app_name = "bookmarks"
 
@@ -7,4 +7,5 @@ urlpatterns = [
     path("bookmarks/", BookmarkListView.as_view(), name="list"),
     path("bookmark/<int:post_id>/", toggle_bookmark, name="toggle"),
     path("bookmark/<int:post_id>/remove/", remove_bookmark, name="remove"),
+    path("api/posts/<int:post_id>/bookmark/", bookmark_state, name="state"),
 ]
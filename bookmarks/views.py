@@ -1,17 +1,19 @@
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.db.models import Exists, OuterRef
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.views.generic import ListView
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_http_methods, require_POST
 
+from core.pagination import CursorPaginationMixin
 from posts.models import Post
 from likes.models import Like
+from . import toggles
 from .models import Bookmark
 
 
-class BookmarkListView(LoginRequiredMixin, ListView):
+class BookmarkListView(LoginRequiredMixin, CursorPaginationMixin, ListView):
     model = Post
     template_name = "bookmarks/list.html"
     context_object_name = "posts"
@@ -33,21 +35,16 @@ class BookmarkListView(LoginRequiredMixin, ListView):
             ),
         )
 
-        return queryset.order_by("-created_at")
+        return queryset.order_by(*self.get_cursor_ordering())
 
 
 @login_required
 @require_POST
 def toggle_bookmark(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    bookmark_qs = Bookmark.objects.filter(user=request.user, post=post)
-
-    if bookmark_qs.exists():
-        bookmark_qs.delete()
-        bookmarked = False
-    else:
-        Bookmark.objects.create(user=request.user, post=post)
-        bookmarked = True
+    try:
+        bookmarked = toggles.toggle_bookmark(request.user.id, post_id)
+    except Post.DoesNotExist:
+        raise Http404
 
     if request.headers.get("x-requested-with") == "XMLHttpRequest":
         return JsonResponse(
@@ -59,6 +56,18 @@ def toggle_bookmark(request, post_id):
     return redirect(request.META.get("HTTP_REFERER", "bookmarks:list"))
 
 
+@login_required
+@require_http_methods(["PUT", "DELETE"])
+def bookmark_state(request, post_id):
+    """``PUT`` bookmarks the post and ``DELETE`` removes the bookmark; both repeatable."""
+    bookmarked = request.method == "PUT"
+    try:
+        changed = toggles.set_bookmark(request.user.id, post_id, bookmarked)
+    except Post.DoesNotExist:
+        raise Http404
+    return JsonResponse({"bookmarked": bookmarked, "changed": changed})
+
+
 @login_required
 @require_POST
 def remove_bookmark(request, post_id):
@@ -7,6 +7,8 @@ from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.utils import timezone
 
+from core.profiling import profile_event, profiled
+from core.querylog import track_queries
 from .models import ChatMessage, ChatThread
 
 User = get_user_model()
@@ -58,6 +60,7 @@ class ChatConsumer(AsyncWebsocketConsumer):
                     },
                 )
 
+    @profile_event
     async def receive(self, text_data):
         data = json.loads(text_data)
         event_type = data.get("type", "message")
@@ -108,11 +111,13 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 "created_at": message.created_at.isoformat(),
                 "image_url": message.image.url if message.image else None,
                 "file_url": message.file.url if message.file else None,
-                "file_name": message.file.name.split("/")[-1] if message.file else None,
+                "file_name": message.display_file_name or None,
             },
         )
 
     @database_sync_to_async
+    @profiled
+    @track_queries
     def is_participant(self, user_id):
         return ChatThread.objects.filter(
             id=self.thread_id,
@@ -120,6 +125,8 @@ class ChatConsumer(AsyncWebsocketConsumer):
         ).exists()
 
     @database_sync_to_async
+    @profiled
+    @track_queries
     def save_message(self, user_id, message_text):
         user = User.objects.get(id=user_id)
         thread = ChatThread.objects.get(id=self.thread_id)
@@ -128,6 +135,8 @@ class ChatConsumer(AsyncWebsocketConsumer):
         return ChatMessage.objects.create(sender=user, thread=thread, text=message_text)
 
     @database_sync_to_async
+    @profiled
+    @track_queries
     def mark_messages_read(self, reader_id, message_id):
         thread = ChatThread.objects.get(id=self.thread_id)
         if not thread.participants.filter(id=reader_id).exists():
@@ -1,5 +1,6 @@
 from django import forms
 
+from core.uploads import BoundedFileField, BoundedImageField
 from .models import ChatMessage
 
 
@@ -7,6 +8,10 @@ class ChatMessageForm(forms.ModelForm):
     class Meta:
         model = ChatMessage
         fields = ["text", "image", "file"]
+        field_classes = {
+            "image": BoundedImageField,
+            "file": BoundedFileField,
+        }
         widgets = {
             "text": forms.Textarea(
                 attrs={
@@ -26,3 +31,8 @@ class ChatMessageForm(forms.ModelForm):
             raise forms.ValidationError("Повідомлення має містити текст або медіа.")
 
         return cleaned_data
+
+    def save(self, commit=True):
+        if "file" in self.changed_data and self.cleaned_data.get("file"):
+            self.instance.file_name = self.cleaned_data["file"].name[:255]
+        return super().save(commit)
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0003_chatmessage_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatmessage',
+            name='file_name',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+    ]
@@ -11,7 +11,11 @@ class ChatThread(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     def other_participant(self, user):
-        return self.participants.exclude(id=user.id).first()
+        # Iterating .all() uses prefetched participants instead of querying.
+        return next(
+            (participant for participant in self.participants.all() if participant.pk != user.pk),
+            None,
+        )
 
     def __str__(self):
         participants = list(self.participants.values_list("username", flat=True))
@@ -35,11 +39,14 @@ class ChatMessage(models.Model):
         blank=True,
         null=True,
     )
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     file = models.FileField(
         upload_to="chat_files",
         blank=True,
         null=True,
     )
+    # Stored files are named by content hash; keep the name the sender used.
+    file_name = models.CharField(max_length=255, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     read_at = models.DateTimeField(blank=True, null=True)
     read_by = models.ForeignKey(
@@ -60,5 +67,11 @@ class ChatMessage(models.Model):
         if self.image:
             return "Image message"
         if self.file:
-            return f"File: {self.file.name.split('/')[-1]}"
+            return f"File: {self.display_file_name}"
         return "Message"
+
+    @property
+    def display_file_name(self):
+        if not self.file:
+            return ""
+        return self.file_name or self.file.name.split("/")[-1]
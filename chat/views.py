@@ -9,48 +9,46 @@ from django.shortcuts import get_object_or_404, redirect, render
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 
-from relationships.models import Follow
+from relationships import graph
 from .forms import ChatMessageForm
 from .models import ChatThread
 
 User = get_user_model()
 
 
-def _is_user_online(user_id):
-    return bool(cache.get(f"chat_online_count_{user_id}"))
+def _online_key(user_id):
+    return f"chat_online_count_{user_id}"
 
 
-def _are_friends(profile_a, profile_b):
-    if not profile_a or not profile_b:
-        return False
-    return (
-        Follow.objects.filter(user_from=profile_a, user_to=profile_b).exists()
-        and Follow.objects.filter(user_from=profile_b, user_to=profile_a).exists()
-    )
-
-
-@login_required
-def thread_list(request):
+def _thread_items(user):
     threads = (
-        ChatThread.objects.filter(participants=request.user)
+        ChatThread.objects.filter(participants=user)
         .annotate(last_message_at=Max("messages__created_at"))
-        .prefetch_related("participants")
+        .prefetch_related("participants__profile")
         .order_by("-last_message_at", "-updated_at")
     )
-    request_profile = getattr(request.user, "profile", None)
+    others = [(thread, thread.other_participant(user)) for thread in threads]
+    friend_ids = graph.friends_among(
+        user.id, [other.id for _, other in others if other]
+    )
+    online = cache.get_many([_online_key(friend_id) for friend_id in friend_ids])
     thread_items = []
-    for thread in threads:
-        other_user = thread.other_participant(request.user)
-        other_profile = getattr(other_user, "profile", None) if other_user else None
-        is_friend = _are_friends(request_profile, other_profile)
+    for thread, other_user in others:
+        is_friend = bool(other_user) and other_user.id in friend_ids
         thread_items.append(
             {
                 "thread": thread,
                 "other": other_user,
                 "is_friend": is_friend,
-                "is_online": is_friend and other_user and _is_user_online(other_user.id),
+                "is_online": is_friend and bool(online.get(_online_key(other_user.id))),
             }
         )
+    return thread_items
+
+
+@login_required
+def thread_list(request):
+    thread_items = _thread_items(request.user)
     context = {
         "thread": None,
         "chat_messages": [],
@@ -66,36 +64,12 @@ def thread_list(request):
 @login_required
 def chat_page(request, thread_id):
     thread = get_object_or_404(ChatThread, id=thread_id, participants=request.user)
-    chat_messages = thread.messages.all().order_by("created_at")
-    other_user = thread.participants.exclude(id=request.user.id).first()
-    request_profile = getattr(request.user, "profile", None)
-    other_profile = getattr(other_user, "profile", None) if other_user else None
-    is_friend = _are_friends(request_profile, other_profile)
-    is_online = bool(other_user) and is_friend and _is_user_online(other_user.id)
-
-    threads = (
-        ChatThread.objects.filter(participants=request.user)
-        .annotate(last_message_at=Max("messages__created_at"))
-        .prefetch_related("participants")
-        .order_by("-last_message_at", "-updated_at")
-    )
-    thread_items = []
-    for item in threads:
-        item_other_user = item.other_participant(request.user)
-        item_other_profile = (
-            getattr(item_other_user, "profile", None) if item_other_user else None
-        )
-        item_is_friend = _are_friends(request_profile, item_other_profile)
-        thread_items.append(
-            {
-                "thread": item,
-                "other": item_other_user,
-                "is_friend": item_is_friend,
-                "is_online": item_is_friend
-                and item_other_user
-                and _is_user_online(item_other_user.id),
-            }
-        )
+    chat_messages = thread.messages.select_related("sender").order_by("created_at")
+    thread_items = _thread_items(request.user)
+    current = next(item for item in thread_items if item["thread"].pk == thread.pk)
+    other_user = current["other"]
+    is_friend = current["is_friend"]
+    is_online = current["is_online"]
 
     context = {
         "thread": thread,
@@ -159,7 +133,7 @@ def send_message(request, thread_id):
             "created_at": message.created_at.isoformat(),
             "image_url": message.image.url if message.image else None,
             "file_url": message.file.url if message.file else None,
-            "file_name": message.file.name.split("/")[-1] if message.file else None,
+            "file_name": message.display_file_name or None,
         },
     )
 
@@ -0,0 +1,102 @@
+"""In-process background work.
+
+Work that doesn't have to finish inside the user's request (score
+recalculation, image processing, ...) is handed to a small thread pool.
+``CoalescingQueue`` additionally collects keys for ``delay`` seconds and
+hands them to its handler as one batch, so a burst of events for the same
+object costs a single run.
+
+With ``BACKGROUND_TASKS_ASYNC = False`` (set by the test runner) everything
+runs inline, in the caller's thread and transaction.
+"""
+
+import atexit
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def is_async():
+    return getattr(settings, "BACKGROUND_TASKS_ASYNC", True)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "BACKGROUND_WORKERS", 2),
+                thread_name_prefix="background",
+            )
+        return _executor
+
+
+def _run(func, args, kwargs):
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    except Exception:
+        logger.exception("Background task %s failed", getattr(func, "__name__", func))
+    finally:
+        connections.close_all()
+
+
+def run_in_background(func, *args, **kwargs):
+    """Run ``func`` on the background pool once the current transaction commits."""
+    if not is_async():
+        return func(*args, **kwargs)
+
+    transaction.on_commit(lambda: _get_executor().submit(_run, func, args, kwargs))
+
+
+class CoalescingQueue:
+    """Dirty set that is flushed to ``handler(keys)`` after a debounce window.
+
+    The first ``add()`` opens a window of ``delay`` seconds; every key added
+    until it closes is deduplicated and handled in the same batch.
+    """
+
+    def __init__(self, handler, delay):
+        self.handler = handler
+        self.delay = delay
+        self._pending = set()
+        self._timer = None
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def get_delay(self):
+        return self.delay() if callable(self.delay) else self.delay
+
+    def add(self, key):
+        if not is_async():
+            self.handler({key})
+            return
+        transaction.on_commit(lambda: self._add(key))
+
+    def _add(self, key):
+        with self._lock:
+            self._pending.add(key)
+            if self._timer is None:
+                self._timer = threading.Timer(self.get_delay(), self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            keys, self._pending = self._pending, set()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if keys:
+            _run(self.handler, (keys,), {})
+
+    def __len__(self):
+        return len(self._pending)
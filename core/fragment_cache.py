@@ -0,0 +1,72 @@
+"""Cached template fragments with hit/miss accounting.
+
+Fragments are keyed by a name plus the versions of everything they show
+(``post.version``, ``profile.version``, counters, ...), so editing an
+object simply makes the old key unreachable; nothing is ever deleted.
+
+Hits and misses are counted per fragment name in the cache itself, which
+makes them visible across processes when the cache is shared; see the
+``fragment_cache_stats`` command.
+"""
+
+import hashlib
+
+from django.core.cache import cache
+from django.utils.safestring import mark_safe
+
+TIMEOUT = 60 * 60
+HIT = "hit"
+MISS = "miss"
+
+
+def make_key(name, parts):
+    digest = hashlib.md5(
+        ":".join(str(part) for part in parts).encode(), usedforsecurity=False
+    ).hexdigest()
+    return f"fragment:{name}:{digest}"
+
+
+def _stats_key(name, outcome):
+    return f"fragment-stats:{name}:{outcome}"
+
+
+def _count(name, outcome):
+    key = _stats_key(name, outcome)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_or_render(name, parts, render, timeout=TIMEOUT):
+    """Return the cached fragment for ``parts`` or store ``render()``'s output."""
+    key = make_key(name, parts)
+    html = cache.get(key)
+    if html is not None:
+        _count(name, HIT)
+        return mark_safe(html)
+
+    _count(name, MISS)
+    html = str(render())
+    cache.set(key, html, timeout)
+    return mark_safe(html)
+
+
+def stats(names):
+    """Return ``{name: (hits, misses)}`` for the given fragment names."""
+    keys = [_stats_key(name, outcome) for name in names for outcome in (HIT, MISS)]
+    values = cache.get_many(keys)
+    return {
+        name: (
+            values.get(_stats_key(name, HIT), 0),
+            values.get(_stats_key(name, MISS), 0),
+        )
+        for name in names
+    }
+
+
+def reset_stats(names):
+    cache.delete_many(
+        [_stats_key(name, outcome) for name in names for outcome in (HIT, MISS)]
+    )
@@ -0,0 +1,176 @@
+"""Resized WebP/JPEG derivatives of uploaded images.
+
+Saving a model with an image field registered in ``IMAGE_FIELDS`` queues
+``generate_derivatives`` on the background pool.  It writes one WebP and
+one JPEG per configured width (never upscaling) next to the media as
+
+    derivatives/<upload path without extension>.w<width>.<webp|jpg>
+
+and records ``{"source": <upload name>, "widths": [...]}`` in the model's
+variants JSON field; templates build ``srcset`` from that (see the
+``images`` template library).  A variants record whose ``source`` differs
+from the current upload is stale and ignored until it is regenerated.
+"""
+
+import logging
+import posixpath
+from io import BytesIO
+
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.db.models import F
+from django.db.models.signals import post_save
+from PIL import Image, ImageOps
+
+from .background import run_in_background
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVES_DIR = "derivatives"
+FORMATS = (
+    ("webp", "WEBP", {"quality": 80, "method": 4}),
+    ("jpg", "JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+)
+
+AVATAR_WIDTHS = (48, 96, 320)
+COVER_WIDTHS = (640, 1080, 1920)
+CONTENT_WIDTHS = (320, 640, 1080)
+
+# "app_label.Model": {image field: (variants field, widths)}
+IMAGE_FIELDS = {
+    "posts.Post": {"image": ("image_variants", CONTENT_WIDTHS)},
+    "accounts.Profile": {
+        "avatar": ("avatar_variants", AVATAR_WIDTHS),
+        "cover_image": ("cover_variants", COVER_WIDTHS),
+    },
+    "chat.ChatMessage": {"image": ("image_variants", CONTENT_WIDTHS)},
+}
+
+
+def derivative_name(source_name, width, extension):
+    root, _ = posixpath.splitext(source_name)
+    return f"{DERIVATIVES_DIR}/{root}.w{width}.{extension}"
+
+
+def current_variants(fieldfile, variants):
+    """Widths available for ``fieldfile``, or ``()`` when missing or stale."""
+    if not fieldfile or not variants or variants.get("source") != fieldfile.name:
+        return ()
+    return tuple(variants.get("widths", ()))
+
+
+def _has_alpha(image):
+    return image.mode in ("RGBA", "LA") or (
+        image.mode == "P" and "transparency" in image.info
+    )
+
+
+def _flatten(image, background=(255, 255, 255)):
+    if _has_alpha(image):
+        image = image.convert("RGBA")
+        flat = Image.new("RGB", image.size, background)
+        flat.paste(image, mask=image.getchannel("A"))
+        return flat
+    return image.convert("RGB")
+
+
+def render_derivatives(fieldfile, widths):
+    """Write the derivatives of ``fieldfile``; returns the widths produced.
+
+    Widths larger than the original are skipped; the original width itself
+    is added unless the image is larger than every configured width.
+    """
+    storage = fieldfile.storage
+    largest = max(widths)
+    with storage.open(fieldfile.name, "rb") as source:
+        image = Image.open(source)
+        # JPEGs can be decoded at 1/2..1/8 scale; ask for the smallest scale
+        # that still covers the largest derivative (in either orientation).
+        image.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        image.load()
+
+    targets = sorted({width for width in widths if width < image.width})
+    if not targets or image.width <= largest:
+        targets.append(image.width)
+
+    has_alpha = _has_alpha(image)
+    produced = []
+    for width in targets:
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize(
+            (width, height), Image.Resampling.LANCZOS
+        )
+        for extension, pil_format, options in FORMATS:
+            if pil_format == "JPEG" or not has_alpha:
+                frame = _flatten(resized)
+            else:
+                frame = resized.convert("RGBA")
+            buffer = BytesIO()
+            frame.save(buffer, pil_format, **options)
+            name = derivative_name(fieldfile.name, width, extension)
+            if storage.exists(name):
+                storage.delete(name)
+            storage.save(name, ContentFile(buffer.getvalue()))
+        produced.append(width)
+    return produced
+
+
+def generate_derivatives(model_label, pk, field_name, force=False):
+    """Background task: build derivatives for one image field of one row."""
+    model = apps.get_model(model_label)
+    variants_field, widths = IMAGE_FIELDS[model_label][field_name]
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None:
+        return
+
+    fieldfile = getattr(instance, field_name)
+    if not fieldfile:
+        return
+    if not force and current_variants(fieldfile, getattr(instance, variants_field)):
+        return
+
+    # With content-addressed storage, identical uploads share a name and so
+    # share derivatives; reuse another row's instead of rendering again.
+    produced = None
+    if not force:
+        shared = (
+            model.objects.filter(
+                **{field_name: fieldfile.name, f"{variants_field}__source": fieldfile.name}
+            )
+            .exclude(pk=pk)
+            .values_list(variants_field, flat=True)
+            .first()
+        )
+        if shared:
+            produced = list(shared.get("widths", ()))
+    try:
+        if produced is None:
+            produced = render_derivatives(fieldfile, widths)
+    except (OSError, Image.DecompressionBombError):
+        logger.warning("Could not build derivatives of %s", fieldfile.name, exc_info=True)
+        return
+
+    updates = {variants_field: {"source": fieldfile.name, "widths": produced}}
+    if any(field.name == "version" for field in model._meta.concrete_fields):
+        # Cached cards are keyed by version; make them pick up the variants.
+        updates["version"] = F("version") + 1
+    # Only record the variants if the upload didn't change in the meantime.
+    model.objects.filter(pk=pk, **{field_name: fieldfile.name}).update(**updates)
+
+
+def schedule_derivatives(sender, instance, **kwargs):
+    model_label = sender._meta.label
+    for field_name, (variants_field, _) in IMAGE_FIELDS[model_label].items():
+        fieldfile = getattr(instance, field_name)
+        if fieldfile and not current_variants(fieldfile, getattr(instance, variants_field)):
+            run_in_background(generate_derivatives, model_label, instance.pk, field_name)
+
+
+def connect_signals():
+    for model_label in IMAGE_FIELDS:
+        post_save.connect(
+            schedule_derivatives,
+            sender=model_label,
+            dispatch_uid=f"core.images.{model_label}",
+        )
@@ -0,0 +1,239 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import CustomUser, Profile
+from bookmarks.models import Bookmark
+from chat.models import ChatMessage, ChatThread
+from likes.models import Like
+from posts.models import Post
+from relationships.models import Follow
+
+
+def percentile(samples, fraction):
+    """Linear-interpolated percentile of ``samples`` (0 <= fraction <= 1)."""
+    ordered = sorted(samples)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=settings.BASE_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the feed, post detail, profile, bookmarks and chat views through "
+        "the full middleware stack and report latency percentiles and query "
+        "counts per endpoint (use with generate_synthetic_data)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=50,
+            help="Timed requests per endpoint (default: 50).",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=5,
+            help="Untimed requests per endpoint first (default: 5).",
+        )
+        parser.add_argument(
+            "--endpoint",
+            action="append",
+            help="Only run this endpoint (may be repeated).",
+        )
+        parser.add_argument(
+            "--cold",
+            action="store_true",
+            help="Clear the cache before every request.",
+        )
+        parser.add_argument("--output", help="Write the results as JSON to this file.")
+        parser.add_argument(
+            "--compare",
+            help="A previous --output file to compare p50/p95 and queries against.",
+        )
+
+    # Subjects: a typical active user as the viewer, plus the most followed
+    # profile, the most replied-to post and the viewer's busiest chat.
+
+    def pick_subjects(self):
+        viewer = (
+            CustomUser.objects.annotate(
+                following=Count("profile__rel_from_set", distinct=True),
+                threads=Count("chat_threads", distinct=True),
+            )
+            .filter(following__gt=0)
+            .order_by("-threads", "-following", "pk")
+            .first()
+        )
+        if viewer is None:
+            raise CommandError("No users with follows; run generate_synthetic_data first.")
+        celebrity = (
+            Profile.objects.annotate(followers_total=Count("rel_to_set"))
+            .order_by("-followers_total", "pk")
+            .select_related("user")
+            .first()
+        )
+        post = Post.objects.filter(parent_post__isnull=True).order_by("-replies_count", "pk").first()
+        thread = (
+            ChatThread.objects.filter(participants=viewer)
+            .annotate(messages_count=Count("messages"))
+            .order_by("-messages_count", "pk")
+            .first()
+        )
+        return viewer, celebrity, post, thread
+
+    def endpoints(self, viewer, celebrity, post, thread):
+        anonymous = Client()
+        client = Client()
+        client.force_login(viewer)
+
+        feed_api = client.get(reverse("posts:feed_api")).json()
+        endpoints = {
+            "feed_anonymous": (anonymous, reverse("posts:home")),
+            "feed": (client, reverse("posts:home")),
+            "feed_api": (client, reverse("posts:feed_api")),
+        }
+        if feed_api["next_cursor"]:
+            endpoints["feed_page_2"] = (
+                client,
+                f"{reverse('posts:home')}?cursor={feed_api['next_cursor']}",
+            )
+        if post is not None:
+            endpoints["post_detail"] = (client, reverse("posts:post_detail", args=[post.pk]))
+        if celebrity is not None:
+            endpoints["profile"] = (
+                client,
+                reverse("accounts:profile_detail", args=[celebrity.user.username]),
+            )
+        endpoints["bookmarks"] = (client, reverse("bookmarks:list"))
+        endpoints["chat_threads"] = (client, reverse("chat:thread_list"))
+        if thread is not None:
+            endpoints["chat_thread"] = (
+                client,
+                reverse("chat:chat_thread_detail", args=[thread.pk]),
+            )
+        return endpoints
+
+    def measure(self, client, url, requests, warmup, cold):
+        for _ in range(warmup):
+            client.get(url)
+
+        latencies = []
+        queries = []
+        sizes = []
+        for _ in range(requests):
+            if cold:
+                cache.clear()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(url)
+                content = (
+                    b"".join(response.streaming_content)
+                    if response.streaming
+                    else response.content
+                )
+                latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f"{url} returned {response.status_code}.")
+            queries.append(len(captured.captured_queries))
+            sizes.append(len(content))
+
+        return {
+            "url": url,
+            "requests": requests,
+            "p50_ms": round(percentile(latencies, 0.50), 3),
+            "p95_ms": round(percentile(latencies, 0.95), 3),
+            "p99_ms": round(percentile(latencies, 0.99), 3),
+            "mean_ms": round(statistics.fmean(latencies), 3),
+            "queries_median": statistics.median(queries),
+            "queries_max": max(queries),
+            "bytes": round(statistics.fmean(sizes)),
+        }
+
+    def handle(self, *args, **options):
+        if options["requests"] < 1:
+            raise CommandError("--requests must be at least 1.")
+        subjects = self.pick_subjects()
+
+        results = {}
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            endpoints = self.endpoints(*subjects)
+            for name, (client, url) in endpoints.items():
+                if options["endpoint"] and name not in options["endpoint"]:
+                    continue
+                results[name] = self.measure(
+                    client, url, options["requests"], options["warmup"], options["cold"]
+                )
+
+        previous = {}
+        if options["compare"]:
+            with open(options["compare"], encoding="utf-8") as file:
+                previous = json.load(file).get("endpoints", {})
+
+        self.stdout.write(
+            f"{'endpoint':<16} {'p50':>9} {'p95':>9} {'p99':>9} {'queries':>8} {'bytes':>9}"
+        )
+        for name, result in results.items():
+            line = (
+                f"{name:<16} {result['p50_ms']:>7.1f}ms {result['p95_ms']:>7.1f}ms "
+                f"{result['p99_ms']:>7.1f}ms {result['queries_median']:>8} {result['bytes']:>9}"
+            )
+            before = previous.get(name)
+            if before:
+                change = (result["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100
+                line += (
+                    f"  p95 {change:+.0f}% "
+                    f"queries {result['queries_median'] - before['queries_median']:+g}"
+                )
+            self.stdout.write(line)
+
+        if options["output"]:
+            report = {
+                "commit": git_commit(),
+                "created_at": datetime.now(dt_timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "database": connection.vendor,
+                "options": {
+                    key: options[key] for key in ("requests", "warmup", "cold")
+                },
+                "rows": {
+                    "users": CustomUser.objects.count(),
+                    "follows": Follow.objects.count(),
+                    "posts": Post.objects.count(),
+                    "likes": Like.objects.count(),
+                    "bookmarks": Bookmark.objects.count(),
+                    "chat_messages": ChatMessage.objects.count(),
+                },
+                "endpoints": results,
+            }
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump(report, file, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}."))
@@ -0,0 +1,166 @@
+import random
+import statistics
+import threading
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+
+from accounts.models import CustomUser
+from bookmarks import toggles as bookmark_toggles
+from bookmarks.models import Bookmark
+from likes import toggles as like_toggles
+from likes.buffer import like_buffer
+from likes.models import Like
+from posts.models import Post
+from .bench_endpoints import percentile
+
+
+def orm_toggle_like(user_id, post_id):
+    """The previous exists()/delete()/create() toggle, as a baseline."""
+    post = Post.objects.get(pk=post_id)
+    likes = Like.objects.filter(user_id=user_id, post=post)
+    if likes.exists():
+        likes.delete()
+    else:
+        Like.objects.create(user_id=user_id, post=post)
+    post.refresh_from_db(fields=["likes_count"])
+
+
+def orm_toggle_bookmark(user_id, post_id):
+    post = Post.objects.get(pk=post_id)
+    bookmarks = Bookmark.objects.filter(user_id=user_id, post=post)
+    if bookmarks.exists():
+        bookmarks.delete()
+    else:
+        Bookmark.objects.create(user_id=user_id, post=post)
+
+
+OPERATIONS = {
+    ("like", "toggle"): like_toggles.toggle_like,
+    ("like", "set"): lambda user_id, post_id: like_toggles.set_like(
+        user_id, post_id, random.random() < 0.5
+    ),
+    ("like", "orm"): orm_toggle_like,
+    ("bookmark", "toggle"): bookmark_toggles.toggle_bookmark,
+    ("bookmark", "set"): lambda user_id, post_id: bookmark_toggles.set_bookmark(
+        user_id, post_id, random.random() < 0.5
+    ),
+    ("bookmark", "orm"): orm_toggle_bookmark,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer one post with concurrent like (or bookmark) clicks from several "
+        "threads and report clicks/sec, latency, errors and whether the post's "
+        "counter still matches its rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--threads", type=int, default=8, help="Concurrent clients (default: 8)."
+        )
+        parser.add_argument(
+            "--clicks", type=int, default=200, help="Clicks per thread (default: 200)."
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            help="Distinct users clicking (default: half the threads, so some "
+            "threads double-click as the same user).",
+        )
+        parser.add_argument("--post", type=int, help="Post to click on (default: most liked).")
+        parser.add_argument("--kind", choices=("like", "bookmark"), default="like")
+        parser.add_argument(
+            "--mode",
+            choices=("toggle", "set", "orm"),
+            default="toggle",
+            help="toggle, idempotent set (random on/off), or the old ORM toggle.",
+        )
+        parser.add_argument(
+            "--write-behind",
+            action="store_true",
+            help="Buffer likes and write them in batches (LIKE_WRITE_BEHIND).",
+        )
+
+    def handle(self, *args, **options):
+        threads = options["threads"]
+        if threads < 1 or options["clicks"] < 1:
+            raise CommandError("--threads and --clicks must be at least 1.")
+        users = options["users"] or max(1, threads // 2)
+        user_ids = list(CustomUser.objects.order_by("pk").values_list("pk", flat=True)[:users])
+        if len(user_ids) < users:
+            raise CommandError(f"Need {users} users; run generate_synthetic_data first.")
+        if options["post"]:
+            post_id = options["post"]
+        else:
+            post_id = (
+                Post.objects.order_by("-likes_count", "pk").values_list("pk", flat=True).first()
+            )
+        if post_id is None or not Post.objects.filter(pk=post_id).exists():
+            raise CommandError("No post to click on.")
+
+        operation = OPERATIONS[options["kind"], options["mode"]]
+        latencies = []
+        errors = Counter()
+        lock = threading.Lock()
+        start = threading.Barrier(threads)
+
+        def client(index):
+            user_id = user_ids[index % len(user_ids)]
+            mine = []
+            failed = Counter()
+            try:
+                start.wait()
+                for _ in range(options["clicks"]):
+                    began = time.perf_counter()
+                    try:
+                        operation(user_id, post_id)
+                    except Exception as error:  # counted; the run goes on
+                        failed[type(error).__name__] += 1
+                    mine.append((time.perf_counter() - began) * 1000)
+            finally:
+                connection.close()
+            with lock:
+                latencies.extend(mine)
+                errors.update(failed)
+
+        workers = [threading.Thread(target=client, args=(index,)) for index in range(threads)]
+        with override_settings(LIKE_WRITE_BEHIND=options["write_behind"]):
+            began = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - began
+            like_buffer.flush()
+
+        total = threads * options["clicks"]
+        self.stdout.write(
+            f"{options['kind']} {options['mode']}"
+            f"{' (write-behind)' if options['write_behind'] else ''}: {total} clicks by {threads} threads "
+            f"({len(user_ids)} users) on post {post_id} in {elapsed:.2f}s"
+        )
+        self.stdout.write(
+            f"  {total / elapsed:.0f} clicks/s, p50 {percentile(latencies, 0.5):.2f}ms, "
+            f"p95 {percentile(latencies, 0.95):.2f}ms, mean {statistics.fmean(latencies):.2f}ms"
+        )
+        if errors:
+            self.stdout.write(
+                self.style.WARNING(
+                    "  errors: " + ", ".join(f"{name} x{count}" for name, count in errors.items())
+                )
+            )
+
+        if options["kind"] == "like":
+            stored = Post.objects.values_list("likes_count", flat=True).get(pk=post_id)
+            actual = Like.objects.filter(post_id=post_id).count()
+            if stored == actual:
+                self.stdout.write(self.style.SUCCESS(f"  likes_count {stored} matches the likes."))
+            else:
+                self.stdout.write(
+                    self.style.ERROR(f"  likes_count {stored} but {actual} likes exist.")
+                )
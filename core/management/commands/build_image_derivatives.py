@@ -0,0 +1,48 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from core.images import IMAGE_FIELDS, current_variants, generate_derivatives
+
+
+class Command(BaseCommand):
+    help = "Build resized WebP/JPEG derivatives for uploaded images that lack them."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model",
+            action="append",
+            choices=sorted(IMAGE_FIELDS),
+            help="Only process this model (may be repeated; default: all).",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Rebuild derivatives even when they are up to date.",
+        )
+
+    def handle(self, *args, **options):
+        built = 0
+        for model_label in options["model"] or IMAGE_FIELDS:
+            model = apps.get_model(model_label)
+            for field_name, (variants_field, _) in IMAGE_FIELDS[model_label].items():
+                rows = (
+                    model.objects.exclude(**{field_name: ""})
+                    .exclude(**{f"{field_name}__isnull": True})
+                    .only("pk", field_name, variants_field)
+                    .order_by("pk")
+                    .iterator(chunk_size=500)
+                )
+                for instance in rows:
+                    fieldfile = getattr(instance, field_name)
+                    if not options["force"] and current_variants(
+                        fieldfile, getattr(instance, variants_field)
+                    ):
+                        continue
+                    generate_derivatives(
+                        model_label, instance.pk, field_name, force=options["force"]
+                    )
+                    built += 1
+                    if options["verbosity"] >= 2:
+                        self.stdout.write(f"{model_label}.{field_name}: {fieldfile.name}")
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {built} images."))
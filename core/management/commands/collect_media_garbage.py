@@ -0,0 +1,90 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from core.models import MediaBlob
+
+
+def referenced_names():
+    """Mark phase: ``{name: rows}`` for every file field of every model."""
+    references = Counter()
+    for model in apps.get_models():
+        for field in model._meta.concrete_fields:
+            if not isinstance(field, models.FileField):
+                continue
+            rows = (
+                model._default_manager.exclude(**{field.name: ""})
+                .exclude(**{f"{field.name}__isnull": True})
+                .values(field.name)
+                .annotate(rows=Count("pk"))
+                .order_by()
+            )
+            for row in rows:
+                references[row[field.name]] += row["rows"]
+    return references
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount references to stored media blobs and delete the blobs (and "
+        "their derivatives) that no model row points at any more."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-hours",
+            type=int,
+            default=24,
+            help="Keep unreferenced blobs an upload resolved to within this "
+            "many hours; it may not have been saved to its row yet (default: 24).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report what would be deleted without deleting anything.",
+        )
+
+    def collect(self, blob, cutoff):
+        """Delete ``blob`` unless an upload resolved to it since the scan."""
+        with transaction.atomic():
+            deleted, _ = MediaBlob.objects.filter(
+                pk=blob.pk, last_referenced_at__lt=cutoff
+            ).delete()
+            if deleted:
+                default_storage.purge(blob.name)
+        return bool(deleted)
+
+    def handle(self, *args, **options):
+        references = referenced_names()
+        cutoff = timezone.now() - timedelta(hours=options["grace_hours"])
+
+        recounted = []
+        garbage = []
+        for blob in MediaBlob.objects.order_by("pk").iterator(chunk_size=1000):
+            count = references.get(blob.name, 0)
+            if count == 0 and blob.last_referenced_at < cutoff:
+                garbage.append(blob)
+            elif blob.references != count:
+                blob.references = count
+                recounted.append(blob)
+
+        if not options["dry_run"]:
+            MediaBlob.objects.bulk_update(recounted, ["references"], batch_size=1000)
+            garbage = [blob for blob in garbage if self.collect(blob, cutoff)]
+        freed = sum(blob.size for blob in garbage)
+
+        if options["verbosity"] >= 2:
+            for blob in garbage:
+                self.stdout.write(f"unreferenced: {blob.name}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{'Would delete' if options['dry_run'] else 'Deleted'} "
+                f"{len(garbage)} blobs ({freed} bytes); recounted {len(recounted)}."
+            )
+        )
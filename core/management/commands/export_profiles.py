@@ -0,0 +1,58 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import profiling
+
+
+class Command(BaseCommand):
+    help = (
+        "List the sampled endpoint profiles and write them as folded stacks "
+        "(for flamegraph.pl or speedscope)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "endpoints",
+            nargs="*",
+            help="Endpoints to export (default: all profiled endpoints).",
+        )
+        parser.add_argument(
+            "--output-dir",
+            help="Write <endpoint>.folded files here instead of only listing.",
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Drop all stored profiles afterwards.",
+        )
+        parser.add_argument(
+            "--token",
+            action="store_true",
+            help=f"Print a signed {profiling.HEADER} header value and exit.",
+        )
+
+    def handle(self, *args, **options):
+        if options["token"]:
+            self.stdout.write(profiling.make_token())
+            return
+
+        labels = options["endpoints"] or profiling.endpoints()
+        if options["output_dir"]:
+            os.makedirs(options["output_dir"], exist_ok=True)
+        for label in labels:
+            stored = profiling.load(label)
+            if stored is None:
+                raise CommandError(f"No profile for {label!r}.")
+            self.stdout.write(
+                f"{label}: {stored['requests']} requests, {stored['samples']} samples, "
+                f"{stored['seconds'] / stored['requests'] * 1000:.1f} ms average"
+            )
+            if options["output_dir"]:
+                path = os.path.join(options["output_dir"], f"{label.replace(':', '.')}.folded")
+                with open(path, "w", encoding="utf-8") as file:
+                    file.write(profiling.folded(label))
+
+        if options["clear"]:
+            profiling.clear()
+            self.stdout.write(self.style.SUCCESS("Profiles cleared."))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from core import fragment_cache
+
+DEFAULT_FRAGMENTS = ("post_card", "comment_card", "anonymous_feed")
+
+
+class Command(BaseCommand):
+    help = "Show hit/miss counts of cached template fragments and pages."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "names",
+            nargs="*",
+            default=DEFAULT_FRAGMENTS,
+            help=f"Fragment names (default: {' '.join(DEFAULT_FRAGMENTS)}).",
+        )
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Zero the counters after printing them.",
+        )
+
+    def handle(self, *args, **options):
+        names = options["names"]
+        for name, (hits, misses) in fragment_cache.stats(names).items():
+            total = hits + misses
+            ratio = hits / total if total else 0.0
+            self.stdout.write(
+                f"{name}: {hits} hits, {misses} misses, hit ratio {ratio:.1%}"
+            )
+
+        if options["reset"]:
+            fragment_cache.reset_stats(names)
+            self.stdout.write(self.style.SUCCESS("Counters reset."))
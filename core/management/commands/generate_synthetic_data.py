@@ -0,0 +1,98 @@
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import CustomUser
+from core.synthetic import PASSWORD, SCALES, Generator
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with synthetic users, follows, posts with reply "
+        "trees, likes, bookmarks and chats for load testing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale",
+            choices=sorted(SCALES),
+            default="small",
+            help="Preset volumes (default: small); the options below override it.",
+        )
+        parser.add_argument("--users", type=int)
+        parser.add_argument("--posts", type=int, help="Posts including replies.")
+        parser.add_argument("--threads", type=int, help="Chat threads.")
+        parser.add_argument("--reply-ratio", type=float, default=0.6)
+        parser.add_argument("--follows-per-user", type=int, default=25)
+        parser.add_argument("--likes-per-post", type=int, default=6)
+        parser.add_argument("--bookmarks-per-user", type=int, default=8)
+        parser.add_argument("--messages-per-thread", type=int, default=30)
+        parser.add_argument(
+            "--days", type=int, default=14, help="Spread content over this many days."
+        )
+        parser.add_argument(
+            "--prefix",
+            default="synth",
+            help="Username prefix of the generated users (default: synth).",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--skip-indexes",
+            action="store_true",
+            help="Don't rebuild search/hashtag indexes, scores and profile stats afterwards.",
+        )
+        parser.add_argument(
+            "--timelines",
+            action="store_true",
+            help="Also materialize home timelines for every user.",
+        )
+
+    def handle(self, *args, **options):
+        if CustomUser.objects.filter(username__startswith=f"{options['prefix']}_").exists():
+            raise CommandError(
+                f"Users named {options['prefix']}_* already exist; pick another --prefix."
+            )
+
+        scale = SCALES[options["scale"]]
+        generator = Generator(
+            users=options["users"] or scale["users"],
+            posts=options["posts"] or scale["posts"],
+            threads=options["threads"] if options["threads"] is not None else scale["threads"],
+            reply_ratio=options["reply_ratio"],
+            follows_per_user=options["follows_per_user"],
+            likes_per_post=options["likes_per_post"],
+            bookmarks_per_user=options["bookmarks_per_user"],
+            messages_per_thread=options["messages_per_thread"],
+            days=options["days"],
+            prefix=options["prefix"],
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+            log=self.stdout.write if options["verbosity"] >= 1 else None,
+        )
+
+        started = time.perf_counter()
+        written = generator.run()
+        self.stdout.write(f"Generated in {time.perf_counter() - started:.1f}s.")
+
+        if not options["skip_indexes"]:
+            quiet = {"verbosity": 0, "stdout": self.stdout}
+            for command in (
+                "index_post_tags",
+                "rebuild_search_index",
+                "recompute_scores",
+                "reconcile_profile_stats",
+            ):
+                self.stdout.write(f"Running {command}...")
+                call_command(command, **quiet)
+        if options["timelines"]:
+            self.stdout.write("Running build_timelines...")
+            call_command("build_timelines", verbosity=0, stdout=self.stdout)
+
+        summary = ", ".join(f"{count} {name}" for name, count in written.items())
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {summary}. Users log in with password {PASSWORD!r}."
+            )
+        )
@@ -0,0 +1,25 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def copy_created_at(apps, schema_editor):
+    MediaBlob = apps.get_model("core", "MediaBlob")
+    MediaBlob.objects.update(last_referenced_at=models.F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediablob',
+            name='last_referenced_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+from django.db import models
+from django.utils import timezone
+
+
+class MediaBlob(models.Model):
+    """One stored file of ``ContentAddressedStorage``, named by its content hash."""
+
+    name = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.PositiveBigIntegerField()
+    references = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Moved on every upload resolving to this blob; the garbage collector's
+    # grace period counts from here.
+    last_referenced_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.name
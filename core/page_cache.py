@@ -0,0 +1,111 @@
+"""Whole-page cache for responses that are the same for every visitor.
+
+Each entry records the version of its page (``bump_version`` invalidates
+every cached copy of a page at once) and a soft expiry.  A fresh entry is
+served as is.  When an entry is stale, only the request that wins
+``cache.add`` on the entry's lock renders the page again; everyone else
+keeps getting the stale copy meanwhile (or, if there is no copy at all,
+waits briefly for the winner), so an expiry under load costs one render.
+
+CSRF tokens are cut out of the stored HTML and filled in per request, so
+every visitor gets a token matching their own cookie.  Hits and misses are
+counted like template fragments (see ``fragment_cache_stats``).
+"""
+
+import re
+import time
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+
+from .fragment_cache import HIT, MISS, _count, make_key
+
+CSRF_TOKEN_RE = re.compile(r'(name="csrfmiddlewaretoken" value=")[A-Za-z0-9]+(")')
+CSRF_PLACEHOLDER = "\x00csrf\x00"
+
+LOCK_TIMEOUT = 30
+WAIT_STEP = 0.05
+WAIT_TIMEOUT = 2.0
+
+
+def _version_key(name):
+    return f"page-version:{name}"
+
+
+def get_version(name):
+    key = _version_key(name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, timeout=None)
+        version = cache.get(key, 1)
+    return version
+
+
+def bump_version(name):
+    """Make every cached copy of page ``name`` stale."""
+    key = _version_key(name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 2, timeout=None):
+            cache.incr(key)
+
+
+def _respond(request, entry):
+    content = entry["content"]
+    if CSRF_PLACEHOLDER in content:
+        content = content.replace(CSRF_PLACEHOLDER, get_token(request))
+    return HttpResponse(content, content_type=entry["content_type"])
+
+
+def _store(key, version, response, timeout, stale_timeout):
+    if hasattr(response, "render"):
+        response.render()
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return
+    content = CSRF_TOKEN_RE.sub(
+        rf"\g<1>{CSRF_PLACEHOLDER}\g<2>", response.content.decode(response.charset)
+    )
+    entry = {
+        "version": version,
+        "expires": time.time() + timeout,
+        "content": content,
+        "content_type": response["Content-Type"],
+    }
+    cache.set(key, entry, timeout + stale_timeout)
+
+
+def cached_page(request, name, parts, render, timeout, stale_timeout=120):
+    """Serve page ``name`` for ``parts`` from the cache, or ``render()`` it.
+
+    ``render`` returns an ``HttpResponse`` (a ``TemplateResponse`` is
+    rendered here); only plain 200 responses are stored.
+    """
+    key = make_key(f"page:{name}", parts)
+    version = get_version(name)
+    entry = cache.get(key)
+    if entry and entry["version"] == version and entry["expires"] > time.time():
+        _count(name, HIT)
+        return _respond(request, entry)
+
+    lock_key = f"{key}:lock"
+    locked = cache.add(lock_key, 1, timeout=LOCK_TIMEOUT)
+    if not locked:
+        # Someone else is rendering this page.
+        deadline = time.monotonic() + WAIT_TIMEOUT
+        while entry is None and time.monotonic() < deadline:
+            time.sleep(WAIT_STEP)
+            entry = cache.get(key)
+        if entry is not None:
+            _count(name, HIT)
+            return _respond(request, entry)
+
+    _count(name, MISS)
+    try:
+        response = render()
+        _store(key, version, response, timeout, stale_timeout)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return response
@@ -0,0 +1,158 @@
+"""Keyset (cursor) pagination.
+
+Unlike ``django.core.paginator.Paginator`` this never runs ``COUNT(*)`` and
+never uses ``OFFSET``: every page is "the first ``per_page + 1`` rows after
+the last row of the previous page", so page N costs the same as page 1.
+
+The ordering must be total, i.e. end with a unique field such as ``-id``.
+Cursors are signed, opaque tokens holding the sort-key values of the last
+row on the page.
+"""
+
+from datetime import datetime
+
+from django.core import signing
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+CURSOR_SALT = "core.pagination.cursor"
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def keyset_filter(ordering, values):
+    """Build ``Q`` that selects rows strictly after ``values`` in ``ordering``.
+
+    For ``("a", "-b")`` and ``(1, 2)`` this is ``a > 1 OR (a = 1 AND b < 2)``.
+    """
+    condition = Q()
+    equal = {}
+    for field, value in zip(ordering, values):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        condition |= Q(**equal, **{f"{name}__{lookup}": value})
+        equal[name] = value
+    return condition
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and "dt" in value:
+        return parse_datetime(value["dt"])
+    return value
+
+
+def encode_cursor(ordering, values):
+    return signing.dumps(
+        {"o": list(ordering), "v": [_encode_value(value) for value in values]},
+        salt=CURSOR_SALT,
+        compress=True,
+    )
+
+
+def decode_cursor(ordering, cursor):
+    try:
+        payload = signing.loads(cursor, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        raise InvalidCursor("Cursor is malformed or was tampered with")
+
+    if payload.get("o") != list(ordering) or len(payload.get("v", [])) != len(ordering):
+        raise InvalidCursor("Cursor does not belong to this list")
+    return [_decode_value(value) for value in payload["v"]]
+
+
+class CursorPage:
+    def __init__(self, object_list, paginator, cursor, next_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.cursor = cursor
+        self.next_cursor = next_cursor
+
+    def __repr__(self):
+        return f"<CursorPage of {len(self.object_list)} items>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Paginate ``object_list`` by keyset over ``ordering``.
+
+    ``object_list`` is normally a queryset already ordered by ``ordering``.
+    Any other object can take part by implementing ``after(values)``, which
+    returns a sliceable list of the rows that come after ``values``.
+    """
+
+    def __init__(self, object_list, per_page, ordering):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+
+    def _after(self, values):
+        if hasattr(self.object_list, "after"):
+            return self.object_list.after(values)
+        return self.object_list.filter(keyset_filter(self.ordering, values))
+
+    def _values(self, obj):
+        return [getattr(obj, field.lstrip("-")) for field in self.ordering]
+
+    def page(self, cursor=None):
+        object_list = self.object_list
+        if cursor:
+            object_list = self._after(decode_cursor(self.ordering, cursor))
+
+        rows = list(object_list[: self.per_page + 1])
+        next_cursor = None
+        if len(rows) > self.per_page:
+            rows = rows[: self.per_page]
+            next_cursor = encode_cursor(self.ordering, self._values(rows[-1]))
+
+        return CursorPage(rows, self, cursor or None, next_cursor)
+
+    def get_page(self, cursor=None):
+        """Like ``page()``, but fall back to the first page on a bad cursor."""
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page(None)
+
+
+class CursorPaginationMixin:
+    """Swap ``MultipleObjectMixin``'s offset pagination for keyset pagination.
+
+    Views set ``paginate_by`` as usual and either ``cursor_ordering`` or
+    ``get_cursor_ordering()``; the page is selected by ``?cursor=``.
+    """
+
+    cursor_ordering = ("-created_at", "-id")
+    cursor_kwarg = "cursor"
+
+    def get_cursor_ordering(self):
+        return self.cursor_ordering
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = CursorPaginator(queryset, page_size, self.get_cursor_ordering())
+        page = paginator.get_page(self.request.GET.get(self.cursor_kwarg))
+        return (paginator, page, page.object_list, page.has_other_pages())
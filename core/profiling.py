@@ -0,0 +1,337 @@
+"""Opt-in sampling profiler for views and consumer events.
+
+A profiled request (or consumer event) registers its thread with a single
+background sampler, which every ``PROFILER_INTERVAL`` seconds reads the
+thread's current Python stack from ``sys._current_frames()``.  Nothing is
+traced and the profiled code itself is not slowed down; requests that are
+not profiled pay only for the check below.
+
+A request is profiled when it carries a valid ``X-Profile`` header (a
+token from ``export_profiles --token``, signed with ``SECRET_KEY`` and
+valid for ``PROFILER_TOKEN_MAX_AGE`` seconds) or is picked at random with
+probability ``PROFILER_SAMPLE_RATE``.  WebSocket connections pass the
+token with the handshake; their events are profiled with
+``@profile_event``, and sync database helpers they await join the event's
+profile with ``@profiled``.
+
+Every profiled request is written as its own file under ``PROFILER_DIR``,
+one directory per endpoint (the view name, or ``Consumer.handler``), so
+concurrent requests and processes never overwrite each other's samples.
+``export_profiles`` merges them into folded stacks, the input format of
+flamegraph.pl and speedscope.  The directory must be shared by every
+process being profiled; the process-local cache can't be used for this,
+as the export runs in a process of its own.  Files older than
+``PROFILER_RETENTION`` seconds are dropped.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import random
+import shutil
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+from urllib.parse import parse_qs, quote, unquote
+from uuid import uuid4
+
+from django.conf import settings
+from django.core import signing
+
+HEADER = "X-Profile"
+SALT = "core.profiling"
+MAX_DEPTH = 128
+# Chance that saving a profile also drops its endpoint's expired files.
+PRUNE_CHANCE = 0.05
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar("profile", default=None)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def make_token():
+    return signing.TimestampSigner(salt=SALT).sign("profile")
+
+
+def has_valid_token(value):
+    if not value:
+        return False
+    try:
+        signing.TimestampSigner(salt=SALT).unsign(
+            value, max_age=_setting("PROFILER_TOKEN_MAX_AGE", 60 * 60)
+        )
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def should_profile(token):
+    """Whether to profile a request carrying ``token`` (the header value or None)."""
+    if token and has_valid_token(token):
+        return True
+    rate = _setting("PROFILER_SAMPLE_RATE", 0.0)
+    return rate > 0 and random.random() < rate
+
+
+class Profile:
+    def __init__(self, label):
+        self.label = label
+        self.stacks = Counter()
+        self.samples = 0
+        self.started = time.perf_counter()
+        self.duration = 0.0
+
+    def add(self, frame):
+        names = []
+        while frame is not None and len(names) < MAX_DEPTH:
+            code = frame.f_code
+            module = frame.f_globals.get("__name__", "?")
+            names.append(f"{module}.{code.co_qualname}")
+            frame = frame.f_back
+        self.stacks[";".join(reversed(names))] += 1
+        self.samples += 1
+
+
+class Sampler:
+    """One daemon thread sampling the stacks of every registered thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._targets = {}
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def register(self, thread_id, profile):
+        with self._lock:
+            self._targets.setdefault(thread_id, []).append(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="profiler", daemon=True
+                )
+                self._thread.start()
+        self._wakeup.set()
+
+    def unregister(self, thread_id, profile):
+        with self._lock:
+            profiles = self._targets.get(thread_id, [])
+            if profile in profiles:
+                profiles.remove(profile)
+            if not profiles:
+                self._targets.pop(thread_id, None)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            time.sleep(_setting("PROFILER_INTERVAL", 0.005))
+            with self._lock:
+                if not self._targets:
+                    self._wakeup.clear()
+                    continue
+                frames = sys._current_frames()
+                for thread_id, profiles in self._targets.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        for profile in profiles:
+                            profile.add(frame)
+
+
+sampler = Sampler()
+
+
+@contextmanager
+def sampling(profile):
+    """Sample the current thread into ``profile`` inside the block."""
+    thread_id = threading.get_ident()
+    sampler.register(thread_id, profile)
+    try:
+        yield profile
+    finally:
+        sampler.unregister(thread_id, profile)
+
+
+@contextmanager
+def profiling(label):
+    """Profile the block (and ``@profiled`` code it runs) as ``label``."""
+    profile = Profile(label)
+    reset = _current.set(profile)
+    try:
+        with sampling(profile):
+            yield profile
+    finally:
+        _current.reset(reset)
+        profile.duration = time.perf_counter() - profile.started
+        save(profile)
+
+
+# Storage
+
+
+def _root():
+    return os.fspath(_setting("PROFILER_DIR", "profiles"))
+
+
+def _label_dir(label):
+    return os.path.join(_root(), quote(label, safe=""))
+
+
+def _is_expired(entry):
+    return entry.stat().st_mtime < time.time() - _setting("PROFILER_RETENTION", 24 * 60 * 60)
+
+
+def _files(label):
+    """The live profile files of ``label``; expired ones are deleted."""
+    try:
+        entries = list(os.scandir(_label_dir(label)))
+    except FileNotFoundError:
+        return []
+    paths = []
+    for entry in entries:
+        if not entry.name.endswith(".json"):
+            continue
+        try:
+            if _is_expired(entry):
+                os.remove(entry.path)
+            else:
+                paths.append(entry.path)
+        except FileNotFoundError:
+            pass
+    return paths
+
+
+def save(profile):
+    """Store ``profile`` as a new file of its endpoint."""
+    directory = _label_dir(profile.label)
+    data = {
+        "samples": profile.samples,
+        "seconds": profile.duration,
+        "stacks": dict(profile.stacks.most_common(_setting("PROFILER_MAX_STACKS", 2000))),
+    }
+    # Written under a temporary name and renamed, so readers never see a
+    # partial file.
+    name = uuid4().hex
+    temporary = os.path.join(directory, f".{name}.tmp")
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(data, file)
+        os.replace(temporary, os.path.join(directory, f"{name}.json"))
+    except OSError:
+        logger.warning("Could not store the profile of %s", profile.label, exc_info=True)
+        return
+
+    if random.random() < PRUNE_CHANCE:
+        _files(profile.label)
+
+
+def endpoints():
+    try:
+        names = os.listdir(_root())
+    except FileNotFoundError:
+        return []
+    return sorted(unquote(name) for name in names if _files(unquote(name)))
+
+
+def load(label):
+    """The merged profile of ``label``, or None if it has none."""
+    stored = {"requests": 0, "samples": 0, "seconds": 0.0}
+    stacks = Counter()
+    for path in _files(label):
+        try:
+            with open(path, encoding="utf-8") as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            continue
+        stored["requests"] += 1
+        stored["samples"] += data["samples"]
+        stored["seconds"] += data["seconds"]
+        stacks.update(data["stacks"])
+    if not stored["requests"]:
+        return None
+    stored["stacks"] = dict(stacks.most_common(_setting("PROFILER_MAX_STACKS", 2000)))
+    return stored
+
+
+def folded(label):
+    """The stored profile of ``label`` as folded stacks ("a;b;c count" lines)."""
+    stored = load(label) or {"stacks": {}}
+    return "".join(
+        f"{stack} {count}\n"
+        for stack, count in sorted(stored["stacks"].items(), key=lambda item: -item[1])
+    )
+
+
+def clear():
+    shutil.rmtree(_root(), ignore_errors=True)
+
+
+# Hooks
+
+
+class ProfilerMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not should_profile(request.headers.get(HEADER)):
+            return self.get_response(request)
+
+        with profiling(request.path) as profile:
+            response = self.get_response(request)
+            match = getattr(request, "resolver_match", None)
+            if match is not None:
+                profile.label = match.view_name
+        response["X-Profile-Samples"] = str(profile.samples)
+        return response
+
+
+def _scope_token(scope):
+    # Browsers can't set headers on a WebSocket handshake, so the token may
+    # also come as ?profile=<token>.
+    name = HEADER.lower().encode()
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.decode("latin-1")
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    return query.get("profile", [None])[0]
+
+
+def profile_event(handler):
+    """Profile an async consumer handler (``receive``, ...) per event.
+
+    This samples the event loop thread, so other coroutines it runs during
+    the event show up in the same profile.
+    """
+
+    @wraps(handler)
+    async def wrapper(self, *args, **kwargs):
+        if not should_profile(_scope_token(self.scope)):
+            return await handler(self, *args, **kwargs)
+        with profiling(f"{type(self).__name__}.{handler.__name__}"):
+            return await handler(self, *args, **kwargs)
+
+    return wrapper
+
+
+def profiled(func):
+    """Sample a sync helper's worker thread into the caller's profile, if any.
+
+    Goes under ``@database_sync_to_async``, which carries the context over.
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        profile = _current.get()
+        if profile is None:
+            return func(*args, **kwargs)
+        with sampling(profile):
+            return func(*args, **kwargs)
+
+    return wrapper
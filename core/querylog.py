@@ -0,0 +1,178 @@
+"""Per-request SQL accounting and N+1 detection.
+
+``record_queries`` wraps every database connection of the current thread
+and counts the queries run inside it, their total time and how often each
+query *shape* ran.  The shape (``fingerprint``) is the SQL with literals
+and ``IN (...)`` lists collapsed, so the same lookup issued once per row of
+a list shows up as one shape with a high count: more than
+``QUERY_LOG_N_PLUS_ONE_THRESHOLD`` runs of a shape is reported as an N+1.
+
+``QueryBudgetMiddleware`` records every request (labelled with the view
+name), ``track_queries`` does the same for a consumer's database methods.
+Each recording is logged to the ``core.queries`` logger: at DEBUG level
+normally, at WARNING when it has an N+1 or exceeds the view's
+``query_budget``.  The numbers are also passed to the log record as
+``query_stats`` for structured (JSON) log handlers.  With
+``QUERY_LOG_HEADERS`` (defaults to ``DEBUG``) responses carry them in
+``X-Query-Count``, ``X-Query-Time-Ms`` and ``X-Query-Repeated`` headers.
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("core.queries")
+
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+IN_LIST_RE = re.compile(r"\bIN \((?:\s*(?:%s|\?)\s*,)*\s*(?:%s|\?)\s*\)", re.IGNORECASE)
+SPACE_RE = re.compile(r"\s+")
+
+
+def is_enabled():
+    return getattr(settings, "QUERY_LOG_ENABLED", True)
+
+
+def n_plus_one_threshold():
+    return getattr(settings, "QUERY_LOG_N_PLUS_ONE_THRESHOLD", 5)
+
+
+def fingerprint(sql):
+    """The shape of ``sql``: literals become ``?`` and ``IN`` lists ``IN (...)``."""
+    sql = STRING_RE.sub("?", sql)
+    sql = NUMBER_RE.sub("?", sql)
+    sql = IN_LIST_RE.sub("IN (...)", sql)
+    return SPACE_RE.sub(" ", sql).strip()
+
+
+class QueryRecorder:
+    """A database ``execute_wrapper`` that counts and times queries."""
+
+    def __init__(self, label=""):
+        self.label = label
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.shapes[fingerprint(sql)] += 1
+
+    @property
+    def duration_ms(self):
+        return self.duration * 1000
+
+    def repeated(self, threshold=None):
+        """``[(shape, runs)]`` of the shapes run more than ``threshold`` times."""
+        if threshold is None:
+            threshold = n_plus_one_threshold()
+        return [(shape, runs) for shape, runs in self.shapes.most_common() if runs > threshold]
+
+    def stats(self, budget=None):
+        return {
+            "label": self.label,
+            "queries": self.count,
+            "db_time_ms": round(self.duration_ms, 3),
+            "budget": budget,
+            "repeated": [{"sql": shape, "count": runs} for shape, runs in self.repeated()],
+        }
+
+
+@contextmanager
+def record_queries(label=""):
+    """Record the queries run in this thread inside the block."""
+    recorder = QueryRecorder(label)
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield recorder
+
+
+def report(recorder, budget=None):
+    """Log ``recorder``'s numbers, as a warning if something looks wrong."""
+    stats = recorder.stats(budget)
+    over_budget = budget is not None and recorder.count > budget
+    level = logging.WARNING if stats["repeated"] or over_budget else logging.DEBUG
+    if not logger.isEnabledFor(level):
+        return stats
+    message = "%s: %d queries in %.1f ms"
+    args = [recorder.label, recorder.count, recorder.duration_ms]
+    if over_budget:
+        message += " (budget %d)"
+        args.append(budget)
+    for repeated in stats["repeated"]:
+        message += "\n  %dx %s"
+        args.extend([repeated["count"], repeated["sql"]])
+    logger.log(level, message, *args, extra={"query_stats": stats})
+    return stats
+
+
+def query_budget(limit):
+    """Declare that a view should run at most ``limit`` queries per request."""
+
+    def decorator(view_func):
+        view_func.query_budget = limit
+        return view_func
+
+    return decorator
+
+
+def track_queries(func):
+    """Record and report the queries of a consumer's (sync) database method.
+
+    Goes under ``@database_sync_to_async`` so it runs in the worker thread::
+
+        @database_sync_to_async
+        @track_queries
+        def save_message(self, ...):
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not is_enabled():
+            return func(*args, **kwargs)
+        with record_queries(func.__qualname__) as recorder:
+            result = func(*args, **kwargs)
+        report(recorder, getattr(func, "query_budget", None))
+        return result
+
+    return wrapper
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not is_enabled():
+            return self.get_response(request)
+        with record_queries(request.path) as recorder:
+            response = self.get_response(request)
+
+        match = getattr(request, "resolver_match", None)
+        if match is not None:
+            recorder.label = match.view_name
+        stats = report(recorder, getattr(request, "query_budget", None))
+
+        if getattr(settings, "QUERY_LOG_HEADERS", settings.DEBUG):
+            response["X-Query-Count"] = str(stats["queries"])
+            response["X-Query-Time-Ms"] = f"{stats['db_time_ms']:.1f}"
+            response["X-Query-Repeated"] = str(len(stats["repeated"]))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        budget = getattr(view_func, "query_budget", None)
+        if budget is None:
+            budget = getattr(getattr(view_func, "view_class", None), "query_budget", None)
+        request.query_budget = budget
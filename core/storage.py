@@ -0,0 +1,108 @@
+"""Content-addressed, deduplicated media storage.
+
+``ContentAddressedStorage`` ignores the uploaded file name and stores the
+content as
+
+    <upload directory>/<first two hex digits>/<sha256><extension>
+
+so uploading the same bytes again (a reposted meme, a re-uploaded avatar,
+one file sent into many chats) resolves to the existing file and writes
+nothing.  Every blob is registered as a ``MediaBlob``; ``references``
+counts the uploads that resolved to it and is corrected to the number of
+model rows actually pointing at it by ``collect_media_garbage``, which
+also deletes blobs nothing references any more and that no upload has
+resolved to within the grace period.
+
+Names under ``derivatives/`` (see ``core.images``) are derived from the
+blob name and are stored as given.
+"""
+
+import hashlib
+import posixpath
+import re
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .images import DERIVATIVES_DIR
+
+HASH_CHUNK_SIZE = 64 * 1024
+BLOB_NAME_RE = re.compile(r"(?:^|/)([0-9a-f]{2})/(\1[0-9a-f]{62})(?:\.[^/]*)?$")
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    if hasattr(content, "seek"):
+        content.seek(0)
+    for chunk in content.chunks(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    if hasattr(content, "seek"):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+def blob_name(name, sha256):
+    directory = posixpath.dirname(name)
+    extension = posixpath.splitext(name)[1].lower()
+    return posixpath.join(directory, sha256[:2], f"{sha256}{extension}")
+
+
+def is_derivative(name):
+    return name.startswith(f"{DERIVATIVES_DIR}/")
+
+
+def blob_hash(name):
+    """The sha256 a content-addressed blob is named by, or ``None``."""
+    if is_derivative(name):
+        return None
+    match = BLOB_NAME_RE.search(name)
+    return match.group(2) if match else None
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def _save(self, name, content):
+        if is_derivative(name):
+            return super()._save(name, content)
+
+        from .models import MediaBlob
+
+        sha256 = content_hash(content)
+        name = blob_name(name, sha256)
+        # The reference is recorded before the file is looked at.  The
+        # garbage collector deletes a blob's row (unless it was referenced
+        # meanwhile) before its file, so either it sees this reference and
+        # keeps the file, or the row is already gone, is created again here
+        # and the file is written again.
+        with transaction.atomic():
+            while not MediaBlob.objects.filter(name=name).update(
+                references=F("references") + 1, last_referenced_at=timezone.now()
+            ):
+                MediaBlob.objects.get_or_create(
+                    name=name, defaults={"sha256": sha256, "size": content.size}
+                )
+            if not self.exists(name):
+                stored = super()._save(name, content)
+                if stored != name:
+                    # Another upload of the same content won the race.
+                    super().delete(stored)
+        return name
+
+    def delete(self, name):
+        # Blobs may be shared; only the garbage collector removes them.
+        if is_derivative(name):
+            super().delete(name)
+
+    def purge(self, name):
+        """Delete blob ``name`` and its derivatives, whoever still uses them."""
+        super().delete(name)
+        root = posixpath.splitext(name)[0]
+        directory, prefix = posixpath.split(f"{DERIVATIVES_DIR}/{root}.w")
+        try:
+            _, files = self.listdir(directory)
+        except FileNotFoundError:
+            return
+        for file_name in files:
+            if file_name.startswith(prefix):
+                super().delete(posixpath.join(directory, file_name))
@@ -0,0 +1,327 @@
+"""Synthetic data at production-like volumes, for local benchmarking.
+
+``Generator`` writes users with profiles, a power-law follow graph (a few
+accounts followed by many, most by few), posts with deep reply trees,
+likes, bookmarks and chat threads with messages.  Everything is built in
+memory in batches and written with ``bulk_create``: post ids are assigned
+up front so reply paths and the ``likes_count`` / ``replies_count``
+counters are written correctly in the same pass, with no signals firing.
+Indexes derived from posts (search, hashtags, scores, timelines) and
+profile stats are rebuilt afterwards by the ``generate_synthetic_data``
+command.
+
+The same ``seed`` always produces the same data.
+"""
+
+import math
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from accounts.models import CustomUser, Profile
+from bookmarks.models import Bookmark
+from chat.models import ChatMessage, ChatThread
+from likes.models import Like
+from posts.models import MAX_REPLY_DEPTH, PATH_STEP, Post
+from relationships.models import Follow
+
+PASSWORD = "synthetic-pass"
+
+SCALES = {
+    "small": {"users": 200, "posts": 2_000, "threads": 50},
+    "medium": {"users": 2_000, "posts": 50_000, "threads": 1_000},
+    "large": {"users": 20_000, "posts": 1_000_000, "threads": 10_000},
+}
+
+WORDS = (
+    "сьогодні вчора місто кава книга музика море гори робота проект ідея "
+    "друзі вечір ранок фото новини спорт кіно подорож погода думка день "
+    "нарешті дуже трохи завжди знову разом новий старий цікавий простий"
+).split()
+HASHTAGS = ("kyiv", "lviv", "music", "coffee", "travel", "news", "photo", "dev", "art", "sport")
+
+
+@contextmanager
+def preserve_timestamps(*models):
+    """Let ``bulk_create`` keep the ``created_at`` values we generated."""
+    fields = [
+        field
+        for model in models
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now_add", False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Generator:
+    def __init__(
+        self,
+        users,
+        posts,
+        threads,
+        reply_ratio=0.6,
+        follows_per_user=25,
+        likes_per_post=6,
+        bookmarks_per_user=8,
+        messages_per_thread=30,
+        days=14,
+        prefix="synth",
+        seed=42,
+        batch_size=5000,
+        log=None,
+    ):
+        self.counts = {"users": users, "posts": posts, "threads": threads}
+        self.reply_ratio = reply_ratio
+        self.follows_per_user = follows_per_user
+        self.likes_per_post = likes_per_post
+        self.bookmarks_per_user = bookmarks_per_user
+        self.messages_per_thread = messages_per_thread
+        self.days = days
+        self.prefix = prefix
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.now = timezone.now()
+        self.written = {}
+
+    # helpers
+
+    def _flush(self, model, objects, **kwargs):
+        if objects:
+            model.objects.bulk_create(objects, batch_size=self.batch_size, **kwargs)
+            self.written[model.__name__] = self.written.get(model.__name__, 0) + len(objects)
+            objects.clear()
+
+    def _zipf_weights(self, size, exponent):
+        ranks = list(range(1, size + 1))
+        self.rng.shuffle(ranks)
+        return [1 / rank**exponent for rank in ranks]
+
+    def _text(self, words=(4, 30)):
+        text = " ".join(self.rng.choices(WORDS, k=self.rng.randint(*words)))
+        if self.rng.random() < 0.15:
+            text += f" #{self.rng.choice(HASHTAGS)}"
+        if self.rng.random() < 0.05:
+            text += f" @{self.rng.choice(self.usernames)}"
+        return text.capitalize()
+
+    def _moment(self):
+        return self.now - timedelta(seconds=self.rng.uniform(0, self.days * 86400))
+
+    # stages
+
+    def create_users(self):
+        password = make_password(PASSWORD)
+        size = self.counts["users"]
+        self.usernames = [f"{self.prefix}_{index}" for index in range(size)]
+        users = [
+            CustomUser(username=username, password=password, date_joined=self._moment())
+            for username in self.usernames
+        ]
+        self._flush(CustomUser, users)
+        self.user_ids = list(
+            CustomUser.objects.filter(username__in=self.usernames)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        self._flush(Profile, [Profile(user_id=user_id) for user_id in self.user_ids])
+        self.profile_ids = dict(
+            Profile.objects.filter(user_id__in=self.user_ids).values_list("user_id", "pk")
+        )
+        # How likely each user is to be followed, liked and to write posts.
+        self.popularity = self._zipf_weights(size, 1.1)
+        self.cumulative_popularity = list(accumulate(self.popularity))
+        self.log(f"{size} users")
+
+    def _popular_users(self, count, exclude=None):
+        picked = set()
+        attempts = 0
+        while len(picked) < count and attempts < count * 4:
+            attempts += 1
+            index = self.rng.choices(
+                range(len(self.user_ids)), cum_weights=self.cumulative_popularity
+            )[0]
+            if index != exclude:
+                picked.add(index)
+        return picked
+
+    def create_follows(self):
+        follows = []
+        self.following = {}
+        mean = math.log(max(self.follows_per_user, 1))
+        for index, user_id in enumerate(self.user_ids):
+            degree = min(int(self.rng.lognormvariate(mean, 0.8)), len(self.user_ids) - 1)
+            targets = self._popular_users(degree, exclude=index)
+            self.following[index] = targets
+            follows.extend(
+                Follow(
+                    user_from_id=self.profile_ids[user_id],
+                    user_to_id=self.profile_ids[self.user_ids[target]],
+                    created_at=self._moment(),
+                )
+                for target in sorted(targets)
+            )
+            if len(follows) >= self.batch_size:
+                self._flush(Follow, follows, ignore_conflicts=True)
+        self._flush(Follow, follows, ignore_conflicts=True)
+        self.log(f"{self.written.get('Follow', 0)} follows")
+
+    def create_posts(self):
+        total = self.counts["posts"]
+        roots = max(1, round(total * (1 - self.reply_ratio)))
+        replies_left = total - roots
+        next_id = (Post.objects.aggregate(last=Max("pk"))["last"] or 0) + 1
+        self.root_ids = []
+        self.root_weights = []
+        posts = []
+
+        for root_index in range(roots):
+            author = self.rng.choices(
+                range(len(self.user_ids)), cum_weights=self.cumulative_popularity
+            )[0]
+            created_at = self._moment()
+            root = Post(
+                id=next_id,
+                author_id=self.user_ids[author],
+                content=self._text(),
+                created_at=created_at,
+                path=f"{next_id:0{PATH_STEP}d}",
+                depth=0,
+            )
+            next_id += 1
+            posts.append(root)
+            self.root_ids.append(root.pk)
+            self.root_weights.append(self.popularity[author])
+
+            # Heavy-tailed thread sizes; replies attach mostly to recent
+            # replies, which makes deep chains as well as wide threads.
+            share = replies_left / max(roots - root_index, 1)
+            size = min(replies_left, int(self.rng.paretovariate(1.3) * share * 0.3))
+            if root_index == roots - 1:
+                size = replies_left
+            replies_left -= size
+            thread = [root]
+            for _ in range(size):
+                if self.rng.random() < 0.5:
+                    parent = thread[-1]
+                else:
+                    parent = self.rng.choice(thread)
+                if not parent.accepts_replies:
+                    # The n-th post of a thread is at most n - 1 deep.
+                    parent = self.rng.choice(thread[:MAX_REPLY_DEPTH])
+                reply = Post(
+                    id=next_id,
+                    author_id=self.rng.choice(self.user_ids),
+                    parent_post_id=parent.pk,
+                    content=self._text((1, 20)),
+                    created_at=max(parent.created_at, self._moment()),
+                    path=parent.path + f"{next_id:0{PATH_STEP}d}",
+                    depth=parent.depth + 1,
+                )
+                next_id += 1
+                parent.replies_count += 1
+                thread.append(reply)
+            posts.extend(thread[1:])
+
+            if len(posts) >= self.batch_size:
+                self._flush_posts(posts)
+        self._flush_posts(posts)
+
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [Post]):
+                cursor.execute(sql)
+        self.log(f"{self.written.get('Post', 0)} posts, {self.written.get('Like', 0)} likes")
+
+    def _flush_posts(self, posts):
+        likes = []
+        for post in posts:
+            if post.depth:
+                count = int(self.rng.expovariate(1 / max(self.likes_per_post / 4, 0.1)))
+            else:
+                count = int(self.rng.lognormvariate(math.log(max(self.likes_per_post, 1)), 1))
+            count = min(count, len(self.user_ids))
+            post.likes_count = count
+            likes.extend(
+                Like(user_id=user_id, post_id=post.pk, created_at=post.created_at)
+                for user_id in self.rng.sample(self.user_ids, count)
+            )
+        self._flush(Post, posts)
+        self._flush(Like, likes)
+
+    def create_bookmarks(self):
+        bookmarks = []
+        cumulative = list(accumulate(self.root_weights))
+        for user_id in self.user_ids:
+            count = int(self.rng.expovariate(1 / max(self.bookmarks_per_user, 0.1)))
+            for post_id in set(self.rng.choices(self.root_ids, cum_weights=cumulative, k=count)):
+                bookmarks.append(
+                    Bookmark(user_id=user_id, post_id=post_id, created_at=self._moment())
+                )
+            if len(bookmarks) >= self.batch_size:
+                self._flush(Bookmark, bookmarks, ignore_conflicts=True)
+        self._flush(Bookmark, bookmarks, ignore_conflicts=True)
+        self.log(f"{self.written.get('Bookmark', 0)} bookmarks")
+
+    def create_chats(self):
+        pairs = set()
+        candidates = [
+            (index, target)
+            for index, targets in self.following.items()
+            for target in sorted(targets)
+        ]
+        self.rng.shuffle(candidates)
+        for first, second in candidates:
+            if len(pairs) >= self.counts["threads"]:
+                break
+            pairs.add((min(first, second), max(first, second)))
+
+        Participant = ChatThread.participants.through
+        messages = []
+        participants = []
+        pairs = sorted(pairs)
+        threads = ChatThread.objects.bulk_create([ChatThread() for _ in pairs])
+        for (first, second), thread in zip(pairs, threads):
+            members = (self.user_ids[first], self.user_ids[second])
+            participants.extend(
+                Participant(chatthread_id=thread.pk, customuser_id=user_id)
+                for user_id in members
+            )
+            moment = self._moment()
+            for _ in range(int(self.rng.expovariate(1 / max(self.messages_per_thread, 0.1))) + 1):
+                moment += timedelta(seconds=self.rng.expovariate(1 / 600))
+                messages.append(
+                    ChatMessage(
+                        thread_id=thread.pk,
+                        sender_id=self.rng.choice(members),
+                        text=self._text((1, 15)),
+                        created_at=min(moment, self.now),
+                    )
+                )
+            if len(messages) >= self.batch_size:
+                self._flush(Participant, participants)
+                self._flush(ChatMessage, messages)
+        self._flush(Participant, participants)
+        self._flush(ChatMessage, messages)
+        self.log(f"{len(pairs)} chat threads, {self.written.get('ChatMessage', 0)} messages")
+
+    def run(self):
+        with preserve_timestamps(Post, Like, Bookmark, Follow, ChatMessage), transaction.atomic():
+            self.create_users()
+            self.create_follows()
+            self.create_posts()
+            self.create_bookmarks()
+            self.create_chats()
+        return self.written
@@ -0,0 +1,46 @@
+from django import template
+
+from core import fragment_cache
+
+register = template.Library()
+
+
+class CacheFragmentNode(template.Node):
+    def __init__(self, nodelist, name, parts):
+        self.nodelist = nodelist
+        self.name = name
+        self.parts = parts
+
+    def render(self, context):
+        name = self.name.resolve(context)
+        parts = [part.resolve(context) for part in self.parts]
+        return fragment_cache.get_or_render(
+            name, parts, lambda: self.nodelist.render(context)
+        )
+
+
+@register.tag("cachefragment")
+def do_cachefragment(parser, token):
+    """Cache the enclosed markup under a name and a list of version parts.
+
+    Usage::
+
+        {% cachefragment "comment_card" comment.id comment.version %}
+            ...
+        {% endcachefragment %}
+
+    Like ``{% cache %}``, but hits and misses are counted per name (see
+    ``core.fragment_cache``).
+    """
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' tag requires a name and at least one key part."
+        )
+    nodelist = parser.parse(("endcachefragment",))
+    parser.delete_first_token()
+    return CacheFragmentNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        [parser.compile_filter(bit) for bit in bits[2:]],
+    )
@@ -0,0 +1,89 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from core.images import FORMATS, current_variants, derivative_name
+
+register = template.Library()
+
+
+def _url(fieldfile, width, extension):
+    return fieldfile.storage.url(derivative_name(fieldfile.name, width, extension))
+
+
+def _density_candidates(widths, size):
+    """``[(width, "1x"), (width, "2x")]`` for an image shown ``size`` px wide."""
+    def at_least(target):
+        return next((width for width in widths if width >= target), widths[-1])
+
+    one, two = at_least(size), at_least(size * 2)
+    return [(one, "1x")] if one == two else [(one, "1x"), (two, "2x")]
+
+
+def _picture(fieldfile, widths, alt, css_class, sizes, size, loading):
+    if size:
+        candidates = _density_candidates(widths, size)
+    else:
+        candidates = [(width, f"{width}w") for width in widths]
+
+    def srcset(extension):
+        return format_html_join(
+            ", ",
+            "{} {}",
+            ((_url(fieldfile, width, extension), descriptor) for width, descriptor in candidates),
+        )
+
+    webp, jpeg = (extension for extension, _, _ in FORMATS)
+    fallback = candidates[0][0] if size else widths[-1]
+    sizes_attr = format_html(' sizes="{}"', sizes) if sizes and not size else ""
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}"{}>'
+        '<img src="{}" srcset="{}"{} alt="{}" class="{}" loading="{}"></picture>',
+        srcset(webp),
+        sizes_attr,
+        _url(fieldfile, fallback, jpeg),
+        srcset(jpeg),
+        sizes_attr,
+        alt,
+        css_class,
+        loading,
+    )
+
+
+@register.simple_tag
+def responsive_image(
+    fieldfile, variants, alt="", css_class="", sizes="100vw", size=None, loading="lazy"
+):
+    """``<picture>`` for an uploaded image, using its derivatives when ready.
+
+    ``size`` is the displayed width in CSS pixels for fixed-size images
+    (avatars) and selects 1x/2x candidates; otherwise the ``w`` descriptors
+    and ``sizes`` let the browser pick.  Without current derivatives this
+    falls back to the original upload.
+    """
+    widths = sorted(current_variants(fieldfile, variants))
+    if not widths:
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" loading="{}">',
+            fieldfile.url,
+            alt,
+            css_class,
+            loading,
+        )
+    return _picture(fieldfile, widths, alt, css_class, sizes, size, loading)
+
+
+@register.simple_tag
+def avatar(profile, size=48, css_class="user-avatar", alt=""):
+    """A profile's avatar at ``size`` CSS px, or the default avatar."""
+    if not profile or not profile.avatar:
+        url = profile.avatar_url if profile else static("assets/default_avatar.jpg")
+        return format_html('<img src="{}" alt="{}" class="{}">', url, alt, css_class)
+    return responsive_image(
+        profile.avatar,
+        profile.avatar_variants,
+        alt=alt,
+        css_class=css_class,
+        size=size,
+        loading="eager",
+    )
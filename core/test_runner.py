@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class InlineBackgroundTestRunner(DiscoverRunner):
+    """Run background tasks inline so tests see their effects immediately."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._background_tasks_async = settings.BACKGROUND_TASKS_ASYNC
+        settings.BACKGROUND_TASKS_ASYNC = False
+
+    def teardown_test_environment(self, **kwargs):
+        settings.BACKGROUND_TASKS_ASYNC = self._background_tasks_async
+        super().teardown_test_environment(**kwargs)
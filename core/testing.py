@@ -0,0 +1,29 @@
+from contextlib import contextmanager
+
+from .querylog import n_plus_one_threshold, record_queries
+
+
+class QueryBudgetMixin:
+    """``assertQueryBudget`` for ``TestCase`` subclasses."""
+
+    @contextmanager
+    def assertQueryBudget(self, limit, repeated=None):
+        """Fail if the block runs more than ``limit`` queries, or any query
+        shape more than ``repeated`` times (default
+        ``QUERY_LOG_N_PLUS_ONE_THRESHOLD``)."""
+        if repeated is None:
+            repeated = n_plus_one_threshold()
+        with record_queries() as recorder:
+            yield recorder
+
+        shapes = "\n".join(
+            f"  {runs}x {shape}" for shape, runs in recorder.shapes.most_common()
+        )
+        if recorder.count > limit:
+            self.fail(f"{recorder.count} queries run, budget is {limit}:\n{shapes}")
+        n_plus_one = recorder.repeated(repeated)
+        if n_plus_one:
+            self.fail(
+                "N+1 queries:\n"
+                + "\n".join(f"  {runs}x {shape}" for shape, runs in n_plus_one)
+            )
@@ -0,0 +1,564 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import BytesIO, StringIO
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import Context, Template
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from accounts.models import Profile
+from chat.forms import ChatMessageForm
+from chat.models import ChatMessage, ChatThread
+from posts.models import Post
+from relationships.models import Follow
+from .images import derivative_name
+from .management.commands import collect_media_garbage
+from .models import MediaBlob
+from . import profiling
+from .querylog import QueryBudgetMiddleware, fingerprint, query_budget, track_queries
+from .testing import QueryBudgetMixin
+
+
+def image_upload(name, size, mode="RGB", fmt="PNG"):
+    buffer = BytesIO()
+    Image.new(mode, size, "red").save(buffer, fmt)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type=f"image/{fmt.lower()}")
+
+
+class ImageDerivativeTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="painter", password="pass12345"
+        )
+        Profile.objects.create(user=self.user)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_upload_builds_derivatives_without_upscaling(self):
+        post = Post.objects.create(
+            author=self.user, content="Photo", image=image_upload("wide.png", (1500, 1000))
+        )
+        post.refresh_from_db()
+
+        self.assertEqual(
+            post.image_variants, {"source": post.image.name, "widths": [320, 640, 1080]}
+        )
+        self.assertEqual(post.version, 2)
+        for width in (320, 640, 1080):
+            for extension in ("webp", "jpg"):
+                name = derivative_name(post.image.name, width, extension)
+                self.assertTrue(default_storage.exists(name), name)
+        with default_storage.open(derivative_name(post.image.name, 320, "jpg")) as file:
+            self.assertEqual(Image.open(file).size, (320, 213))
+
+        profile = self.user.profile
+        profile.avatar = image_upload("tiny.png", (30, 30), mode="RGBA")
+        profile.save()
+        profile.refresh_from_db()
+        self.assertEqual(profile.avatar_variants["widths"], [30])
+
+    def test_templates_use_srcset_when_variants_are_current(self):
+        post = Post.objects.create(
+            author=self.user, content="Photo", image=image_upload("wide.png", (800, 400))
+        )
+        post.refresh_from_db()
+        template = Template(
+            "{% load images %}{% responsive_image post.image post.image_variants %}"
+        )
+
+        html = template.render(Context({"post": post}))
+        self.assertIn('type="image/webp"', html)
+        self.assertIn(".w320.webp 320w", html)
+        self.assertIn(".w800.jpg 800w", html)
+
+        post.image_variants = {}
+        html = template.render(Context({"post": post}))
+        self.assertNotIn("<picture>", html)
+        self.assertIn(post.image.url, html)
+
+    def test_backfill_command(self):
+        post = Post.objects.create(
+            author=self.user, content="Photo", image=image_upload("wide.png", (400, 400))
+        )
+        Post.objects.filter(pk=post.pk).update(image_variants={})
+
+        call_command("build_image_derivatives", "--model", "posts.Post", stdout=StringIO())
+
+        post.refresh_from_db()
+        self.assertEqual(post.image_variants["widths"], [320, 400])
+
+
+class UploadLimitTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.user = get_user_model().objects.create_user(
+            username="uploader", password="pass12345"
+        )
+        Profile.objects.create(user=self.user)
+        self.client.login(username="uploader", password="pass12345")
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def post_image(self, upload):
+        return self.client.post(
+            reverse("posts:home"), {"content": "With image", "image": upload}
+        )
+
+    def test_upload_is_streamed_and_logged(self):
+        with self.assertLogs("core.uploads", "INFO") as logs:
+            response = self.post_image(image_upload("ok.png", (64, 64)))
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Post.objects.filter(content="With image").exists())
+        self.assertIn("Upload ok.png:", logs.output[0])
+
+    @override_settings(UPLOAD_MAX_BYTES=2048)
+    def test_oversized_upload_is_discarded_while_streaming(self):
+        upload = SimpleUploadedFile("big.bin", b"x" * 10_000, content_type="image/png")
+        with self.assertLogs("core.uploads", "INFO") as logs:
+            response = self.post_image(upload)
+        self.assertIn("discarded", logs.output[0])
+        self.assertEqual(response.context["form"].errors["image"][0][:16], "Файл завеликий (")
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(UPLOAD_IMAGE_MAX_PIXELS=1_000_000)
+    def test_pixel_limit_is_checked_before_decoding(self):
+        # A few KiB of PNG that would decode to 25 megapixels.
+        upload = image_upload("bomb.png", (5000, 5000), mode="1")
+        self.assertLess(upload.size, 20_000)
+        response = self.post_image(upload)
+        self.assertIn("мегапікселів", response.context["form"].errors["image"][0])
+        self.assertFalse(Post.objects.exists())
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="hoarder", password="pass12345"
+        )
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_identical_uploads_share_one_blob_and_its_derivatives(self):
+        first = Post.objects.create(
+            author=self.user, content="Meme", image=image_upload("meme.png", (700, 500))
+        )
+        second = Post.objects.create(
+            author=self.user, content="Repost", image=image_upload("copy.png", (700, 500))
+        )
+        first.refresh_from_db()
+        second.refresh_from_db()
+
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertTrue(first.image.name.startswith("post_images/"))
+        self.assertEqual(second.image_variants, first.image_variants)
+        blob = MediaBlob.objects.get()
+        self.assertEqual((blob.name, blob.references), (first.image.name, 2))
+        self.assertEqual(len(default_storage.listdir(f"post_images/{blob.sha256[:2]}")[1]), 1)
+
+    def test_garbage_collector_removes_unreferenced_blobs(self):
+        kept = Post.objects.create(
+            author=self.user, content="Kept", image=image_upload("a.png", (400, 300))
+        )
+        dropped = Post.objects.create(
+            author=self.user, content="Dropped", image=image_upload("b.png", (300, 400))
+        )
+        dropped.refresh_from_db()
+        dropped_name = dropped.image.name
+        derivative = derivative_name(dropped_name, 300, "webp")
+        self.assertTrue(default_storage.exists(derivative))
+        dropped.delete()
+        self.assertTrue(default_storage.exists(dropped_name))
+
+        call_command("collect_media_garbage", "--grace-hours=0", stdout=StringIO())
+
+        kept.refresh_from_db()
+        self.assertTrue(default_storage.exists(kept.image.name))
+        self.assertFalse(default_storage.exists(dropped_name))
+        self.assertFalse(default_storage.exists(derivative))
+        self.assertEqual(
+            list(MediaBlob.objects.values_list("name", "references")),
+            [(kept.image.name, 1)],
+        )
+
+    def test_garbage_collector_keeps_blob_reuploaded_during_the_scan(self):
+        post = Post.objects.create(
+            author=self.user, content="Gone", image=image_upload("a.png", (400, 300))
+        )
+        post.refresh_from_db()
+        name = post.image.name
+        post.delete()
+        MediaBlob.objects.update(last_referenced_at=timezone.now() - timedelta(days=2))
+        blob = MediaBlob.objects.get()
+
+        # The scan picked the blob as garbage; then the same content is
+        # uploaded again before it is deleted.
+        Post.objects.create(
+            author=self.user, content="Again", image=image_upload("b.png", (400, 300))
+        )
+        collector = collect_media_garbage.Command()
+        self.assertFalse(collector.collect(blob, timezone.now() - timedelta(days=1)))
+
+        self.assertTrue(default_storage.exists(name))
+        self.assertEqual(MediaBlob.objects.get().references, 2)
+
+    def test_upload_rewrites_blob_collected_meanwhile(self):
+        post = Post.objects.create(
+            author=self.user, content="Gone", image=image_upload("a.png", (400, 300))
+        )
+        post.refresh_from_db()
+        name = post.image.name
+        post.delete()
+        call_command("collect_media_garbage", "--grace-hours=0", stdout=StringIO())
+        self.assertFalse(MediaBlob.objects.exists())
+
+        again = Post.objects.create(
+            author=self.user, content="Again", image=image_upload("b.png", (400, 300))
+        )
+        self.assertEqual(again.image.name, name)
+        self.assertTrue(default_storage.exists(name))
+        self.assertEqual(MediaBlob.objects.get().references, 1)
+
+    def test_chat_file_keeps_the_sender_file_name(self):
+        form = ChatMessageForm(
+            {"text": ""},
+            {"file": SimpleUploadedFile("Звіт.pdf", b"%PDF-1.4 report")},
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+        form.instance.thread = ChatThread.objects.create()
+        form.instance.sender = self.user
+        message = form.save()
+
+        self.assertNotIn("Звіт", message.file.name)
+        self.assertEqual(message.display_file_name, "Звіт.pdf")
+
+
+class MediaServingTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="viewer", password="pass12345"
+        )
+        self.stranger = get_user_model().objects.create_user(
+            username="stranger", password="pass12345"
+        )
+        self.content = bytes(range(256)) * 40
+        self.name = default_storage.save(
+            "post_images/clip.png", SimpleUploadedFile("clip.png", self.content)
+        )
+        self.url = default_storage.url(self.name)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_whole_file_with_validators_and_immutable_caching(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertIn("immutable", response["Cache-Control"])
+        sha256 = MediaBlob.objects.get().sha256
+        self.assertEqual(response["ETag"], f'"{sha256}"')
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"{sha256}"')
+        self.assertEqual(response.status_code, 304)
+
+    def test_byte_ranges(self):
+        response = self.client.get(self.url, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 10-19/{len(self.content)}")
+        self.assertEqual(response["Content-Length"], "10")
+        self.assertEqual(b"".join(response.streaming_content), self.content[10:20])
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=-5")
+        self.assertEqual(b"".join(response.streaming_content), self.content[-5:])
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=0-1,5-6")
+        self.assertEqual(response.status_code, 200)
+        response.close()
+
+        response = self.client.get(self.url, HTTP_RANGE=f"bytes={len(self.content)}-")
+        self.assertEqual(response.status_code, 416)
+
+        response = self.client.get(
+            self.url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"stale"'
+        )
+        self.assertEqual(response.status_code, 200)
+        response.close()
+
+    def test_chat_attachments_are_limited_to_participants(self):
+        thread = ChatThread.objects.create()
+        thread.participants.add(self.user)
+        message = thread.messages.create(
+            sender=self.user,
+            file=SimpleUploadedFile("план.txt", b"secret"),
+            file_name="план.txt",
+        )
+        url = message.file.url
+
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.client.force_login(self.stranger)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        self.client.force_login(self.user)
+        response = self.client.get(url)
+        self.assertEqual(b"".join(response.streaming_content), b"secret")
+        self.assertIn("private", response["Cache-Control"])
+        self.assertIn("attachment; filename*=UTF-8''%D0%BF", response["Content-Disposition"])
+
+    @override_settings(MEDIA_SENDFILE_HEADER="X-Accel-Redirect")
+    def test_sendfile_offload(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Accel-Redirect"], f"/protected-media/{self.name}")
+        self.assertEqual(response.content, b"")
+
+    def test_paths_outside_media_root_are_not_served(self):
+        self.assertEqual(self.client.get("/media/../manage.py").status_code, 404)
+        self.assertEqual(self.client.get("/media/post_images/missing.png").status_code, 404)
+
+
+class SyntheticDataTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_generated_data_is_consistent_and_benchmarkable(self):
+        call_command(
+            "generate_synthetic_data",
+            users=30,
+            posts=200,
+            threads=5,
+            follows_per_user=5,
+            stdout=StringIO(),
+        )
+
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertTrue(Post.objects.filter(depth__gte=2).exists())
+        out = StringIO()
+        call_command("reconcile_post_counters", stdout=out)
+        self.assertIn("fixed 0", out.getvalue())
+        reply = Post.objects.filter(depth__gte=1).select_related("parent_post").first()
+        self.assertTrue(reply.path.startswith(reply.parent_post.path))
+
+        output = tempfile.NamedTemporaryFile(suffix=".json", delete=False)
+        output.close()
+        self.addCleanup(os.unlink, output.name)
+        call_command(
+            "bench_endpoints", requests=2, warmup=0, output=output.name, stdout=StringIO()
+        )
+        with open(output.name, encoding="utf-8") as file:
+            report = json.load(file)
+        self.assertEqual(report["rows"]["posts"], 200)
+        for name in ("feed", "post_detail", "profile", "bookmarks", "chat_thread"):
+            self.assertGreater(report["endpoints"][name]["queries_max"], 0)
+            self.assertLessEqual(
+                report["endpoints"][name]["p50_ms"], report["endpoints"][name]["p99_ms"]
+            )
+
+
+class QueryLogTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="viewer", password="pass12345"
+        )
+        Profile.objects.create(user=self.user)
+
+    def test_fingerprint_collapses_literals_and_in_lists(self):
+        self.assertEqual(
+            fingerprint("SELECT *  FROM t WHERE a = 'x''y' AND b IN (%s, %s, %s) LIMIT 21"),
+            "SELECT * FROM t WHERE a = ? AND b IN (...) LIMIT ?",
+        )
+        self.assertEqual(
+            fingerprint('SELECT "t"."id" FROM "t" WHERE "t"."id" IN (%s)'),
+            fingerprint('SELECT "t"."id" FROM "t" WHERE "t"."id" IN (%s, %s)'),
+        )
+
+    def test_response_headers_and_n_plus_one_warning(self):
+        self.client.force_login(self.user)
+        with override_settings(QUERY_LOG_HEADERS=True):
+            response = self.client.get(reverse("bookmarks:list"))
+        self.assertGreater(int(response["X-Query-Count"]), 0)
+        self.assertIn("X-Query-Time-Ms", response)
+        self.assertEqual(response["X-Query-Repeated"], "0")
+
+        with override_settings(QUERY_LOG_HEADERS=False):
+            response = self.client.get(reverse("bookmarks:list"))
+        self.assertNotIn("X-Query-Count", response)
+
+        @query_budget(2)
+        def view(request):
+            for user in get_user_model().objects.all()[:1]:
+                for _ in range(8):
+                    Profile.objects.filter(user=user).exists()
+            return HttpResponse()
+
+        request = RequestFactory().get("/")
+        middleware = QueryBudgetMiddleware(lambda request: view(request))
+        middleware.process_view(request, view, (), {})
+        with self.assertLogs("core.queries", "WARNING") as logs:
+            middleware(request)
+        record = logs.records[0]
+        self.assertEqual(record.query_stats["queries"], 9)
+        self.assertEqual(record.query_stats["budget"], 2)
+        self.assertEqual(record.query_stats["repeated"][0]["count"], 8)
+        self.assertIn("8x SELECT", record.getMessage())
+
+    def test_consumer_hook_reports_each_call(self):
+        class Consumer:
+            @track_queries
+            def lookup(self):
+                return get_user_model().objects.count()
+
+        with self.assertLogs("core.queries", "DEBUG") as logs:
+            self.assertEqual(Consumer().lookup(), 1)
+        self.assertTrue(logs.records[0].query_stats["label"].endswith("Consumer.lookup"))
+        self.assertEqual(logs.records[0].query_stats["queries"], 1)
+
+    def test_chat_pages_have_no_n_plus_one(self):
+        User = get_user_model()
+        thread = None
+        for index in range(8):
+            other = User.objects.create_user(username=f"friend{index}", password="pass12345")
+            Profile.objects.create(user=other)
+            Follow.objects.create(user_from=self.user.profile, user_to=other.profile)
+            Follow.objects.create(user_from=other.profile, user_to=self.user.profile)
+            thread = ChatThread.objects.create()
+            thread.participants.add(self.user, other)
+            for _ in range(3):
+                ChatMessage.objects.create(thread=thread, sender=other, text="Привіт")
+        self.client.force_login(self.user)
+
+        with self.assertQueryBudget(12, repeated=1):
+            response = self.client.get(reverse("chat:thread_list"))
+        self.assertContains(response, "friend7")
+        with self.assertQueryBudget(15, repeated=1):
+            response = self.client.get(reverse("chat:chat_thread_detail", args=[thread.pk]))
+        self.assertContains(response, "Привіт", count=3)
+
+
+@override_settings(PROFILER_INTERVAL=0.001)
+class ProfilerTests(TestCase):
+    def setUp(self):
+        self.profile_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(PROFILER_DIR=self.profile_dir)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+    def slow_view(self, request):
+        time.sleep(0.05)
+        return HttpResponse()
+
+    def test_only_signed_or_sampled_requests_are_profiled(self):
+        middleware = profiling.ProfilerMiddleware(self.slow_view)
+        response = middleware(RequestFactory().get("/slow/"))
+        self.assertNotIn("X-Profile-Samples", response)
+        response = middleware(RequestFactory().get("/slow/", headers={"X-Profile": "forged"}))
+        self.assertNotIn("X-Profile-Samples", response)
+        self.assertEqual(profiling.endpoints(), [])
+
+        token = profiling.make_token()
+        response = middleware(RequestFactory().get("/slow/", headers={"X-Profile": token}))
+        self.assertGreater(int(response["X-Profile-Samples"]), 0)
+        with override_settings(PROFILER_SAMPLE_RATE=1.0):
+            middleware(RequestFactory().get("/slow/"))
+
+        stored = profiling.load("/slow/")
+        self.assertEqual(stored["requests"], 2)
+        self.assertIn("ProfilerTests.slow_view", profiling.folded("/slow/"))
+        self.assertTrue(profiling.folded("/slow/").splitlines()[0].endswith(tuple("0123456789")))
+
+    def test_view_name_labels_and_export(self):
+        Profile.objects.create(
+            user=get_user_model().objects.create_user(username="viewer", password="pass12345")
+        )
+        with override_settings(PROFILER_SAMPLE_RATE=1.0):
+            self.client.get(reverse("posts:home"))
+        self.assertEqual(profiling.endpoints(), ["posts:home"])
+
+        output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output_dir)
+        out = StringIO()
+        call_command("export_profiles", output_dir=output_dir, clear=True, stdout=out)
+        self.assertIn("posts:home: 1 requests", out.getvalue())
+        self.assertTrue(os.path.exists(os.path.join(output_dir, "posts.home.folded")))
+        self.assertEqual(profiling.endpoints(), [])
+
+        out = StringIO()
+        call_command("export_profiles", token=True, stdout=out)
+        self.assertTrue(profiling.has_valid_token(out.getvalue().strip()))
+
+    def test_concurrent_saves_all_count(self):
+        def finish(index):
+            profile = profiling.Profile("busy")
+            profile.stacks[f"view;step{index % 3}"] += 2
+            profile.samples = 2
+            profiling.save(profile)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(finish, range(40)))
+
+        stored = profiling.load("busy")
+        self.assertEqual(stored["requests"], 40)
+        self.assertEqual(stored["samples"], 80)
+        self.assertEqual(sum(stored["stacks"].values()), 80)
+
+    def test_expired_profiles_are_dropped(self):
+        profiling.save(profiling.Profile("old"))
+        with override_settings(PROFILER_RETENTION=-1):
+            self.assertEqual(profiling.endpoints(), [])
+            self.assertIsNone(profiling.load("old"))
+
+    def test_consumer_events_include_their_database_helpers(self):
+        @profiling.profiled
+        def lookup():
+            time.sleep(0.03)
+            return get_user_model().objects.count()
+
+        class Consumer:
+            scope = {"headers": [], "query_string": f"profile={profiling.make_token()}".encode()}
+
+            @profiling.profile_event
+            async def receive(self):
+                return await sync_to_async(lookup)()
+
+        self.assertEqual(async_to_sync(Consumer().receive)(), 0)
+        stored = profiling.load("Consumer.receive")
+        self.assertEqual(stored["requests"], 1)
+        self.assertIn("lookup", profiling.folded("Consumer.receive"))
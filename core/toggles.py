@@ -0,0 +1,153 @@
+"""Race-free add/remove of a user's row in a (user, post) table.
+
+Likes and bookmarks are rows unique on ``(user, post)``.  Adding one is a
+single ``INSERT ... ON CONFLICT DO NOTHING RETURNING``, removing one a
+``DELETE ... RETURNING``: whether the row was actually added or removed
+comes back from the same statement, so two concurrent clicks can't both
+count, and neither raises ``IntegrityError``.  A denormalized counter on
+the post is then moved with ``UPDATE ... RETURNING``, giving its new value
+without another read.
+
+These statements bypass the models' ``post_save``/``post_delete``
+signals; callers send their own signal instead (see ``likes.signals``).
+Needs SQLite >= 3.35 or PostgreSQL.
+"""
+
+from datetime import timezone as dt_timezone
+
+from django.db import connection
+from django.utils import timezone
+
+from posts.models import Post
+
+# Rows per batched statement (3 parameters each; older SQLite allows 999).
+BATCH_SIZE = 300
+
+
+def _post_names():
+    quote = connection.ops.quote_name
+    return {"posts": quote(Post._meta.db_table), "pk": quote(Post._meta.pk.column)}
+
+
+def _names(model):
+    quote = connection.ops.quote_name
+    opts = model._meta
+    return {
+        "table": quote(opts.db_table),
+        "user": quote(opts.get_field("user").column),
+        "post": quote(opts.get_field("post").column),
+        "created_at": quote(opts.get_field("created_at").column),
+        **_post_names(),
+    }
+
+
+def _aware(value):
+    if value is not None and timezone.is_naive(value):
+        value = timezone.make_aware(value, dt_timezone.utc)
+    return value
+
+
+def add_row(model, user_id, post_id):
+    """Insert the row unless it exists; returns its ``created_at`` if inserted.
+
+    Nothing is inserted (and ``None`` returned) if the post doesn't exist.
+    """
+    now = timezone.now()
+    sql = (
+        "INSERT INTO {table} ({user}, {post}, {created_at}) "
+        "SELECT %s, %s, %s WHERE EXISTS (SELECT 1 FROM {posts} WHERE {pk} = %s) "
+        "ON CONFLICT ({user}, {post}) DO NOTHING RETURNING {created_at}"
+    ).format(**_names(model))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            sql,
+            [user_id, post_id, connection.ops.adapt_datetimefield_value(now), post_id],
+        )
+        row = cursor.fetchone()
+    return now if row else None
+
+
+def remove_row(model, user_id, post_id):
+    """Delete the row if it exists; returns the removed row's ``created_at``."""
+    sql = (
+        "DELETE FROM {table} WHERE {user} = %s AND {post} = %s RETURNING {created_at}"
+    ).format(**_names(model))
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [user_id, post_id])
+        row = cursor.fetchone()
+    return _aware(row[0]) if row else None
+
+
+def add_rows(model, pairs, batch_size=BATCH_SIZE):
+    """Batched ``add_row`` for ``(user_id, post_id)`` pairs.
+
+    Returns the ``(user_id, post_id, created_at)`` of the rows inserted;
+    pairs that already exist or whose post is gone are skipped.
+    """
+    pairs = list(pairs)
+    live = set(
+        Post.objects.filter(pk__in={post_id for _, post_id in pairs}).values_list("pk", flat=True)
+    )
+    pairs = [(user_id, post_id) for user_id, post_id in pairs if post_id in live]
+    now = timezone.now()
+    stamp = connection.ops.adapt_datetimefield_value(now)
+    names = _names(model)
+    inserted = []
+    with connection.cursor() as cursor:
+        for start in range(0, len(pairs), batch_size):
+            chunk = pairs[start : start + batch_size]
+            sql = (
+                "INSERT INTO {table} ({user}, {post}, {created_at}) VALUES "
+                + ", ".join(["(%s, %s, %s)"] * len(chunk))
+                + " ON CONFLICT ({user}, {post}) DO NOTHING RETURNING {user}, {post}"
+            ).format(**names)
+            cursor.execute(sql, [value for pair in chunk for value in (*pair, stamp)])
+            inserted.extend((user_id, post_id, now) for user_id, post_id in cursor.fetchall())
+    return inserted
+
+
+def remove_rows(model, pairs, batch_size=BATCH_SIZE):
+    """Batched ``remove_row``; returns ``(user_id, post_id, created_at)`` of the rows removed."""
+    pairs = list(pairs)
+    names = _names(model)
+    removed = []
+    with connection.cursor() as cursor:
+        for start in range(0, len(pairs), batch_size):
+            chunk = pairs[start : start + batch_size]
+            sql = (
+                "DELETE FROM {table} WHERE ({user}, {post}) IN (VALUES "
+                + ", ".join(["(%s, %s)"] * len(chunk))
+                + ") RETURNING {user}, {post}, {created_at}"
+            ).format(**names)
+            cursor.execute(sql, [value for pair in chunk for value in pair])
+            removed.extend(
+                (user_id, post_id, _aware(created_at))
+                for user_id, post_id, created_at in cursor.fetchall()
+            )
+    return removed
+
+
+def move_counter(post_id, field, delta):
+    """Add ``delta`` to the post's ``field`` (never below 0); returns the new value.
+
+    With ``delta=0`` this just reads the value.  Raises ``Post.DoesNotExist``.
+    """
+    column = connection.ops.quote_name(Post._meta.get_field(field).column)
+    names = _post_names()
+    if delta:
+        sql = (
+            f"UPDATE {names['posts']} "
+            f"SET {column} = CASE WHEN {column} + %s > 0 THEN {column} + %s ELSE 0 END "
+            f"WHERE {names['pk']} = %s RETURNING {column}"
+        )
+        params = [delta, delta, post_id]
+    else:
+        sql = f"SELECT {column} FROM {names['posts']} WHERE {names['pk']} = %s"
+        params = [post_id]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    if row is None:
+        raise Post.DoesNotExist
+    return row[0]
+
@@ -0,0 +1,156 @@
+"""Bounded-memory upload handling.
+
+``LimitedUploadHandler`` streams every uploaded file to a temporary file
+in chunks and stops storing a file once it passes ``UPLOAD_MAX_BYTES``;
+the rest of that file is read and discarded, and the form receives an
+``OversizedUploadedFile`` carrying only the size, which the bounded form
+fields reject with a normal validation error.
+
+``BoundedImageField`` checks size and pixel count from the image header
+before Pillow decodes or verifies anything, so decompression bombs are
+rejected without ever being expanded.
+
+Each completed upload logs its size, duration and throughput on the
+``core.uploads`` logger.
+"""
+
+import logging
+import time
+
+from django import forms
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 25 * 1024 * 1024
+DEFAULT_IMAGE_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_IMAGE_MAX_PIXELS = 40_000_000
+
+
+def upload_max_bytes():
+    return getattr(settings, "UPLOAD_MAX_BYTES", DEFAULT_MAX_BYTES)
+
+
+class OversizedUploadedFile(UploadedFile):
+    """Placeholder for a file whose content was dropped for being too large."""
+
+    def __init__(self, name, content_type, size):
+        super().__init__(None, name, content_type, size)
+
+    def open(self, mode=None):
+        raise ValueError("The content of an oversized upload was discarded.")
+
+
+class LimitedUploadHandler(TemporaryFileUploadHandler):
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.oversized = False
+        self.started = time.monotonic()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > upload_max_bytes():
+            self.oversized = True
+        if self.oversized:
+            return None
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        elapsed = time.monotonic() - self.started
+        logger.info(
+            "Upload %s: %d bytes in %.3fs (%.1f KiB/s)%s",
+            self.file_name,
+            self.received,
+            elapsed,
+            self.received / 1024 / elapsed if elapsed else 0.0,
+            " [discarded: over limit]" if self.oversized else "",
+        )
+        if self.oversized:
+            self.file.close()
+            return OversizedUploadedFile(self.file_name, self.content_type, self.received)
+        return super().file_complete(file_size)
+
+
+def _too_large(max_bytes):
+    return forms.ValidationError(
+        "Файл завеликий (максимум %(limit)s).",
+        code="file_too_large",
+        params={"limit": filesizeformat(max_bytes)},
+    )
+
+
+class BoundedFileField(forms.FileField):
+    def __init__(self, *args, max_bytes=None, **kwargs):
+        self._max_bytes = max_bytes
+        super().__init__(*args, **kwargs)
+
+    @property
+    def max_bytes(self):
+        return self._max_bytes or upload_max_bytes()
+
+    def to_python(self, data):
+        if data and (
+            isinstance(data, OversizedUploadedFile) or data.size > self.max_bytes
+        ):
+            raise _too_large(self.max_bytes)
+        return super().to_python(data)
+
+
+class BoundedImageField(forms.ImageField):
+    def __init__(self, *args, max_bytes=None, max_pixels=None, **kwargs):
+        self._max_bytes = max_bytes
+        self._max_pixels = max_pixels
+        super().__init__(*args, **kwargs)
+
+    # Limits are looked up on use, so they follow settings changes.
+    @property
+    def max_bytes(self):
+        return self._max_bytes or getattr(
+            settings, "UPLOAD_IMAGE_MAX_BYTES", DEFAULT_IMAGE_MAX_BYTES
+        )
+
+    @property
+    def max_pixels(self):
+        return self._max_pixels or getattr(
+            settings, "UPLOAD_IMAGE_MAX_PIXELS", DEFAULT_IMAGE_MAX_PIXELS
+        )
+
+    def _check_dimensions(self, data):
+        source = (
+            data.temporary_file_path()
+            if hasattr(data, "temporary_file_path")
+            else data
+        )
+        try:
+            # Image.open only parses the header; nothing is decoded here.
+            with Image.open(source) as image:
+                width, height = image.size
+        except Image.DecompressionBombError:
+            width = height = None
+        except Exception:
+            # Not an image; ImageField.to_python reports it.
+            return
+        finally:
+            if hasattr(data, "seek"):
+                data.seek(0)
+
+        if width is None or width * height > self.max_pixels:
+            raise forms.ValidationError(
+                "Зображення завелике (максимум %(limit)s мегапікселів).",
+                code="image_too_many_pixels",
+                params={"limit": self.max_pixels // 1_000_000},
+            )
+
+    def to_python(self, data):
+        if data and (
+            isinstance(data, OversizedUploadedFile) or data.size > self.max_bytes
+        ):
+            raise _too_large(self.max_bytes)
+        if data:
+            self._check_dimensions(data)
+        return super().to_python(data)
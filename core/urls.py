@@ -0,0 +1,16 @@
+import re
+
+from django.conf import settings
+from django.urls import re_path
+
+from .views import serve_media
+
+app_name = "core"
+
+urlpatterns = [
+    re_path(
+        r"^%s(?P<path>.+)$" % re.escape(settings.MEDIA_URL.lstrip("/")),
+        serve_media,
+        name="media",
+    ),
+]
@@ -0,0 +1,220 @@
+"""Serving of uploaded media.
+
+``serve_media`` answers ``MEDIA_URL`` requests straight from ``MEDIA_ROOT``:
+
+* conditional GET (``ETag`` / ``Last-Modified``, answered with 304);
+* single byte ranges (206 / 416), so video and large files can be seeked
+  and resumed; multi-range requests get the whole file;
+* ``Cache-Control``: content-addressed blobs never change and are cached
+  for a year as ``immutable``, everything else for ``MEDIA_CACHE_MAX_AGE``;
+* chat attachments (and their derivatives) only for participants of a
+  thread containing them, cached ``private``; files are sent as downloads;
+* with ``MEDIA_SENDFILE_HEADER`` set to ``X-Accel-Redirect`` (nginx) or
+  ``X-Sendfile`` (Apache/lighttpd) the body is left to the front server.
+
+Files are streamed in blocks; nothing reads a whole file into memory.
+"""
+
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.views.decorators.http import require_safe
+
+from chat.models import ChatMessage
+from .images import DERIVATIVES_DIR
+from .storage import blob_hash
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+DEFAULT_MAX_AGE = 24 * 60 * 60
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+DERIVATIVE_SUFFIX_RE = re.compile(r"\.w\d+\.\w+$")
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_byte_range(header, size):
+    """Inclusive ``(start, end)`` requested by a ``Range`` header.
+
+    Returns ``None`` when the whole file should be sent (no header, a
+    malformed one or several ranges) and raises ``RangeNotSatisfiable``
+    when the range lies outside the file.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        # Suffix range: the last N bytes.
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+class RangeFile:
+    """Read-only view of ``length`` bytes of ``file`` starting at ``start``."""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def chat_media_filter(name):
+    """``ChatMessage`` lookup of the message carrying chat media ``name``
+    (or the chat image a derivative was made from); ``None`` otherwise."""
+    if name.startswith(f"{DERIVATIVES_DIR}/"):
+        source_root = DERIVATIVE_SUFFIX_RE.sub("", name[len(DERIVATIVES_DIR) + 1:])
+        if source_root.startswith("chat_images/"):
+            return {"image__startswith": f"{source_root}."}
+        return None
+    if name.startswith("chat_images/"):
+        return {"image": name}
+    if name.startswith("chat_files/"):
+        return {"file": name}
+    return None
+
+
+def _etag(name, stat):
+    sha256 = blob_hash(name)
+    if sha256:
+        return quote_etag(sha256)
+    return quote_etag(f"{stat.st_mtime_ns:x}-{stat.st_size:x}")
+
+
+def _if_range_matches(request, etag, last_modified):
+    if_range = request.headers.get("If-Range")
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/"')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+@require_safe
+def serve_media(request, path):
+    name = posixpath.normpath(path).lstrip("/")
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, name)
+    except SuspiciousFileOperation:
+        raise Http404
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    private = False
+    download_name = None
+    lookup = chat_media_filter(name)
+    if lookup is not None:
+        message = None
+        if request.user.is_authenticated:
+            message = (
+                ChatMessage.objects.filter(thread__participants=request.user, **lookup)
+                .only("pk", "file", "file_name")
+                .first()
+            )
+        if message is None:
+            # Same answer as a missing file: don't reveal what exists.
+            raise Http404
+        private = True
+        if name.startswith("chat_files/"):
+            download_name = message.display_file_name
+
+    etag = _etag(name, stat)
+    last_modified = int(stat.st_mtime)
+    size = stat.st_size
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or "application/octet-stream"
+
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        byte_range = None
+        sendfile_header = getattr(settings, "MEDIA_SENDFILE_HEADER", None)
+        if sendfile_header:
+            # The front server reads the file and handles ranges itself.
+            response = HttpResponse(content_type=content_type)
+            if sendfile_header.lower() == "x-accel-redirect":
+                prefix = getattr(settings, "MEDIA_SENDFILE_PREFIX", "/protected-media/")
+                response[sendfile_header] = quote(prefix.rstrip("/") + "/" + name)
+            else:
+                response[sendfile_header] = full_path
+        else:
+            try:
+                if _if_range_matches(request, etag, last_modified):
+                    byte_range = parse_byte_range(request.headers.get("Range"), size)
+            except RangeNotSatisfiable:
+                response = HttpResponse(status=416)
+                response["Content-Range"] = f"bytes */{size}"
+                return response
+
+            if request.method == "HEAD":
+                response = HttpResponse(content_type=content_type)
+                response["Content-Length"] = size
+            elif byte_range is None:
+                response = FileResponse(open(full_path, "rb"), content_type=content_type)
+            else:
+                start, end = byte_range
+                length = end - start + 1
+                response = FileResponse(
+                    RangeFile(open(full_path, "rb"), start, length),
+                    content_type=content_type,
+                    status=206,
+                )
+                response["Content-Length"] = length
+                response["Content-Range"] = f"bytes {start}-{end}/{size}"
+            response["Accept-Ranges"] = "bytes"
+        if encoding:
+            response["Content-Encoding"] = encoding
+
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    if download_name:
+        response["Content-Disposition"] = (
+            f"attachment; filename*=UTF-8''{quote(download_name)}"
+        )
+
+    if blob_hash(name) and not private:
+        patch_cache_control(
+            response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True
+        )
+    else:
+        max_age = getattr(settings, "MEDIA_CACHE_MAX_AGE", DEFAULT_MAX_AGE)
+        visibility = {"private": True} if private else {"public": True}
+        patch_cache_control(response, max_age=max_age, **visibility)
+    return response
@@ -0,0 +1,195 @@
+"""Write-behind buffer for likes (``LIKE_WRITE_BEHIND = True``).
+
+On a viral post every like is an INSERT plus an UPDATE of the same
+``Post`` row, and on SQLite those writes queue up behind each other.  In
+write-behind mode a like or unlike is only recorded here, as the user's
+latest intent for the post (a later click replaces an earlier one), and
+answered right away.  The intents are written every
+``LIKE_FLUSH_INTERVAL`` seconds in a single transaction: one batched
+INSERT, one batched DELETE and one ``likes_count`` UPDATE per post, after
+which ``likes_changed`` is sent for every like actually added or removed.
+
+The acting user sees their own state immediately: the returned count is
+the stored ``likes_count`` plus this process's pending difference for the
+post.  Other processes, and pages rendered from the database, catch up
+after the flush.  A failed flush is logged and retried, backing off up to
+``RETRY_MAX_DELAY`` seconds.  Unflushed intents are written at exit, but
+are lost if the process dies.
+"""
+
+import atexit
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from core import toggles
+from core.background import CoalescingQueue
+from posts.models import Post
+from .models import Like
+from .signals import likes_changed
+
+logger = logging.getLogger(__name__)
+
+RETRY_MAX_DELAY = 30
+
+
+def flush_interval():
+    return getattr(settings, "LIKE_FLUSH_INTERVAL", 0.3)
+
+
+class LikeBuffer:
+    def __init__(self):
+        # (user_id, post_id) -> {"liked": latest intent, "stored": state in the database}
+        self._intents = {}
+        # post_id -> likes not yet reflected in likes_count
+        self._deltas = defaultdict(int)
+        self._lock = threading.Lock()
+        # Held while a flush moves counts from _deltas into the database.
+        self._flush_lock = threading.Lock()
+        # Any queued key flushes every pending intent, including ones left
+        # behind by a failed flush.
+        self.queue = CoalescingQueue(lambda keys: self.flush(), delay=flush_interval)
+        # Consecutive failed flushes, and the timer of the next retry.
+        self._failures = 0
+        self._retry = None
+        atexit.register(self.flush)
+
+    def __len__(self):
+        return len(self._intents)
+
+    def _stored(self, key):
+        with self._lock:
+            intent = self._intents.get(key)
+        if intent is not None:
+            return intent["stored"]
+        user_id, post_id = key
+        return Like.objects.filter(user_id=user_id, post_id=post_id).exists()
+
+    def _likes_count(self, post_id):
+        with self._flush_lock:
+            likes_count = (
+                Post.objects.filter(pk=post_id).values_list("likes_count", flat=True).first()
+            )
+            if likes_count is None:
+                raise Post.DoesNotExist
+            with self._lock:
+                return likes_count + self._deltas.get(post_id, 0)
+
+    def _record(self, user_id, post_id, liked=None):
+        key = (user_id, post_id)
+        stored = self._stored(key)
+        likes_count = self._likes_count(post_id)
+        with self._lock:
+            intent = self._intents.setdefault(key, {"liked": stored, "stored": stored})
+            if liked is None:
+                liked = not intent["liked"]
+            changed = intent["liked"] != liked
+            if changed:
+                intent["liked"] = liked
+                delta = 1 if liked else -1
+                self._deltas[post_id] += delta
+                likes_count += delta
+                if not self._deltas[post_id]:
+                    del self._deltas[post_id]
+            if intent["liked"] == intent["stored"]:
+                del self._intents[key]
+        if changed:
+            self.queue.add(key)
+        return liked, changed, max(likes_count, 0)
+
+    def set(self, user_id, post_id, liked):
+        """Record that the user (un)likes the post.  Returns ``(changed, likes_count)``."""
+        _, changed, likes_count = self._record(user_id, post_id, liked)
+        return changed, likes_count
+
+    def toggle(self, user_id, post_id):
+        """Flip the user's like.  Returns ``(liked, likes_count)``."""
+        liked, _, likes_count = self._record(user_id, post_id)
+        return liked, likes_count
+
+    def _write(self, applied):
+        with transaction.atomic():
+            added = toggles.add_rows(Like, [key for key, (liked, _) in applied.items() if liked])
+            removed = toggles.remove_rows(
+                Like, [key for key, (liked, _) in applied.items() if not liked]
+            )
+            changes = defaultdict(int)
+            for _, post_id, _ in added:
+                changes[post_id] += 1
+            for _, post_id, _ in removed:
+                changes[post_id] -= 1
+            counts = {
+                post_id: toggles.move_counter(post_id, "likes_count", delta)
+                for post_id, delta in changes.items()
+                if delta
+            }
+        return added, removed, counts
+
+    def flush(self):
+        """Write every pending intent."""
+        with self._flush_lock:
+            with self._lock:
+                applied = {
+                    key: (intent["liked"], intent["stored"])
+                    for key, intent in self._intents.items()
+                }
+            if not applied:
+                return
+
+            try:
+                added, removed, counts = self._write(applied)
+            except Exception:
+                # The intents stay pending; nothing else may queue a flush.
+                logger.exception("Writing %d buffered likes failed", len(applied))
+                self._retry_later(next(iter(applied)))
+                return
+            self._failures = 0
+
+            requeue = []
+            with self._lock:
+                for key, (liked, stored) in applied.items():
+                    post_id = key[1]
+                    self._deltas[post_id] -= int(liked) - int(stored)
+                    if not self._deltas[post_id]:
+                        del self._deltas[post_id]
+                    # The user may have clicked again while this was written.
+                    intent = self._intents.setdefault(key, {"liked": stored})
+                    intent["stored"] = liked
+                    if intent["liked"] == liked:
+                        del self._intents[key]
+                    else:
+                        requeue.append(key)
+
+        for key in requeue:
+            self.queue.add(key)
+
+        for rows, liked in ((added, True), (removed, False)):
+            for user_id, post_id, created_at in rows:
+                likes_changed.send(
+                    sender=Like,
+                    user_id=user_id,
+                    post_id=post_id,
+                    liked=liked,
+                    created_at=created_at,
+                    likes_count=counts.get(post_id),
+                )
+
+    def _retry_later(self, key):
+        self._failures += 1
+        delay = min(flush_interval() * 2**self._failures, RETRY_MAX_DELAY)
+        with self._lock:
+            if self._retry is not None:
+                self._retry.cancel()
+            self._retry = threading.Timer(delay, self.queue.add, args=(key,))
+            self._retry.daemon = True
+            self._retry.start()
+
+
+like_buffer = LikeBuffer()
+
+
+def is_enabled():
+    return getattr(settings, "LIKE_WRITE_BEHIND", False)
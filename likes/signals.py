@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+# Sent (sender=Like) when a like is added or removed through likes.toggles,
+# which writes with plain SQL and so doesn't send post_save/post_delete.
+# Arguments: user_id, post_id, liked, created_at (of the like), likes_count.
+likes_changed = Signal()
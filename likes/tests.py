@@ -1,3 +1,170 @@
-from django.test import TestCase
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from core.querylog import record_queries
+from posts.models import Post
+from trending.models import EngagementBucket
+from .buffer import like_buffer
+from .models import Like
+from .signals import likes_changed
+from .toggles import set_like, toggle_like
+
+
+class LikeToggleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="tester", password="pass12345"
+        )
+        self.post = Post.objects.create(author=self.user, content="Hello")
+        self.events = []
+        likes_changed.connect(self.record_event)
+        self.addCleanup(likes_changed.disconnect, self.record_event)
+
+    def record_event(self, sender, **kwargs):
+        self.events.append((kwargs["liked"], kwargs["likes_count"]))
+
+    def test_toggle_returns_the_new_count(self):
+        with record_queries() as recorder:
+            self.assertEqual(toggle_like(self.user.id, self.post.id), (True, 1))
+        # DELETE (nothing), INSERT, then the counter UPDATE; the rest is the
+        # score and trending updates, which run inline in tests.
+        like_statements = [shape for shape in recorder.shapes if '"likes_like"' in shape]
+        self.assertEqual(len(like_statements), 2)
+        self.assertTrue(Like.objects.filter(user=self.user, post=self.post).exists())
+        self.assertEqual(toggle_like(self.user.id, self.post.id), (False, 0))
+        self.assertFalse(Like.objects.exists())
+        self.assertEqual(self.events, [(True, 1), (False, 0)])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+
+    def test_set_is_idempotent_and_feeds_trending(self):
+        self.assertEqual(set_like(self.user.id, self.post.id, True), (True, 1))
+        self.assertEqual(set_like(self.user.id, self.post.id, True), (False, 1))
+        self.assertEqual(EngagementBucket.objects.get(post=self.post).likes, 1)
+        self.assertEqual(set_like(self.user.id, self.post.id, False), (True, 0))
+        self.assertEqual(set_like(self.user.id, self.post.id, False), (False, 0))
+        self.assertEqual(EngagementBucket.objects.get(post=self.post).likes, 0)
+        self.assertEqual(len(self.events), 2)
+        with self.assertRaises(Post.DoesNotExist):
+            set_like(self.user.id, self.post.id + 1, True)
+        self.assertFalse(Like.objects.exists())
+
+    def test_state_endpoint(self):
+        self.client.force_login(self.user)
+        url = reverse("likes:like_state", args=[self.post.id])
+        for _ in range(2):
+            response = self.client.put(url)
+            self.assertEqual(response.json()["likes_count"], 1)
+        self.assertFalse(response.json()["changed"])
+        response = self.client.delete(url)
+        self.assertEqual(response.json(), {"liked": False, "changed": True, "likes_count": 0})
+        self.assertEqual(self.client.post(url).status_code, 405)
+        missing = reverse("likes:like_state", args=[self.post.id + 1])
+        self.assertEqual(self.client.put(missing).status_code, 404)
+
+
+@override_settings(LIKE_WRITE_BEHIND=True)
+class LikeWriteBehindTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.users = [
+            User.objects.create_user(username=f"fan{index}", password="pass12345")
+            for index in range(3)
+        ]
+        self.post = Post.objects.create(author=self.users[0], content="Viral")
+        Like.objects.create(user=self.users[2], post=self.post)
+        self.addCleanup(like_buffer.flush)
+
+    @override_settings(BACKGROUND_TASKS_ASYNC=True)
+    def test_likes_are_buffered_and_flushed_in_batches(self):
+        first, second, third = (user.id for user in self.users)
+        self.assertEqual(toggle_like(first, self.post.id), (True, 2))
+        self.assertEqual(toggle_like(first, self.post.id), (False, 1))
+        self.assertEqual(toggle_like(first, self.post.id), (True, 2))
+        self.assertEqual(set_like(second, self.post.id, True), (True, 3))
+        self.assertEqual(set_like(third, self.post.id, False), (True, 2))
+        self.assertEqual(set_like(third, self.post.id, False), (False, 2))
+
+        # Nothing is written until the flush.
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+        self.assertEqual(len(like_buffer), 3)
+
+        events = []
+        receiver = lambda sender, **kwargs: events.append((kwargs["user_id"], kwargs["liked"]))
+        likes_changed.connect(receiver)
+        self.addCleanup(likes_changed.disconnect, receiver)
+        with record_queries() as recorder:
+            like_buffer.flush()
+        # One batched INSERT, one batched DELETE and one counter UPDATE.
+        writes = [
+            shape
+            for shape in recorder.shapes
+            if '"likes_like"' in shape or shape.startswith('UPDATE "posts_post"')
+        ]
+        self.assertEqual(len(writes), 3)
+
+        self.assertEqual(len(like_buffer), 0)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 2)
+        self.assertEqual(
+            set(Like.objects.values_list("user_id", flat=True)), {first, second}
+        )
+        self.assertEqual(sorted(events), sorted([(first, True), (second, True), (third, False)]))
+        self.assertEqual(toggle_like(second, self.post.id), (False, 1))
+
+    @override_settings(BACKGROUND_TASKS_ASYNC=True, LIKE_FLUSH_INTERVAL=5)
+    def test_failed_flush_is_retried(self):
+        toggle_like(self.users[0].id, self.post.id)
+
+        def fail(applied):
+            raise DatabaseError("database is locked")
+
+        like_buffer._write = fail
+        with self.assertLogs("likes.buffer", "ERROR"):
+            like_buffer.flush()
+        del like_buffer._write
+        retry = like_buffer._retry
+        self.addCleanup(retry.cancel)
+
+        self.assertEqual(len(like_buffer), 1)
+        self.assertEqual(retry.interval, 10)
+        with self.captureOnCommitCallbacks(execute=True):
+            retry.function(*retry.args)
+        like_buffer.queue.flush()
+
+        self.assertEqual(len(like_buffer), 0)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 2)
+
+    def test_inline_mode_writes_immediately(self):
+        self.client.force_login(self.users[0])
+        response = self.client.put(reverse("likes:like_state", args=[self.post.id]))
+        self.assertEqual(response.json()["likes_count"], 2)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 2)
+        with self.assertRaises(Post.DoesNotExist):
+            toggle_like(self.users[0].id, self.post.id + 1)
+
+
+class ToggleBenchmarkTests(TransactionTestCase):
+    # One thread: the in-memory test database locks out concurrent writers.
+    def test_benchmark_reports_and_checks_the_counter(self):
+        User = get_user_model()
+        author = User.objects.create_user(username="author", password="pass12345")
+        User.objects.create_user(username="fan", password="pass12345")
+        post = Post.objects.create(author=author, content="Hello")
+
+        out = StringIO()
+        call_command("bench_toggles", threads=1, clicks=15, post=post.pk, stdout=out)
+        self.assertIn("15 clicks by 1 threads", out.getvalue())
+        self.assertIn("matches the likes", out.getvalue())
+        self.assertNotIn("errors", out.getvalue())
@@ -0,0 +1,55 @@
+"""Liking and unliking in one atomic round of statements (see core.toggles).
+
+With ``LIKE_WRITE_BEHIND`` the changes go through ``likes.buffer`` instead.
+"""
+
+from django.db import transaction
+
+from core import toggles
+from . import buffer
+from .models import Like
+from .signals import likes_changed
+
+
+def _finish(user_id, post_id, liked, created_at):
+    changed = created_at is not None
+    delta = (1 if liked else -1) if changed else 0
+    likes_count = toggles.move_counter(post_id, "likes_count", delta)
+    if changed:
+        likes_changed.send(
+            sender=Like,
+            user_id=user_id,
+            post_id=post_id,
+            liked=liked,
+            created_at=created_at,
+            likes_count=likes_count,
+        )
+    return changed, likes_count
+
+
+def set_like(user_id, post_id, liked):
+    """Make the like exist (``liked=True``) or not; safe to repeat.
+
+    Returns ``(changed, likes_count)``.  Raises ``Post.DoesNotExist``.
+    """
+    if buffer.is_enabled():
+        return buffer.like_buffer.set(user_id, post_id, liked)
+    with transaction.atomic():
+        if liked:
+            created_at = toggles.add_row(Like, user_id, post_id)
+        else:
+            created_at = toggles.remove_row(Like, user_id, post_id)
+        return _finish(user_id, post_id, liked, created_at)
+
+
+def toggle_like(user_id, post_id):
+    """Unlike if liked, else like.  Returns ``(liked, likes_count)``."""
+    if buffer.is_enabled():
+        return buffer.like_buffer.toggle(user_id, post_id)
+    with transaction.atomic():
+        created_at = toggles.remove_row(Like, user_id, post_id)
+        liked = created_at is None
+        if liked:
+            created_at = toggles.add_row(Like, user_id, post_id)
+        _, likes_count = _finish(user_id, post_id, liked, created_at)
+    return liked, likes_count
@@ -1,8 +1,9 @@
 from django.urls import path
-from .views import like_post
+from .views import like_post, like_state
 
 app_name = 'likes'
 
 urlpatterns = [
     path('like/<int:post_id>/', like_post, name='like_post'),
+    path('api/posts/<int:post_id>/like/', like_state, name='like_state'),
 ]
\ No newline at end of file
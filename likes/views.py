@@ -1,29 +1,36 @@
-from django.http import JsonResponse
-from django.shortcuts import get_object_or_404, redirect
+from django.http import Http404, JsonResponse
+from django.shortcuts import redirect
 from django.contrib.auth.decorators import login_required
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_http_methods, require_POST
 from posts.models import Post
-from .models import Like
+from .toggles import set_like, toggle_like
 
 @login_required
 @require_POST
 def like_post(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    like_qs = Like.objects.filter(user=request.user, post=post)
-
-    if like_qs.exists():
-        like_qs.delete()
-        liked = False
-    else:
-        Like.objects.create(user=request.user, post=post)
-        liked = True
+    try:
+        liked, likes_count = toggle_like(request.user.id, post_id)
+    except Post.DoesNotExist:
+        raise Http404
 
     if request.headers.get("x-requested-with") == "XMLHttpRequest":
         return JsonResponse(
             {
                 "liked": liked,
-                "likes_count": post.likes.count(),
+                "likes_count": likes_count,
             }
         )
 
-    return redirect(request.META.get('HTTP_REFERER', 'posts:home'))
\ No newline at end of file
+    return redirect(request.META.get('HTTP_REFERER', 'posts:home'))
+
+
+@login_required
+@require_http_methods(["PUT", "DELETE"])
+def like_state(request, post_id):
+    """``PUT`` likes the post and ``DELETE`` unlikes it; repeating either is harmless."""
+    liked = request.method == "PUT"
+    try:
+        changed, likes_count = set_like(request.user.id, post_id, liked)
+    except Post.DoesNotExist:
+        raise Http404
+    return JsonResponse({"liked": liked, "changed": changed, "likes_count": likes_count})
\ No newline at end of file
@@ -4,5 +4,5 @@ from .models import Post
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
-    list_display = ('author', 'created_at')
+    list_display = ('author', 'created_at', 'likes_count', 'replies_count')
     list_filter = ('created_at',)
\ No newline at end of file
@@ -0,0 +1,88 @@
+"""JSON payloads of the feed API (``posts:feed_api``).
+
+A page is ``{"posts": [...], "next_cursor": ...}``; each post carries only
+what a card needs, with the viewer's like/bookmark state.  Responses are
+serialized with ujson and tagged with an ETag computed from the versions
+and counters of the posts on the page, so a client re-polling an
+unchanged page gets a 304 without anything being serialized.
+"""
+
+import hashlib
+
+import ujson
+from django.http import HttpResponse
+from django.urls import reverse
+
+from core.images import FORMATS, current_variants, derivative_name
+
+AVATAR_SIZE = 80
+
+
+def _derivative_url(fieldfile, width, extension):
+    return fieldfile.storage.url(derivative_name(fieldfile.name, width, extension))
+
+
+def image_payload(fieldfile, variants):
+    if not fieldfile:
+        return None
+    widths = sorted(current_variants(fieldfile, variants))
+    payload = {"url": fieldfile.url, "widths": widths}
+    for extension, _, _ in FORMATS:
+        payload[extension] = ", ".join(
+            f"{_derivative_url(fieldfile, width, extension)} {width}w" for width in widths
+        )
+    return payload
+
+
+def avatar_url(profile):
+    if profile is None:
+        return None
+    widths = sorted(current_variants(profile.avatar, profile.avatar_variants))
+    if not widths:
+        return profile.avatar_url
+    width = next((width for width in widths if width >= AVATAR_SIZE), widths[-1])
+    return _derivative_url(profile.avatar, width, "webp")
+
+
+def post_payload(post, viewer):
+    profile = getattr(post.author, "profile", None)
+    return {
+        "id": post.pk,
+        "url": reverse("posts:post_detail", args=[post.pk]),
+        "author": {
+            "id": post.author_id,
+            "username": post.author.username,
+            "url": reverse("accounts:profile_detail", args=[post.author.username]),
+            "avatar": avatar_url(profile),
+        },
+        "content": post.content,
+        "image": image_payload(post.image, post.image_variants),
+        "created_at": post.created_at.isoformat(),
+        "likes_count": post.likes_count,
+        "replies_count": post.replies_count,
+        "is_liked": bool(getattr(post, "is_liked", False)),
+        "is_bookmarked": bool(getattr(post, "is_bookmarked", False)),
+        "is_own": viewer.is_authenticated and post.author_id == viewer.pk,
+    }
+
+
+def page_etag(viewer, posts, next_cursor):
+    """Strong ETag of a feed page as ``viewer`` sees it."""
+    parts = [str(viewer.pk or 0), next_cursor or ""]
+    for post in posts:
+        profile = getattr(post.author, "profile", None)
+        parts.append(
+            f"{post.pk}.{post.version}.{profile.version if profile else 0}."
+            f"{post.likes_count}.{post.replies_count}."
+            f"{int(bool(getattr(post, 'is_liked', False)))}"
+            f"{int(bool(getattr(post, 'is_bookmarked', False)))}"
+        )
+    digest = hashlib.md5(":".join(parts).encode(), usedforsecurity=False).hexdigest()
+    return f'"{digest}"'
+
+
+def ujson_response(data, **kwargs):
+    kwargs.setdefault("content_type", "application/json")
+    return HttpResponse(
+        ujson.dumps(data, ensure_ascii=False, escape_forward_slashes=False), **kwargs
+    )
@@ -0,0 +1,60 @@
+"""Page cache of the anonymous feed.
+
+Logged-out visitors all get the same ``-recommendation_score`` feed, so
+its pages are cached whole (see ``core.page_cache``), keyed by the decoded
+cursor, for ``ANONYMOUS_FEED_CACHE_TIMEOUT`` seconds.  A cursor that fails
+its signature check shows the first page, and shares its entry.
+
+Score recomputes call ``scores_changed``, which invalidates the pages only
+when the ranked first page actually changed: under steady likes scores
+move every few seconds, mostly without reordering the top of the feed.
+Deeper pages may then lag by up to the timeout.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core import page_cache
+from core.pagination import InvalidCursor, decode_cursor
+from .models import Post
+
+PAGE_NAME = "anonymous_feed"
+ORDERING = ("-recommendation_score", "-created_at", "-id")
+PAGE_SIZE = 10
+FIRST_PAGE_KEY = f"page-first:{PAGE_NAME}"
+
+
+def cache_timeout():
+    return getattr(settings, "ANONYMOUS_FEED_CACHE_TIMEOUT", 30)
+
+
+def cursor_values(cursor):
+    if not cursor:
+        return ()
+    try:
+        return tuple(decode_cursor(ORDERING, cursor))
+    except InvalidCursor:
+        return ()
+
+
+def cached_feed_page(request, cursor, render):
+    return page_cache.cached_page(
+        request,
+        PAGE_NAME,
+        cursor_values(cursor),
+        render,
+        timeout=cache_timeout(),
+        stale_timeout=getattr(settings, "ANONYMOUS_FEED_CACHE_STALE", 120),
+    )
+
+
+def invalidate():
+    page_cache.bump_version(PAGE_NAME)
+
+
+def scores_changed():
+    """Invalidate the cached pages if the ranked first page changed."""
+    first_page = list(Post.objects.order_by(*ORDERING).values_list("pk", flat=True)[:PAGE_SIZE])
+    if cache.get(FIRST_PAGE_KEY) != first_page:
+        cache.set(FIRST_PAGE_KEY, first_page, timeout=None)
+        invalidate()
@@ -1,10 +1,14 @@
 from django import forms
+from core.uploads import BoundedImageField
 from .models import Post
 
 class PostForm(forms.ModelForm):
     class Meta:
         model = Post
         fields = ['content', 'image']
+        field_classes = {
+            'image': BoundedImageField,
+        }
         widgets = {
             'content': forms.Textarea(attrs={
                 'class': 'modal__textarea',
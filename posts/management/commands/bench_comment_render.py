@@ -0,0 +1,156 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.template import Context, Engine
+from django.template.loader import get_template
+from django.utils import timezone
+
+from accounts.models import CustomUser, Profile
+from posts.models import PATH_STEP, Post
+from posts.views import flatten_comment_tree
+
+# The recursive include-based template post_detail used before the
+# flattened, fragment-cached one, kept here as the benchmark baseline.
+RECURSIVE_TEMPLATE = """<ul class="comment-tree">
+    {% for node in comment_tree %}
+        <li class="comment-node">
+            <article class="comment-card">
+                <div class="comment-card__header">
+                    <div class="comment-card__user">
+                        <a href="{% url 'accounts:profile_detail' node.comment.author.username %}">
+                            <img src="{{ node.comment.author.profile.avatar_url }}" alt="{{ node.comment.author.username }}" class="user-avatar user-avatar--small">
+                        </a>
+                        <div class="user-info">
+                            <a href="{% url 'accounts:profile_detail' node.comment.author.username %}" class="user-info__name">
+                                {{ node.comment.author.username }}
+                            </a>
+                            <span class="user-info__date">{{ node.comment.created_at|date:"d M H:i" }}</span>
+                        </div>
+                    </div>
+                </div>
+                <div class="comment-card__content">
+                    <p>{{ node.comment.content }}</p>
+                    {% if node.comment.image %}
+                        <div class="comment-card__image">
+                            <img src="{{ node.comment.image.url }}" alt="Comment image">
+                        </div>
+                    {% endif %}
+                </div>
+            </article>
+
+            {% if node.children %}
+                {% include 'recursive_comment_tree.html' with comment_tree=node.children %}
+            {% endif %}
+        </li>
+    {% endfor %}
+</ul>
+"""
+
+
+def build_synthetic_tree(size, seed, authors=50):
+    """An in-memory comment forest of ``size`` nodes (no database access)."""
+    rng = random.Random(seed)
+    now = timezone.now()
+    users = []
+    for index in range(authors):
+        user = CustomUser(id=index + 1, username=f"bench_user_{index}")
+        user.profile = Profile(user=user)
+        users.append(user)
+
+    first_id = rng.randrange(10**6, 10**7)
+    roots = []
+    nodes = []
+    for index in range(size):
+        # Roughly one in ten comments starts a new top-level thread; the
+        # rest reply to a random earlier comment.
+        parent = None if not nodes or rng.random() < 0.1 else rng.choice(nodes)
+        post_id = first_id + index
+        comment = Post(
+            id=post_id,
+            author=rng.choice(users),
+            content=f"Synthetic comment {index} " + "lorem ipsum " * rng.randrange(1, 8),
+            created_at=now,
+            version=first_id,
+            path=(parent["comment"].path if parent else "") + f"{post_id:0{PATH_STEP}d}",
+            depth=parent["comment"].depth + 1 if parent else 0,
+        )
+        node = {"comment": comment, "children": [], "more": 0, "more_after": None}
+        nodes.append(node)
+        (parent["children"] if parent else roots).append(node)
+    return roots
+
+
+def timed(render, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        render()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark comment tree rendering: recursive {% include %} versus the "
+        "flattened single-loop template with per-comment fragment caching."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--nodes",
+            type=int,
+            nargs="+",
+            default=[1000, 10000],
+            help="Tree sizes to benchmark (default: 1000 10000).",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="Renders per measurement (default: 3).",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        recursive_engine = Engine(
+            loaders=[
+                (
+                    "django.template.loaders.locmem.Loader",
+                    {"recursive_comment_tree.html": RECURSIVE_TEMPLATE},
+                )
+            ],
+        )
+        recursive_template = recursive_engine.get_template("recursive_comment_tree.html")
+        flat_template = get_template("posts/_comment_tree.html")
+
+        self.stdout.write(
+            f"{'nodes':>8} {'recursive':>12} {'flat (cold)':>12} {'flat (warm)':>12} {'speedup':>8}"
+        )
+        for size in options["nodes"]:
+            tree = build_synthetic_tree(size, options["seed"] + size)
+
+            recursive = timed(
+                lambda: recursive_template.render(Context({"comment_tree": tree})),
+                options["repeat"],
+            )
+
+            # Fresh versions make the first flat render miss the fragment
+            # cache; the following renders hit it.
+            items = flatten_comment_tree(tree)
+            cold = timed(
+                lambda: flat_template.render({"comment_items": items, "parent": None}),
+                1,
+            )
+            warm = timed(
+                lambda: flat_template.render({"comment_items": items, "parent": None}),
+                options["repeat"],
+            )
+
+            recursive_time = statistics.median(recursive)
+            warm_time = statistics.median(warm)
+            self.stdout.write(
+                f"{size:>8} {recursive_time:>11.3f}s {cold[0]:>11.3f}s "
+                f"{warm_time:>11.3f}s {recursive_time / warm_time:>7.1f}x"
+            )
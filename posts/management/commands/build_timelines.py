@@ -0,0 +1,43 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.timeline import rebuild_timeline
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Build (or rebuild) materialized home timelines for users."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            dest="usernames",
+            action="append",
+            default=[],
+            help="Only rebuild the timeline of this username (repeatable).",
+        )
+        parser.add_argument(
+            "--missing-only",
+            action="store_true",
+            help="Skip users whose timeline is already built.",
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by("pk")
+        if options["usernames"]:
+            users = users.filter(username__in=options["usernames"])
+            missing = set(options["usernames"]) - set(
+                users.values_list("username", flat=True)
+            )
+            if missing:
+                raise CommandError(f"Unknown users: {', '.join(sorted(missing))}")
+        if options["missing_only"]:
+            users = users.filter(timeline__isnull=True)
+
+        built = 0
+        for user in users.iterator():
+            rebuild_timeline(user)
+            built += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Built {built} timelines."))
@@ -0,0 +1,98 @@
+import re
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from likes.models import Like
+from posts.models import Post
+from posts.scoring import DEFAULT_BATCH_SIZE, iter_batches, recompute_batch
+
+DURATION_RE = re.compile(r"^(?P<value>\d+)(?P<unit>[smhd])$")
+DURATION_UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days"}
+
+
+def parse_since(value):
+    match = DURATION_RE.match(value)
+    if match:
+        delta = timedelta(**{DURATION_UNITS[match["unit"]]: int(match["value"])})
+        return timezone.now() - delta
+
+    moment = parse_datetime(value)
+    if moment is None:
+        raise CommandError(
+            f"Invalid --since value {value!r}: use a duration like 15m / 6h / 2d "
+            "or an ISO datetime."
+        )
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class Command(BaseCommand):
+    help = "Recompute recommendation_score for posts in bulk (applies time decay)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            help=(
+                "Incremental mode: only posts that still have a positive score or "
+                "were created, liked or replied to since this moment "
+                "(15m / 6h / 2d or an ISO datetime)."
+            ),
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f"Posts per batch (default: {DEFAULT_BATCH_SIZE}).",
+        )
+
+    def get_queryset(self, since):
+        queryset = Post.objects.all()
+        if since is None:
+            return queryset
+
+        # Decay only ever lowers a score, so a post already clamped at zero
+        # can only change if it is new or got engagement since the cutoff.
+        return queryset.filter(
+            Q(recommendation_score__gt=0)
+            | Q(created_at__gte=since)
+            | Q(pk__in=Like.objects.filter(created_at__gte=since).values("post_id"))
+            | Q(
+                pk__in=Post.objects.filter(
+                    created_at__gte=since, parent_post__isnull=False
+                ).values("parent_post_id")
+            )
+        )
+
+    def handle(self, *args, **options):
+        since = parse_since(options["since"]) if options["since"] else None
+        now = timezone.now()
+        queryset = self.get_queryset(since)
+
+        started = time.perf_counter()
+        checked = updated = batches = 0
+        for batch in iter_batches(queryset, options["batch_size"]):
+            batch_started = time.perf_counter()
+            written = recompute_batch(batch, now)
+            checked += len(batch)
+            updated += written
+            batches += 1
+            if options["verbosity"] >= 2:
+                self.stdout.write(
+                    f"Batch {batches}: {len(batch)} posts, {written} updated "
+                    f"in {time.perf_counter() - batch_started:.3f}s"
+                )
+
+        elapsed = time.perf_counter() - started
+        rate = checked / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Checked {checked} posts in {batches} batches, updated {updated} "
+                f"in {elapsed:.2f}s ({rate:.0f} posts/s)."
+            )
+        )
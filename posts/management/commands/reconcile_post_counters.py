@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from likes.models import Like
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = "Recalculate likes_count / replies_count on posts and fix any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="How many posts to check per query (default: 5000).",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        likes = (
+            Like.objects.filter(post=OuterRef("pk"))
+            .order_by()
+            .values("post")
+            .annotate(total=Count("id"))
+            .values("total")
+        )
+        replies = (
+            Post.objects.filter(parent_post=OuterRef("pk"))
+            .order_by()
+            .values("parent_post")
+            .annotate(total=Count("id"))
+            .values("total")
+        )
+
+        checked = 0
+        fixed = 0
+        last_pk = 0
+        while True:
+            batch_ids = list(
+                Post.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not batch_ids:
+                break
+            last_pk = batch_ids[-1]
+            checked += len(batch_ids)
+
+            drifted = list(
+                Post.objects.filter(pk__in=batch_ids)
+                .annotate(
+                    actual_likes=Coalesce(Subquery(likes), Value(0)),
+                    actual_replies=Coalesce(Subquery(replies), Value(0)),
+                )
+                .filter(
+                    ~Q(likes_count=F("actual_likes"))
+                    | ~Q(replies_count=F("actual_replies"))
+                )
+                .only("pk", "likes_count", "replies_count")
+            )
+            for post in drifted:
+                post.likes_count = post.actual_likes
+                post.replies_count = post.actual_replies
+            if drifted:
+                Post.objects.bulk_update(drifted, ["likes_count", "replies_count"])
+                fixed += len(drifted)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Checked {checked} posts, fixed {fixed}.")
+        )
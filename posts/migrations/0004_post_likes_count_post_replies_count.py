@@ -0,0 +1,52 @@
+# Generated by Django 6.0.2 on 2026-02-14 12:00
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_counters(apps, schema_editor):
+    Post = apps.get_model("posts", "Post")
+    Like = apps.get_model("likes", "Like")
+
+    likes = (
+        Like.objects.filter(post=OuterRef("pk"))
+        .order_by()
+        .values("post")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    replies = (
+        Post.objects.filter(parent_post=OuterRef("pk"))
+        .order_by()
+        .values("parent_post")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+
+    Post.objects.update(
+        likes_count=Coalesce(Subquery(likes), Value(0)),
+        replies_count=Coalesce(Subquery(replies), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("likes", "0001_initial"),
+        ("posts", "0003_alter_post_parent_post"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="likes_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="replies_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 6.0.2 on 2026-02-17 19:05
+
+from django.db import migrations, models
+
+PATH_STEP = 10
+BATCH_SIZE = 500
+
+
+def populate_paths(apps, schema_editor):
+    Post = apps.get_model("posts", "Post")
+
+    # Walk the reply forest level by level: each level only needs the paths
+    # of the level above it.
+    level = {
+        post_id: f"{post_id:0{PATH_STEP}d}"
+        for post_id in Post.objects.filter(parent_post__isnull=True).values_list(
+            "id", flat=True
+        )
+    }
+    depth = 0
+    seen = set()
+    while level:
+        seen.update(level)
+        ids = list(level)
+        for start in range(0, len(ids), BATCH_SIZE):
+            batch = [
+                Post(id=post_id, path=level[post_id], depth=depth)
+                for post_id in ids[start : start + BATCH_SIZE]
+            ]
+            Post.objects.bulk_update(batch, ["path", "depth"])
+
+        next_level = {}
+        for start in range(0, len(ids), BATCH_SIZE):
+            children = Post.objects.filter(
+                parent_post_id__in=ids[start : start + BATCH_SIZE]
+            ).values_list("id", "parent_post_id")
+            for post_id, parent_id in children:
+                if post_id not in seen:
+                    next_level[post_id] = level[parent_id] + f"{post_id:0{PATH_STEP}d}"
+        level = next_level
+        depth += 1
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0005_timeline_timelineentry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="depth",
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="path",
+            field=models.CharField(blank=True, db_index=True, default="", editable=False, max_length=1024),
+        ),
+        migrations.RunPython(populate_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_post_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='trending_score',
+            field=models.FloatField(db_index=True, default=0.0, editable=False),
+        ),
+    ]
@@ -1,8 +1,15 @@
 from django.db import models
 from django.conf import settings
-from django.utils import timezone
-from django.db.models import Count, Q
-from django.db.models.functions import Length
+from django.core.exceptions import ValidationError
+
+# Width of one zero-padded id segment in Post.path.
+PATH_STEP = 10
+PATH_MAX_LENGTH = 1024
+# Deepest reply whose path still fits in Post.path (root posts are depth 0).
+# A reply to a post at this depth is refused; the limit also keeps paths well
+# under the size of a btree index entry on PostgreSQL.
+MAX_REPLY_DEPTH = PATH_MAX_LENGTH // PATH_STEP - 1
+
 
 class Post(models.Model):
     author = models.ForeignKey(
@@ -19,12 +26,21 @@ class Post(models.Model):
         blank=True,
         null=True,
     )
+    # Resized derivatives of ``image`` (see core.images).
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
 
     recommendation_score = models.FloatField(
         default=0.0,
         db_index=True
     )
 
+    # Windowed engagement, maintained by the trending app.
+    trending_score = models.FloatField(
+        default=0.0,
+        db_index=True,
+        editable=False,
+    )
+
     parent_post = models.ForeignKey(
         "self",
         null=True,
@@ -33,27 +49,129 @@ class Post(models.Model):
         related_name='replies'
     )
 
+    path = models.CharField(
+        max_length=PATH_MAX_LENGTH,
+        blank=True,
+        default="",
+        db_index=True,
+        editable=False,
+    )
+
+    depth = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+    )
+
+    version = models.PositiveIntegerField(
+        default=1,
+        editable=False,
+    )
+
+    likes_count = models.PositiveIntegerField(default=0)
+
+    replies_count = models.PositiveIntegerField(default=0)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.parent_post_id and not self.parent_post.accepts_replies:
+            raise ValidationError("Reply chain is too deep.")
+        super().save(*args, **kwargs)
+
+    def _save_table(self, raw=False, *args, **kwargs):
+        updated = super()._save_table(raw, *args, **kwargs)
+        # The path ends with our own id, so it can only be written once the
+        # INSERT has assigned one.  Doing it here, before save_base sends
+        # post_save, lets receivers see the path.
+        if not raw and not self.path:
+            self.assign_path()
+        return updated
+
+    @property
+    def accepts_replies(self):
+        return self.depth < MAX_REPLY_DEPTH
+
+    def assign_path(self):
+        """Materialize the reply path: the parent's path plus our own padded id.
+
+        Ordering by ``path`` lists a thread in pre-order, and a subtree is the
+        ``[path, path + ":")`` range, so it can be read with one index scan.
+        The id is only known after the INSERT, so this costs one UPDATE.
+        """
+        parent = self.parent_post
+        self.path = (parent.path if parent else "") + f"{self.pk:0{PATH_STEP}d}"
+        self.depth = parent.depth + 1 if parent else 0
+        Post.objects.filter(pk=self.pk).update(path=self.path, depth=self.depth)
+
+    def subtree_bounds(self):
+        return self.path, self.path + ":"
+
     def update_score(self):
-        likes_count = self.likes.count()
-        
-        stats = self.replies.annotate(
-            content_len=Length('content')
-        ).aggregate(
-            long_comments=Count('id', filter=Q(content_len__gt=20)),
-            short_comments=Count('id', filter=Q(content_len__lte=20))
-        )
-
-        current_score = (likes_count * 1.0) + \
-                        (stats['long_comments'] * 0.4) + \
-                        (stats['short_comments'] * 0.2)
-
-        hours_old = (timezone.now() - self.created_at).total_seconds() / 3600
-        time_penalty = hours_old * 0.2 
-        
-        self.recommendation_score = max(current_score - time_penalty, 0)
-        Post.objects.filter(pk=self.pk).update(recommendation_score=self.recommendation_score)
+        """Recompute this post's score from its loaded ``likes_count``."""
+        from .scoring import recompute_batch
+
+        recompute_batch([self])
 
     def __str__(self):
         return f"Post {self.id} by {self.author} (Score: {self.recommendation_score:.2f})"
+
+
+class Timeline(models.Model):
+    owner = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="timeline",
+    )
+
+    built_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Timeline of {self.owner}"
+
+
+class TimelineEntry(models.Model):
+    FRIEND = 0
+    FOLLOWING = 1
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="timeline_entries",
+    )
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="timeline_entries",
+    )
+
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+
+    bucket = models.PositiveSmallIntegerField(
+        choices=(
+            (FRIEND, "Friend"),
+            (FOLLOWING, "Following"),
+        ),
+    )
+
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ("owner", "post")
+        indexes = [
+            models.Index(
+                fields=["owner", "bucket", "-created_at"],
+                name="posts_timeline_feed_idx",
+            ),
+            models.Index(
+                fields=["owner", "author"],
+                name="posts_timeline_author_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Post {self.post_id} in timeline of {self.owner_id}"
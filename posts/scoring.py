@@ -0,0 +1,126 @@
+"""Recommendation score of a post.
+
+``score = likes * 1.0 + long_replies * 0.4 + short_replies * 0.2
+          - hours_old * 0.2``, clamped at zero.  ``Post.update_score`` applies
+it to one post; ``recompute_scores`` applies it to many posts with a few
+grouped queries per batch and writes the results back with ``bulk_update``.
+
+Likes and replies don't recompute inline: ``schedule_score_update`` marks
+the post dirty and a background worker recomputes every dirty post once
+per ``POST_SCORE_UPDATE_DELAY`` window, so a viral post costs one UPDATE
+per window instead of one per click.
+"""
+
+from django.conf import settings
+from django.db.models import Count, Q
+from django.db.models.functions import Length
+from django.utils import timezone
+
+from core.background import CoalescingQueue
+from . import feed_cache
+from .models import Post
+
+LIKE_WEIGHT = 1.0
+LONG_REPLY_WEIGHT = 0.4
+SHORT_REPLY_WEIGHT = 0.2
+LONG_REPLY_MIN_LENGTH = 20
+DECAY_PER_HOUR = 0.2
+
+DEFAULT_BATCH_SIZE = 2000
+
+
+def compute_score(likes, long_replies, short_replies, created_at, now=None):
+    now = now or timezone.now()
+    current_score = (likes * LIKE_WEIGHT) + \
+                    (long_replies * LONG_REPLY_WEIGHT) + \
+                    (short_replies * SHORT_REPLY_WEIGHT)
+
+    hours_old = (now - created_at).total_seconds() / 3600
+    time_penalty = hours_old * DECAY_PER_HOUR
+
+    return max(current_score - time_penalty, 0)
+
+
+def reply_stats(post_ids):
+    """Return ``{post_id: (long_replies, short_replies)}`` in one grouped query."""
+    rows = (
+        Post.objects.filter(parent_post_id__in=post_ids)
+        .annotate(content_len=Length("content"))
+        .order_by()
+        .values("parent_post_id")
+        .annotate(
+            long_comments=Count("id", filter=Q(content_len__gt=LONG_REPLY_MIN_LENGTH)),
+            short_comments=Count("id", filter=Q(content_len__lte=LONG_REPLY_MIN_LENGTH)),
+        )
+        .values_list("parent_post_id", "long_comments", "short_comments")
+    )
+    return {post_id: (long, short) for post_id, long, short in rows}
+
+
+def recompute_batch(posts, now=None):
+    """Recompute scores for ``posts`` (instances with ``likes_count`` and
+    ``created_at`` loaded) and save the ones that changed.
+
+    Returns the number of posts written.
+    """
+    now = now or timezone.now()
+    replies = reply_stats([post.pk for post in posts])
+
+    changed = []
+    for post in posts:
+        long_replies, short_replies = replies.get(post.pk, (0, 0))
+        score = compute_score(
+            post.likes_count, long_replies, short_replies, post.created_at, now
+        )
+        if abs(score - post.recommendation_score) > 1e-9:
+            post.recommendation_score = score
+            changed.append(post)
+
+    if changed:
+        Post.objects.bulk_update(changed, ["recommendation_score"])
+        feed_cache.scores_changed()
+    return len(changed)
+
+
+def iter_batches(queryset, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield lists of posts from ``queryset`` in primary-key order, by keyset."""
+    queryset = queryset.only(
+        "pk", "created_at", "likes_count", "recommendation_score"
+    ).order_by("pk")
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return
+        last_pk = batch[-1].pk
+        yield batch
+
+
+def recompute_scores(queryset=None, batch_size=DEFAULT_BATCH_SIZE, now=None):
+    """Recompute every post in ``queryset`` (all posts by default).
+
+    Returns ``(checked, updated)``.
+    """
+    if queryset is None:
+        queryset = Post.objects.all()
+    now = now or timezone.now()
+
+    checked = updated = 0
+    for batch in iter_batches(queryset, batch_size):
+        checked += len(batch)
+        updated += recompute_batch(batch, now)
+    return checked, updated
+
+
+def update_scores(post_ids):
+    recompute_scores(Post.objects.filter(pk__in=post_ids))
+
+
+score_updates = CoalescingQueue(
+    update_scores,
+    delay=lambda: getattr(settings, "POST_SCORE_UPDATE_DELAY", 2.0),
+)
+
+
+def schedule_score_update(post_id):
+    score_updates.add(post_id)
@@ -1,8 +1,64 @@
+from django.db.models import F
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from likes.models import Like
+from likes.signals import likes_changed
+from relationships.models import Follow
+from .models import Post
+from . import timeline
+from .scoring import schedule_score_update
 
 @receiver(post_save, sender=Like)
+def increment_likes_count(sender, instance, created, **kwargs):
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(likes_count=F("likes_count") + 1)
+        schedule_score_update(instance.post_id)
+
+
 @receiver(post_delete, sender=Like)
-def update_post_score_on_like(sender, instance, **kwargs):
-    instance.post.update_score()
\ No newline at end of file
+def decrement_likes_count(sender, instance, **kwargs):
+    Post.objects.filter(pk=instance.post_id, likes_count__gt=0).update(
+        likes_count=F("likes_count") - 1
+    )
+    schedule_score_update(instance.post_id)
+
+
+@receiver(likes_changed)
+def rescore_on_like_toggle(sender, post_id, **kwargs):
+    # likes.toggles has already moved likes_count.
+    schedule_score_update(post_id)
+
+
+@receiver(post_save, sender=Post)
+def increment_replies_count(sender, instance, created, **kwargs):
+    if created and instance.parent_post_id:
+        Post.objects.filter(pk=instance.parent_post_id).update(
+            replies_count=F("replies_count") + 1
+        )
+        schedule_score_update(instance.parent_post_id)
+
+
+@receiver(post_delete, sender=Post)
+def decrement_replies_count(sender, instance, **kwargs):
+    if instance.parent_post_id:
+        Post.objects.filter(pk=instance.parent_post_id, replies_count__gt=0).update(
+            replies_count=F("replies_count") - 1
+        )
+        schedule_score_update(instance.parent_post_id)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, **kwargs):
+    if created:
+        timeline.fan_out_post(instance)
+
+
+@receiver(post_save, sender=Follow)
+def update_timelines_on_follow(sender, instance, created, **kwargs):
+    if created:
+        timeline.follow_added(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def update_timelines_on_unfollow(sender, instance, **kwargs):
+    timeline.follow_removed(instance)
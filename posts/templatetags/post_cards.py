@@ -0,0 +1,68 @@
+from django import template
+from django.template.loader import render_to_string
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+from core import fragment_cache
+
+register = template.Library()
+
+
+def _profile_version(user):
+    # RelatedObjectDoesNotExist is an AttributeError, so a missing profile
+    # falls back to 0 as well.
+    return getattr(getattr(user, "profile", None), "version", 0)
+
+
+def card_key(post):
+    return (
+        post.pk,
+        post.version,
+        _profile_version(post.author),
+        post.likes_count,
+        post.replies_count,
+    )
+
+
+@register.simple_tag(takes_context=True)
+def post_card(context, post):
+    """Render ``posts/_post_card.html`` for ``post``.
+
+    The card is cached once for all viewers, keyed by the post and author
+    versions and the counters; the viewer's like/bookmark state, CSRF token
+    and edit links are substituted into the cached markup on every render.
+    """
+    html = fragment_cache.get_or_render(
+        "post_card",
+        card_key(post),
+        lambda: render_to_string("posts/_post_card.html", {"post": post}),
+    )
+
+    user = context.get("user")
+    is_owner = user is not None and user.is_authenticated and post.author_id == user.pk
+    liked = getattr(post, "is_liked", False)
+    bookmarked = getattr(post, "is_bookmarked", False)
+    csrf_token = context.get("csrf_token")
+
+    replacements = {
+        "<!--viewer:manage-->": (
+            render_to_string("posts/_post_card_manage.html", {"post": post})
+            if is_owner
+            else ""
+        ),
+        "<!--viewer:csrf-->": (
+            format_html(
+                '<input type="hidden" name="csrfmiddlewaretoken" value="{}">',
+                csrf_token,
+            )
+            if csrf_token
+            else ""
+        ),
+        "<!--viewer:liked-->": "active" if liked else "",
+        "<!--viewer:like-icon-->": "bxf" if liked else "bx",
+        "<!--viewer:bookmarked-->": "active" if bookmarked else "",
+        "<!--viewer:bookmark-icon-->": "bxf" if bookmarked else "bx",
+    }
+    for marker, value in replacements.items():
+        html = html.replace(marker, value)
+    return mark_safe(html)
@@ -1,3 +1,570 @@
-from django.test import TestCase
+import re
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.db.models.signals import post_save, pre_save
+from django.template.loader import render_to_string
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Profile
+from core import fragment_cache
+from core.background import CoalescingQueue
+from likes.models import Like
+from relationships.models import Follow
+from . import feed_cache
+from .models import MAX_REPLY_DEPTH, Post, TimelineEntry
+from .timeline import rebuild_timeline
+from .views import build_comment_tree, build_truncated_comment_tree, flatten_comment_tree
+
+
+class PostCounterTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="tester", password="pass12345"
+        )
+        self.post = Post.objects.create(author=self.user, content="Hello")
+
+    def test_like_toggle_updates_likes_count(self):
+        self.client.login(username="tester", password="pass12345")
+        like_url = reverse("likes:like_post", args=[self.post.id])
+
+        response = self.client.post(like_url, HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+        self.assertEqual(response.json()["likes_count"], 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+
+        response = self.client.post(like_url, HTTP_X_REQUESTED_WITH="XMLHttpRequest")
+        self.assertEqual(response.json()["likes_count"], 0)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+
+    def test_reply_create_and_delete_update_replies_count(self):
+        self.client.login(username="tester", password="pass12345")
+        self.client.post(
+            reverse("posts:post_detail", args=[self.post.id]),
+            {"content": "First reply"},
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.replies_count, 1)
+
+        Post.objects.get(parent_post=self.post).delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.replies_count, 0)
+
+    def test_edit_keeps_counters_moved_during_the_request(self):
+        def like_meanwhile(sender, instance, **kwargs):
+            # Lands after the view read the post, before it writes the edit.
+            Post.objects.filter(pk=instance.pk).update(likes_count=F("likes_count") + 1)
+
+        pre_save.connect(like_meanwhile, sender=Post)
+        self.addCleanup(pre_save.disconnect, like_meanwhile, sender=Post)
+        self.client.login(username="tester", password="pass12345")
+        self.client.post(
+            reverse("posts:post_update", args=[self.post.id]), {"content": "Edited"}
+        )
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.content, "Edited")
+        self.assertEqual(self.post.likes_count, 1)
+        self.assertEqual(self.post.version, 2)
+
+    def test_reconcile_command_fixes_drift(self):
+        Like.objects.create(user=self.user, post=self.post)
+        Post.objects.create(author=self.user, content="Reply", parent_post=self.post)
+        Post.objects.filter(pk=self.post.pk).update(likes_count=7, replies_count=0)
+
+        call_command("reconcile_post_counters", stdout=StringIO())
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+        self.assertEqual(self.post.replies_count, 1)
+
+
+class TimelineFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.viewer = User.objects.create_user(username="viewer", password="pass12345")
+        self.friend = User.objects.create_user(username="friend", password="pass12345")
+        self.followed = User.objects.create_user(username="followed", password="pass12345")
+        self.stranger = User.objects.create_user(username="stranger", password="pass12345")
+        for user in (self.viewer, self.friend, self.followed, self.stranger):
+            Profile.objects.create(user=user)
+
+        Follow.objects.create(user_from=self.viewer.profile, user_to=self.friend.profile)
+        Follow.objects.create(user_from=self.friend.profile, user_to=self.viewer.profile)
+        Follow.objects.create(user_from=self.viewer.profile, user_to=self.followed.profile)
+
+        for author in (self.stranger, self.followed, self.friend, self.viewer):
+            Post.objects.create(author=author, content=f"Post by {author.username}")
+
+        self.client.login(username="viewer", password="pass12345")
+
+    def feed_authors(self):
+        response = self.client.get(reverse("posts:home"))
+        return [post.author.username for post in response.context["posts"]]
+
+    def test_timeline_feed_matches_query_feed(self):
+        expected = self.feed_authors()
+        self.assertEqual(expected[:2], ["friend", "followed"])
+
+        call_command("build_timelines", stdout=StringIO())
+
+        self.assertEqual(self.feed_authors(), expected)
+
+    def test_fan_out_and_unfollow_keep_timeline_in_sync(self):
+        rebuild_timeline(self.viewer)
+        post = Post.objects.create(author=self.followed, content="Fresh")
+        self.assertTrue(
+            TimelineEntry.objects.filter(owner=self.viewer, post=post).exists()
+        )
+
+        self.client.post(
+            reverse("relationships:follow_toggle", args=["followed"])
+        )
+        self.assertFalse(
+            TimelineEntry.objects.filter(owner=self.viewer, author=self.followed).exists()
+        )
+        self.assertEqual(self.feed_authors()[:1], ["friend"])
+
+
+class FeedCursorPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.viewer = User.objects.create_user(username="viewer", password="pass12345")
+        self.author = User.objects.create_user(username="author", password="pass12345")
+        Profile.objects.create(user=self.viewer)
+        Profile.objects.create(user=self.author)
+        Follow.objects.create(user_from=self.viewer.profile, user_to=self.author.profile)
+
+        for index in range(13):
+            Post.objects.create(author=self.author, content=f"Followed {index}")
+            Post.objects.create(author=self.viewer, content=f"Own {index}")
+        Post.objects.filter(author=self.viewer).update(recommendation_score=1.5)
+
+    def walk_feed(self):
+        ids = []
+        cursor = None
+        with CaptureQueriesContext(connection) as queries:
+            while True:
+                params = {"cursor": cursor} if cursor else {}
+                page = self.client.get(reverse("posts:home"), params).context["page_obj"]
+                ids.extend(post.id for post in page)
+                if not page.has_next():
+                    break
+                cursor = page.next_cursor
+        self.assertFalse(
+            any("COUNT(" in query["sql"].upper() for query in queries.captured_queries)
+        )
+        return ids
+
+    def test_anonymous_feed_walks_every_post_once(self):
+        expected = list(
+            Post.objects.order_by("-recommendation_score", "-created_at", "-id")
+            .values_list("id", flat=True)
+        )
+        self.assertEqual(self.walk_feed(), expected)
+
+    def test_timeline_feed_walks_timeline_then_discovery(self):
+        self.client.login(username="viewer", password="pass12345")
+        query_ids = self.walk_feed()
+
+        rebuild_timeline(self.viewer)
+        timeline_ids = self.walk_feed()
+
+        self.assertEqual(timeline_ids, query_ids)
+        self.assertEqual(len(set(timeline_ids)), Post.objects.count())
+        self.assertEqual(
+            set(timeline_ids[:13]),
+            set(Post.objects.filter(author=self.author).values_list("id", flat=True)),
+        )
+
+
+class AnonymousFeedCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = get_user_model().objects.create_user(
+            username="author", password="pass12345"
+        )
+        Profile.objects.create(user=self.author)
+        self.post = Post.objects.create(author=self.author, content="Cached page")
+
+    def feed_stats(self):
+        return fragment_cache.stats([feed_cache.PAGE_NAME])[feed_cache.PAGE_NAME]
+
+    def test_repeat_visits_are_served_from_the_cache(self):
+        self.assertContains(self.client.get(reverse("posts:home")), "Cached page")
+
+        other = Client()
+        with self.assertNumQueries(0):
+            response = other.get(reverse("posts:home"))
+        self.assertContains(response, "Cached page")
+        token = re.search(r'name="csrfmiddlewaretoken" value="(\w+)"', response.content.decode())
+        self.assertIsNotNone(token)
+        self.assertIn("csrftoken", response.cookies)
+        self.assertEqual(self.feed_stats(), (1, 1))
+
+        # Other query parameters are never cached.
+        self.client.get(reverse("posts:home"), {"utm": "x"})
+        self.assertEqual(self.feed_stats(), (1, 1))
+
+    def test_score_recompute_invalidates_only_a_reordered_first_page(self):
+        rising = Post.objects.create(author=self.author, content="Rising")
+        Post.objects.filter(pk=self.post.pk).update(likes_count=4)
+        call_command("recompute_scores", stdout=StringIO())
+        self.client.get(reverse("posts:home"))
+
+        # New scores, same order: the cached page stays.
+        Post.objects.filter(pk=self.post.pk).update(likes_count=5)
+        call_command("recompute_scores", stdout=StringIO())
+        self.client.get(reverse("posts:home"))
+        self.assertEqual(self.feed_stats(), (1, 1))
+
+        Post.objects.filter(pk=rising.pk).update(likes_count=9)
+        call_command("recompute_scores", stdout=StringIO())
+        self.assertContains(self.client.get(reverse("posts:home")), "Rising")
+        self.assertEqual(self.feed_stats(), (1, 2))
+
+    def test_unsigned_cursors_share_the_first_page(self):
+        self.client.get(reverse("posts:home"))
+        for cursor in ("junk", "more-junk"):
+            self.client.get(reverse("posts:home"), {"cursor": cursor})
+        self.assertEqual(self.feed_stats(), (2, 1))
+
+    def test_stale_page_is_served_while_another_request_renders(self):
+        self.client.get(reverse("posts:home"))
+        feed_cache.invalidate()
+        key = fragment_cache.make_key(f"page:{feed_cache.PAGE_NAME}", ("",))
+        cache.add(f"{key}:lock", 1)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("posts:home"))
+        self.assertContains(response, "Cached page")
+        self.assertEqual(self.feed_stats(), (1, 1))
+
+
+class FeedAPITests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.author = User.objects.create_user(username="author", password="pass12345")
+        self.reader = User.objects.create_user(username="reader", password="pass12345")
+        Profile.objects.create(user=self.author)
+        Profile.objects.create(user=self.reader)
+        for index in range(12):
+            Post.objects.create(author=self.author, content=f"Post {index}")
+        self.client.login(username="reader", password="pass12345")
+
+    def test_pages_follow_the_cursor(self):
+        first = self.client.get(reverse("posts:feed_api")).json()
+        self.assertEqual(len(first["posts"]), 10)
+        self.assertEqual(
+            set(first["posts"][0]),
+            {
+                "id", "url", "author", "content", "image", "created_at", "likes_count",
+                "replies_count", "is_liked", "is_bookmarked", "is_own",
+            },
+        )
+
+        second = self.client.get(
+            reverse("posts:feed_api"), {"cursor": first["next_cursor"]}
+        ).json()
+        self.assertIsNone(second["next_cursor"])
+        ids = [post["id"] for post in first["posts"] + second["posts"]]
+        self.assertEqual(sorted(ids), sorted(Post.objects.values_list("id", flat=True)))
+
+    def test_unchanged_page_returns_not_modified(self):
+        response = self.client.get(reverse("posts:feed_api"))
+        etag = response["ETag"]
+
+        response = self.client.get(reverse("posts:feed_api"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+        post = Post.objects.order_by("-id").first()
+        Like.objects.create(user=self.reader, post=post)
+        response = self.client.get(reverse("posts:feed_api"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        payload = next(item for item in response.json()["posts"] if item["id"] == post.pk)
+        self.assertEqual((payload["likes_count"], payload["is_liked"]), (1, True))
+
+
+class RecomputeScoresTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="tester", password="pass12345"
+        )
+
+    def test_command_applies_decay_and_engagement(self):
+        stale = Post.objects.create(author=self.user, content="Old")
+        fresh = Post.objects.create(author=self.user, content="New")
+        Post.objects.create(author=self.user, content="x" * 30, parent_post=fresh)
+        Post.objects.filter(pk=stale.pk).update(
+            created_at=timezone.now() - timedelta(hours=10),
+            recommendation_score=5.0,
+            likes_count=2,
+        )
+        Post.objects.filter(pk=fresh.pk).update(likes_count=3)
+
+        call_command("recompute_scores", batch_size=1, stdout=StringIO())
+
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertAlmostEqual(stale.recommendation_score, 0.0, places=3)
+        self.assertAlmostEqual(fresh.recommendation_score, 3.4, places=2)
+
+    def test_update_score_uses_likes_count(self):
+        post = Post.objects.create(author=self.user, content="Counted")
+        Post.objects.filter(pk=post.pk).update(likes_count=4)
+        post.refresh_from_db()
+
+        # Reply stats, the UPDATE and the feed's first page; no likes COUNT.
+        with self.assertNumQueries(3):
+            post.update_score()
+
+        post.refresh_from_db()
+        self.assertAlmostEqual(post.recommendation_score, 4.0, places=2)
+
+    def test_since_skips_posts_clamped_at_zero(self):
+        old = Post.objects.create(author=self.user, content="Old")
+        Post.objects.filter(pk=old.pk).update(
+            created_at=timezone.now() - timedelta(days=3), likes_count=1
+        )
+
+        out = StringIO()
+        call_command("recompute_scores", since="1h", stdout=out)
+        self.assertIn("Checked 0 posts", out.getvalue())
+
+
+class ScoreUpdateQueueTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="tester", password="pass12345"
+        )
+        self.post = Post.objects.create(author=self.user, content="Hello")
+
+    def test_like_updates_score_inline_in_tests(self):
+        Like.objects.create(user=self.user, post=self.post)
+        self.post.refresh_from_db()
+        self.assertAlmostEqual(self.post.recommendation_score, 1.0, places=2)
+
+    @override_settings(BACKGROUND_TASKS_ASYNC=True, POST_SCORE_UPDATE_DELAY=60)
+    def test_async_updates_are_coalesced_per_post(self):
+        handled = []
+        queue = CoalescingQueue(handled.append, delay=60)
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(5):
+                queue.add(self.post.pk)
+        self.assertEqual(len(queue), 1)
+
+        queue.flush()
+        self.assertEqual(handled, [{self.post.pk}])
+        self.assertEqual(len(queue), 0)
+
+
+class CommentTreeTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="tester", password="pass12345"
+        )
+        self.post = Post.objects.create(author=self.user, content="Root")
+
+    def test_reply_paths_are_materialized_on_insert(self):
+        reply = Post.objects.create(author=self.user, content="A", parent_post=self.post)
+        nested = Post.objects.create(author=self.user, content="B", parent_post=reply)
+        nested.refresh_from_db()
+
+        self.assertEqual(nested.depth, 2)
+        self.assertEqual(nested.path, self.post.path + reply.path[-10:] + nested.path[-10:])
+        self.assertTrue(nested.path.startswith(reply.path))
+
+    def test_post_save_receivers_see_the_path(self):
+        seen = []
+
+        def remember_path(sender, instance, created, **kwargs):
+            if created:
+                seen.append((instance.path, instance.depth))
+
+        post_save.connect(remember_path, sender=Post)
+        self.addCleanup(post_save.disconnect, remember_path, sender=Post)
+        reply = Post.objects.create(author=self.user, content="A", parent_post=self.post)
+
+        self.assertEqual(seen, [(self.post.path + f"{reply.pk:010d}", 1)])
+
+    def test_replies_stop_at_max_depth(self):
+        Post.objects.filter(pk=self.post.pk).update(depth=MAX_REPLY_DEPTH)
+        self.post.refresh_from_db()
+
+        with self.assertRaises(ValidationError):
+            Post.objects.create(author=self.user, content="Too deep", parent_post=self.post)
+
+        self.client.login(username="tester", password="pass12345")
+        response = self.client.post(
+            reverse("posts:post_detail", args=[self.post.id]), {"content": "Too deep"}
+        )
+        self.assertContains(response, "Ця гілка занадто глибока")
+        self.assertFalse(Post.objects.filter(parent_post=self.post).exists())
+
+    def test_deep_thread_is_built_with_one_query(self):
+        top = Post.objects.create(author=self.user, content="Top", parent_post=self.post)
+        sibling = Post.objects.create(author=self.user, content="Sibling", parent_post=self.post)
+        parent = top
+        for index in range(30):
+            parent = Post.objects.create(
+                author=self.user, content=f"Level {index}", parent_post=parent
+            )
+        Post.objects.create(author=self.user, content="Leaf", parent_post=sibling)
+
+        with self.assertNumQueries(1):
+            tree = build_comment_tree([top, sibling])
+
+        depth = 0
+        node = tree[0]
+        while node["children"]:
+            node = node["children"][0]
+            depth += 1
+        self.assertEqual(depth, 30)
+        self.assertEqual(node["comment"].id, parent.id)
+        self.assertEqual([child["comment"].content for child in tree[1]["children"]], ["Leaf"])
+
+
+@override_settings(COMMENT_TREE_MAX_DEPTH=2, COMMENT_TREE_MAX_CHILDREN=2)
+class TruncatedCommentTreeTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="tester", password="pass12345"
+        )
+        self.post = Post.objects.create(author=self.user, content="Root")
+        self.top = Post.objects.create(author=self.user, content="Top", parent_post=self.post)
+        self.replies = [
+            Post.objects.create(author=self.user, content=f"Reply {index}", parent_post=self.top)
+            for index in range(5)
+        ]
+        parent = self.replies[0]
+        for index in range(3):
+            parent = Post.objects.create(
+                author=self.user, content=f"Deep {index}", parent_post=parent
+            )
+        self.top.refresh_from_db()
+
+    def test_tree_is_cut_at_depth_and_breadth(self):
+        tree = build_truncated_comment_tree([self.top])
+        top = tree[0]
+
+        self.assertEqual(len(top["children"]), 2)
+        self.assertEqual(top["more"], 3)
+        self.assertEqual(top["more_after"], self.replies[1].id)
+
+        level_two = top["children"][0]["children"][0]
+        self.assertEqual(level_two["children"], [])
+        self.assertEqual(level_two["more"], 1)
+
+    def test_breadth_cap_without_depth_cap_loads_every_level(self):
+        tree = build_comment_tree([self.top], max_children=2)
+        node = tree[0]["children"][0]
+        depth = 1
+        while node["children"]:
+            node = node["children"][0]
+            depth += 1
+        self.assertEqual(depth, 4)
+        self.assertEqual(tree[0]["more"], 3)
+
+    def test_replies_endpoint_streams_next_slice(self):
+        url = reverse("posts:comment_replies", args=[self.top.id])
+        response = self.client.get(
+            url,
+            {"after": self.replies[1].id},
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+        )
+        data = response.json()
+
+        self.assertEqual(data["remaining"], 1)
+        self.assertEqual(data["after"], self.replies[3].id)
+        self.assertIn("Reply 2", data["html"])
+        self.assertIn("Reply 3", data["html"])
+        self.assertNotIn("Reply 4", data["html"])
+        self.assertIn(f"?after={self.replies[3].id}", data["html"])
+
+    def test_replies_endpoint_rejects_bad_after(self):
+        url = reverse("posts:comment_replies", args=[self.top.id])
+        self.assertEqual(self.client.get(url, {"after": "abc"}).status_code, 404)
+
+    def test_post_detail_renders_more_links(self):
+        response = self.client.get(reverse("posts:post_detail", args=[self.post.id]))
+        self.assertContains(response, "Ще відповідей: 3")
+        self.assertContains(
+            response,
+            reverse("posts:comment_replies", args=[self.top.id]) + f"?after={self.replies[1].id}",
+        )
+
+    def test_flattened_render_produces_balanced_markup(self):
+        tree = build_truncated_comment_tree([self.top])
+        html = render_to_string(
+            "posts/_comment_tree.html",
+            {"comment_items": flatten_comment_tree(tree), "parent": None},
+        )
+
+        self.assertEqual(html.count("<ul"), html.count("</ul>"))
+        self.assertEqual(html.count("<li"), html.count("</li>"))
+        self.assertEqual(html.count('class="comment-card"'), 4)
+
+
+class PostCardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.author = User.objects.create_user(username="author", password="pass12345")
+        self.reader = User.objects.create_user(username="reader", password="pass12345")
+        Profile.objects.create(user=self.author)
+        Profile.objects.create(user=self.reader)
+        self.post = Post.objects.create(author=self.author, content="Cached card")
+        Like.objects.create(user=self.reader, post=self.post)
+
+    def card_stats(self):
+        return fragment_cache.stats(["post_card"])["post_card"]
+
+    def test_card_is_shared_between_viewers(self):
+        self.client.login(username="reader", password="pass12345")
+        response = self.client.get(reverse("posts:home"))
+        self.assertContains(response, "bxf bx-heart")
+        self.assertNotContains(response, "post-card__manage")
+        self.assertNotContains(response, "<!--viewer:")
+
+        self.client.login(username="author", password="pass12345")
+        response = self.client.get(reverse("posts:home"))
+        self.assertContains(response, "'bx bx-heart")
+        self.assertContains(response, "post-card__manage")
+        self.assertNotContains(response, "<!--viewer:")
+
+        self.assertEqual(self.card_stats(), (1, 1))
+
+    def test_edits_and_counters_invalidate_card(self):
+        self.client.get(reverse("posts:home"))
+
+        self.client.login(username="author", password="pass12345")
+        self.client.post(
+            reverse("posts:post_update", args=[self.post.pk]),
+            {"content": "Edited card"},
+        )
+        self.assertContains(self.client.get(reverse("posts:home")), "Edited card")
+
+        self.client.post(
+            reverse("accounts:profile_edit"),
+            {"username": "renamed", "bio": ""},
+        )
+        self.assertContains(self.client.get(reverse("posts:home")), "renamed")
+
+        Like.objects.create(user=self.author, post=self.post)
+        response = self.client.get(reverse("posts:home"))
+        self.assertContains(response, "<span>2</span>")
+        self.assertEqual(self.card_stats(), (0, 4))
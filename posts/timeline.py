@@ -0,0 +1,264 @@
+"""Materialized home timelines (fan-out on write).
+
+Every user with a ``Timeline`` row gets one ``TimelineEntry`` per post
+written by someone they follow, tagged with the feed bucket (friend or
+plain following).  Entries are written when a post is created and when a
+follow is added or removed, so reading the followed part of the feed is
+an index range scan over ``(owner, bucket, -created_at)``.
+
+Users without a ``Timeline`` row keep using the query-time feed in
+``FeedView``; ``build_timelines`` backfills them.
+"""
+
+from django.conf import settings
+from django.db import transaction
+
+from core.pagination import keyset_filter
+from relationships import graph
+from relationships.models import Follow
+from .models import Post, Timeline, TimelineEntry
+
+BATCH_SIZE = 1000
+
+
+def discovery_score_field():
+    """Post field ordering the feed's non-followed bucket (``FEED_DISCOVERY_ORDER``)."""
+    if getattr(settings, "FEED_DISCOVERY_ORDER", "recommendation") == "trending":
+        return "trending_score"
+    return "recommendation_score"
+
+
+def has_timeline(user):
+    return Timeline.objects.filter(owner=user).exists()
+
+
+def _following_user_ids(user_id):
+    return set(
+        Follow.objects.filter(user_from__user_id=user_id).values_list(
+            "user_to__user_id", flat=True
+        )
+    )
+
+
+def _follower_user_ids(user_id):
+    return set(
+        Follow.objects.filter(user_to__user_id=user_id).values_list(
+            "user_from__user_id", flat=True
+        )
+    )
+
+
+def _insert_entries(owner_id, posts, bucket):
+    batch = []
+    for post_id, author_id, created_at in posts:
+        batch.append(
+            TimelineEntry(
+                owner_id=owner_id,
+                post_id=post_id,
+                author_id=author_id,
+                bucket=bucket,
+                created_at=created_at,
+            )
+        )
+        if len(batch) >= BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def _posts_by(author_ids):
+    return (
+        Post.objects.filter(author_id__in=author_ids)
+        .order_by()
+        .values_list("id", "author_id", "created_at")
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+
+
+@transaction.atomic
+def rebuild_timeline(user):
+    """Rebuild ``user``'s timeline from scratch and mark it as built."""
+    TimelineEntry.objects.filter(owner=user).delete()
+
+    following_ids = _following_user_ids(user.pk)
+    follower_ids = _follower_user_ids(user.pk)
+    friend_ids = following_ids & follower_ids
+
+    _insert_entries(user.pk, _posts_by(friend_ids), TimelineEntry.FRIEND)
+    _insert_entries(
+        user.pk, _posts_by(following_ids - friend_ids), TimelineEntry.FOLLOWING
+    )
+
+    Timeline.objects.update_or_create(owner=user)
+
+
+def fan_out_post(post):
+    """Push a freshly created post into the timelines of its author's followers."""
+    follower_ids = set(
+        Follow.objects.filter(
+            user_to__user_id=post.author_id,
+            user_from__user__timeline__isnull=False,
+        ).values_list("user_from__user_id", flat=True)
+    )
+    if not follower_ids:
+        return
+
+    followed_back = set(
+        Follow.objects.filter(
+            user_from__user_id=post.author_id,
+            user_to__user_id__in=follower_ids,
+        ).values_list("user_to__user_id", flat=True)
+    )
+
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(
+                owner_id=owner_id,
+                post_id=post.pk,
+                author_id=post.author_id,
+                bucket=(
+                    TimelineEntry.FRIEND
+                    if owner_id in followed_back
+                    else TimelineEntry.FOLLOWING
+                ),
+                created_at=post.created_at,
+            )
+            for owner_id in follower_ids
+        ],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def follow_added(follow):
+    """Backfill the follower's timeline and promote both sides to friends if mutual."""
+    owner_id = follow.user_from.user_id
+    author_id = follow.user_to.user_id
+    is_mutual = Follow.objects.filter(
+        user_from=follow.user_to, user_to=follow.user_from
+    ).exists()
+
+    if Timeline.objects.filter(owner_id=owner_id).exists():
+        bucket = TimelineEntry.FRIEND if is_mutual else TimelineEntry.FOLLOWING
+        _insert_entries(owner_id, _posts_by([author_id]), bucket)
+
+    if is_mutual:
+        TimelineEntry.objects.filter(owner_id=author_id, author_id=owner_id).update(
+            bucket=TimelineEntry.FRIEND
+        )
+
+
+def follow_removed(follow):
+    """Drop the unfollowed author's posts and demote the other side from friends."""
+    owner_id = follow.user_from.user_id
+    author_id = follow.user_to.user_id
+
+    TimelineEntry.objects.filter(owner_id=owner_id, author_id=author_id).delete()
+    TimelineEntry.objects.filter(owner_id=author_id, author_id=owner_id).update(
+        bucket=TimelineEntry.FOLLOWING
+    )
+
+
+class TimelineFeed:
+    """Sliceable home feed backed by the viewer's materialized timeline.
+
+    The followed part (friends first, then following, newest first) is read
+    from ``TimelineEntry``; the rest of the site follows, ordered by
+    ``recommendation_score``.  This is the same order FeedView builds with
+    ``Case``/``When`` over the whole ``Post`` table, and it works with both
+    Django's ``Paginator`` and ``core.pagination.CursorPaginator``.
+    """
+
+    model = Post
+    DISCOVERY_BUCKET = 2
+
+    def __init__(self, user, queryset, cursor=None):
+        self.user = user
+        self.queryset = queryset
+        self.cursor = cursor
+        self._timeline_count = None
+
+    def after(self, values):
+        """Feed continuing after the ``(feed_bucket, feed_secondary, created_at, id)`` key."""
+        return TimelineFeed(self.user, self.queryset, cursor=tuple(values))
+
+    def entries(self):
+        entries = TimelineEntry.objects.filter(owner=self.user)
+        if self.cursor:
+            bucket, _, created_at, post_id = self.cursor
+            if bucket >= self.DISCOVERY_BUCKET:
+                return entries.none()
+            entries = entries.filter(
+                keyset_filter(
+                    ("bucket", "-created_at", "-post_id"),
+                    (bucket, created_at, post_id),
+                )
+            )
+        return entries.order_by("bucket", "-created_at", "-post_id")
+
+    def discovery(self):
+        queryset = self.queryset.exclude(
+            author_id__in=graph.following_ids(self.user.pk)
+        )
+        ordering = (f"-{discovery_score_field()}", "-created_at", "-id")
+        if self.cursor and self.cursor[0] >= self.DISCOVERY_BUCKET:
+            _, score, created_at, post_id = self.cursor
+            queryset = queryset.filter(
+                keyset_filter(ordering, (score, created_at, post_id))
+            )
+        return queryset.order_by(*ordering)
+
+    @property
+    def timeline_count(self):
+        if self._timeline_count is None:
+            self._timeline_count = self.entries().count()
+        return self._timeline_count
+
+    def count(self):
+        return self.timeline_count + self.discovery().count()
+
+    def _timeline_posts(self, rows):
+        posts = self.queryset.in_bulk([post_id for post_id, _ in rows])
+        result = []
+        for post_id, bucket in rows:
+            post = posts.get(post_id)
+            if post is None:
+                continue
+            post.feed_bucket = bucket
+            post.feed_secondary = 0.0
+            result.append(post)
+        return result
+
+    def _discovery_posts(self, start, stop):
+        result = list(self.discovery()[start:stop])
+        for post in result:
+            post.feed_bucket = self.DISCOVERY_BUCKET
+            post.feed_secondary = getattr(post, discovery_score_field())
+        return result
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index : index + 1][0]
+
+        start = index.start or 0
+        stop = index.stop if index.stop is not None else self.count()
+        entries = self.entries().values_list("post_id", "bucket")
+
+        if start == 0:
+            # The common (cursor) case: no need to know where the timeline ends.
+            rows = list(entries[:stop])
+            result = self._timeline_posts(rows)
+            if len(rows) < stop:
+                result.extend(self._discovery_posts(0, stop - len(rows)))
+            return result
+
+        split = self.timeline_count
+        result = []
+        if start < split:
+            result.extend(self._timeline_posts(list(entries[start : min(stop, split)])))
+        if stop > split:
+            result.extend(
+                self._discovery_posts(max(start - split, 0), stop - split)
+            )
+        return result
@@ -1,17 +1,13 @@
 from django.urls import path
-from .views import FeedView, PostUpdateView, PostDeleteView, post_detail
-from django.conf import settings
-from django.conf.urls.static import static
+from .views import FeedAPIView, FeedView, PostUpdateView, PostDeleteView, post_detail, comment_replies
 
 app_name = "posts"
 
 urlpatterns = [
     path("", FeedView.as_view(), name="home"),
+    path("api/feed/", FeedAPIView.as_view(), name="feed_api"),
     path("post/<int:pk>/", post_detail, name="post_detail"),
+    path("post/<int:pk>/replies/", comment_replies, name="comment_replies"),
     path("post/<int:pk>/edit/", PostUpdateView.as_view(), name="post_update"),
     path("post/<int:pk>/delete/", PostDeleteView.as_view(), name="post_delete"),
 ]
-
-
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
@@ -1,3 +1,6 @@
+from functools import partial
+from itertools import count
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.generic import ListView
 from django.core.paginator import Paginator
@@ -5,65 +8,175 @@ from django.urls import reverse_lazy
 from .models import Post
 from likes.models import Like
 from bookmarks.models import Bookmark
-from django.db.models import Case, Exists, OuterRef, Value, When, IntegerField, F
+from django.db.models import Case, Exists, OuterRef, Q, Value, When, IntegerField, F, Window
+from django.db.models.functions import RowNumber
+from django.http import Http404, HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.template.loader import render_to_string
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.views.generic import UpdateView, DeleteView
 from .forms import PostForm
 from django.conf import settings
 from accounts.models import Profile
+from core.pagination import CursorPaginationMixin
+from relationships import graph
+from . import api, feed_cache
+from .timeline import TimelineFeed, discovery_score_field, has_timeline
 
 
-def build_comment_tree(root_comments):
-    if not root_comments:
-        return []
+def _ranked_replies(parent_ids, max_children):
+    """Up to ``max_children`` oldest replies of every parent in ``parent_ids``."""
+    return (
+        Post.objects.filter(parent_post_id__in=parent_ids)
+        .annotate(
+            sibling_rank=Window(
+                RowNumber(),
+                partition_by=F("parent_post_id"),
+                order_by=F("path").asc(),
+            )
+        )
+        .filter(sibling_rank__lte=max_children)
+        .select_related("author", "author__profile")
+    )
 
-    children_by_parent = {}
-    pending_parent_ids = [comment.id for comment in root_comments]
-    seen_ids = set(pending_parent_ids)
 
-    while pending_parent_ids:
-        batch = list(
-            Post.objects.filter(parent_post_id__in=pending_parent_ids)
+def _descendants(root_comments, max_depth, max_children):
+    if max_children is None:
+        subtrees = Q()
+        for comment in root_comments:
+            lower, upper = comment.subtree_bounds()
+            subtree = Q(path__gt=lower, path__lt=upper)
+            if max_depth is not None:
+                subtree &= Q(depth__lte=comment.depth + max_depth)
+            subtrees |= subtree
+        return (
+            Post.objects.filter(subtrees)
             .select_related("author", "author__profile")
-            .order_by("created_at")
+            .order_by("path")
         )
 
-        if not batch:
+    # With a breadth cap, go level by level so only the replies of nodes that
+    # are actually shown get fetched: one bounded query per level, at most
+    # max_depth of them (without it, until a level comes back empty).
+    descendants = []
+    parent_ids = [comment.id for comment in root_comments]
+    for _ in range(max_depth) if max_depth is not None else count():
+        level = list(_ranked_replies(parent_ids, max_children))
+        if not level:
             break
+        descendants.extend(level)
+        parent_ids = [comment.id for comment in level]
+    descendants.sort(key=lambda comment: comment.path)
+    return descendants
+
+
+def build_comment_tree(root_comments, max_depth=None, max_children=None):
+    """Assemble reply trees under ``root_comments``.
+
+    ``max_depth`` limits how many reply levels are loaded below each root and
+    ``max_children`` how many replies are loaded per node.  Each node gets
+    ``more`` (replies not loaded) and ``more_after`` (the last loaded child,
+    where ``comment_replies`` should continue from).
+    """
+    if not root_comments:
+        return []
+
+    nodes = {comment.id: _node(comment) for comment in root_comments}
+    # Ordered by path, every reply comes after its parent (pre-order), so
+    # one pass is enough to assemble the whole forest.
+    for comment in _descendants(root_comments, max_depth, max_children):
+        parent = nodes.get(comment.parent_post_id)
+        if parent is None:
+            continue
+        node = _node(comment)
+        nodes[comment.id] = node
+        parent["children"].append(node)
 
-        pending_parent_ids = []
-        for comment in batch:
-            if comment.id in seen_ids:
-                continue
-            seen_ids.add(comment.id)
-            children_by_parent.setdefault(comment.parent_post_id, []).append(comment)
-            pending_parent_ids.append(comment.id)
+    for node in nodes.values():
+        children = node["children"]
+        node["more"] = max(node["comment"].replies_count - len(children), 0)
+        node["more_after"] = children[-1]["comment"].id if children else None
 
-    def build(comment):
-        return {
-            "comment": comment,
-            "children": [build(child) for child in children_by_parent.get(comment.id, [])],
-        }
+    return [nodes[comment.id] for comment in root_comments]
 
-    return [build(comment) for comment in root_comments]
 
-class FeedView(ListView):
+def _node(comment):
+    return {"comment": comment, "children": [], "more": 0, "more_after": None}
+
+
+def flatten_comment_tree(comment_tree):
+    """Turn a comment tree into a pre-order list for single-loop rendering.
+
+    Every item is ``{"comment", "node", "opens", "closes"}``: ``opens`` means
+    the item's replies follow (the template opens a nested list and leaves
+    the item open), and ``closes`` lists the ancestors whose nested lists
+    end right after this item, innermost first.
+    """
+    items = []
+    stack = [[comment_tree, 0, None]]
+    while stack:
+        frame = stack[-1]
+        nodes, index, parent = frame
+        if index >= len(nodes):
+            stack.pop()
+            if parent is not None:
+                items[-1]["closes"].append(parent)
+            continue
+
+        frame[1] += 1
+        node = nodes[index]
+        items.append(
+            {
+                "comment": node["comment"],
+                "node": node,
+                "opens": bool(node["children"]),
+                "closes": [],
+            }
+        )
+        if node["children"]:
+            stack.append([node["children"], 0, node])
+    return items
+
+
+def build_truncated_comment_tree(root_comments):
+    return build_comment_tree(
+        root_comments,
+        max_depth=settings.COMMENT_TREE_MAX_DEPTH,
+        max_children=settings.COMMENT_TREE_MAX_CHILDREN,
+    )
+
+class FeedView(CursorPaginationMixin, ListView):
     model = Post
     template_name = "posts/feed.html"
     context_object_name = "posts"
-    paginate_by = 10
+    paginate_by = feed_cache.PAGE_SIZE
+
+    def get_cursor_ordering(self):
+        if self.request.user.is_authenticated:
+            return ('feed_bucket', '-feed_secondary', '-created_at', '-id')
+        return feed_cache.ORDERING
+
+    def get(self, request, *args, **kwargs):
+        # Anonymous pages are the same for everyone; any query parameter
+        # besides the cursor would end up in the page's links, so skip those.
+        if (
+            request.user.is_authenticated
+            or not feed_cache.cache_timeout()
+            or set(request.GET) - {self.cursor_kwarg}
+        ):
+            return super().get(request, *args, **kwargs)
+        return feed_cache.cached_feed_page(
+            request,
+            request.GET.get(self.cursor_kwarg),
+            partial(super().get, request, *args, **kwargs),
+        )
 
     def get_queryset(self):
         queryset = Post.objects.all()
         queryset = queryset.select_related("author", "author__profile")
 
         if self.request.user.is_authenticated:
-            profile, _ = Profile.objects.get_or_create(user=self.request.user)
-            friends_profiles = profile.following.filter(followers=profile)
-            following_profiles = profile.following.exclude(pk__in=friends_profiles)
-
-            friend_user_ids = friends_profiles.values_list("user_id", flat=True)
-            following_user_ids = following_profiles.values_list("user_id", flat=True)
+            Profile.objects.get_or_create(user=self.request.user)
 
             queryset = queryset.annotate(
                 is_liked=Exists(
@@ -75,6 +188,17 @@ class FeedView(ListView):
                         post=OuterRef('pk')
                     )
                 ),
+            )
+
+            if has_timeline(self.request.user):
+                return TimelineFeed(self.request.user, queryset)
+
+            friend_user_ids = graph.friend_ids(self.request.user.pk)
+            following_user_ids = (
+                graph.following_ids(self.request.user.pk) - friend_user_ids
+            )
+
+            queryset = queryset.annotate(
                 feed_bucket=Case(
                     When(author_id__in=friend_user_ids, then=Value(0)),
                     When(author_id__in=following_user_ids, then=Value(1)),
@@ -84,13 +208,13 @@ class FeedView(ListView):
                 feed_secondary=Case(
                     When(author_id__in=friend_user_ids, then=Value(0.0)),
                     When(author_id__in=following_user_ids, then=Value(0.0)),
-                    default=F("recommendation_score"),
+                    default=F(discovery_score_field()),
                 ),
             )
 
-            return queryset.order_by('feed_bucket', '-feed_secondary', '-created_at')
+            return queryset.order_by(*self.get_cursor_ordering())
 
-        return queryset.order_by('-recommendation_score', '-created_at')
+        return queryset.order_by(*self.get_cursor_ordering())
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -113,6 +237,30 @@ class FeedView(ListView):
         context['form'] = form
         return self.render_to_response(context)
     
+class FeedAPIView(FeedView):
+    """``FeedView``'s posts and cursor as compact JSON, for infinite scroll."""
+
+    http_method_names = ["get", "head", "options"]
+
+    def get(self, request, *args, **kwargs):
+        self.object_list = self.get_queryset()
+        _, page, posts, _ = self.paginate_queryset(self.object_list, self.paginate_by)
+        posts = list(posts)
+        etag = api.page_etag(request.user, posts, page.next_cursor)
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = api.ujson_response(
+                {
+                    "posts": [api.post_payload(post, request.user) for post in posts],
+                    "next_cursor": page.next_cursor,
+                }
+            )
+        response["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ["Cookie"])
+        return response
+
 class PostUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
     model = Post
     form_class = PostForm
@@ -122,6 +270,15 @@ class PostUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
     def test_func(self):
         return self.request.user == self.get_object().author
 
+    def form_valid(self, form):
+        # Write only the edited columns: counters and scores on the row are
+        # moved concurrently by likes, replies and background jobs.
+        self.object = form.save(commit=False)
+        self.object.version = F("version") + 1
+        self.object.save(update_fields=["content", "image", "version"])
+        self.object.refresh_from_db(fields=["version"])
+        return redirect(self.get_success_url())
+
 class PostDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
     model = Post
     template_name = 'posts/post_confirm_delete.html'
@@ -155,11 +312,13 @@ def post_detail(request, pk):
 
         form = PostForm(request.POST, request.FILES)
         if form.is_valid():
-            comment = form.save(commit=False)
-            comment.author = request.user
-            comment.parent_post = post
-            comment.save()
-            return redirect("posts:post_detail", pk=post.pk)
+            if post.accepts_replies:
+                comment = form.save(commit=False)
+                comment.author = request.user
+                comment.parent_post = post
+                comment.save()
+                return redirect("posts:post_detail", pk=post.pk)
+            form.add_error("content", "Ця гілка занадто глибока, відповісти в ній не можна.")
     else:
         form = PostForm()
 
@@ -171,15 +330,66 @@ def post_detail(request, pk):
 
     paginator = Paginator(top_level_comments, 10)
     page_obj = paginator.get_page(request.GET.get("page"))
-    comment_tree = build_comment_tree(list(page_obj.object_list))
+    comment_tree = build_truncated_comment_tree(list(page_obj.object_list))
+    comment_items = flatten_comment_tree(comment_tree)
 
     return render(
         request,
         "posts/post_detail.html",
         {
             "post": post,
-            "comment_tree": comment_tree,
+            "comment_items": comment_items,
             "form": form,
             "page_obj": page_obj,
         },
-    )
\ No newline at end of file
+    )
+
+
+def comment_replies(request, pk):
+    """Next slice of replies to comment ``pk`` for the "more replies" link.
+
+    Returns the rendered ``<li>`` items (JSON-wrapped for XHR callers),
+    starting after the reply id given in ``?after=``.
+    """
+    parent = get_object_or_404(
+        Post.objects.select_related("author", "author__profile"),
+        pk=pk,
+        parent_post__isnull=False,
+    )
+
+    replies = Post.objects.filter(parent_post=parent)
+    after = request.GET.get("after")
+    if after:
+        try:
+            after = int(after)
+        except ValueError:
+            raise Http404("Unknown reply")
+        after_reply = Post.objects.filter(parent_post=parent, pk=after).first()
+        if after_reply is None:
+            raise Http404("Unknown reply")
+        replies = replies.filter(path__gt=after_reply.path)
+
+    limit = settings.COMMENT_TREE_MAX_CHILDREN
+    page = list(
+        replies.select_related("author", "author__profile").order_by("path")[:limit]
+    )
+    children = build_truncated_comment_tree(page)
+
+    remaining = replies.filter(path__gt=page[-1].path).count() if page else 0
+    parent_node = {
+        "comment": parent,
+        "children": children,
+        "more": remaining,
+        "more_after": page[-1].id if page else None,
+    }
+    html = render_to_string(
+        "posts/_comment_nodes.html",
+        {"comment_items": flatten_comment_tree(children), "parent": parent_node},
+        request=request,
+    )
+
+    if request.headers.get("x-requested-with") == "XMLHttpRequest":
+        return JsonResponse(
+            {"html": html, "remaining": remaining, "after": parent_node["more_after"]}
+        )
+    return HttpResponse(html)
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class RelationshipsConfig(AppConfig):
     name = 'relationships'
+
+    def ready(self):
+        import relationships.signals
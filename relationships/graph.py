@@ -0,0 +1,112 @@
+"""Cached social graph.
+
+Every user's following, follower and friend (mutual follow) sets are kept
+in the cache as frozensets of *user* ids, so feed, chat and profile pages
+answer "do I follow X", "which of these users are my friends" and so on
+with set lookups instead of ``Follow`` queries.
+
+A follow or unfollow between A and B only changes A's following and
+friend sets and B's follower and friend sets; ``follow_changed`` drops
+exactly those keys and the next read reloads them with one query each.
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Follow
+
+CACHE_TIMEOUT = 60 * 60 * 24
+
+FOLLOWING = "following"
+FOLLOWERS = "followers"
+FRIENDS = "friends"
+
+
+def _key(kind, user_id):
+    return f"graph:{kind}:{user_id}"
+
+
+def _load(kind, user_id):
+    if kind == FOLLOWING:
+        ids = Follow.objects.filter(user_from__user_id=user_id).values_list(
+            "user_to__user_id", flat=True
+        )
+    elif kind == FOLLOWERS:
+        ids = Follow.objects.filter(user_to__user_id=user_id).values_list(
+            "user_from__user_id", flat=True
+        )
+    else:
+        return following_ids(user_id) & follower_ids(user_id)
+    return frozenset(ids)
+
+
+def _get(kind, user_id):
+    key = _key(kind, user_id)
+    ids = cache.get(key)
+    if ids is None:
+        ids = _load(kind, user_id)
+        cache.set(key, ids, CACHE_TIMEOUT)
+    return ids
+
+
+def following_ids(user_id):
+    """Ids of the users ``user_id`` follows."""
+    return _get(FOLLOWING, user_id)
+
+
+def follower_ids(user_id):
+    """Ids of the users following ``user_id``."""
+    return _get(FOLLOWERS, user_id)
+
+
+def friend_ids(user_id):
+    """Ids of the users ``user_id`` follows and is followed back by."""
+    return _get(FRIENDS, user_id)
+
+
+def are_friends(user_id, other_id):
+    if not user_id or not other_id:
+        return False
+    return other_id in friend_ids(user_id)
+
+
+def friends_among(user_id, other_ids):
+    """The subset of ``other_ids`` that are friends of ``user_id``."""
+    return friend_ids(user_id).intersection(other_ids)
+
+
+def follow_state(viewer_id, user_id):
+    """Relationship of the viewer to ``user_id`` as shown on profile pages.
+
+    ``"friends"`` (mutual), ``"following"`` (viewer follows them),
+    ``"mutual"`` (they follow the viewer, who can follow back) or ``"none"``.
+    """
+    following = user_id in following_ids(viewer_id)
+    followed_by = user_id in follower_ids(viewer_id)
+    if following and followed_by:
+        return "friends"
+    if followed_by:
+        return "mutual"
+    if following:
+        return "following"
+    return "none"
+
+
+def invalidate(*user_ids):
+    cache.delete_many(
+        [_key(kind, user_id) for user_id in user_ids for kind in (FOLLOWING, FOLLOWERS, FRIENDS)]
+    )
+
+
+def follow_changed(from_user_id, to_user_id):
+    """Drop the cached sets a follow/unfollow of ``to_user_id`` touches."""
+    keys = [
+        _key(FOLLOWING, from_user_id),
+        _key(FRIENDS, from_user_id),
+        _key(FOLLOWERS, to_user_id),
+        _key(FRIENDS, to_user_id),
+    ]
+    cache.delete_many(keys)
+    # A concurrent request may have reloaded the old sets before this
+    # transaction committed; drop them again once the change is visible.
+    transaction.on_commit(lambda: cache.delete_many(keys))
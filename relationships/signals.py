@@ -0,0 +1,16 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import graph
+from .models import Follow
+
+
+@receiver(post_save, sender=Follow)
+def invalidate_graph_on_follow(sender, instance, created, **kwargs):
+    if created:
+        graph.follow_changed(instance.user_from.user_id, instance.user_to.user_id)
+
+
+@receiver(post_delete, sender=Follow)
+def invalidate_graph_on_unfollow(sender, instance, **kwargs):
+    graph.follow_changed(instance.user_from.user_id, instance.user_to.user_id)
@@ -1,3 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from accounts.models import Profile
+from . import graph
+from .models import Follow
+
+
+class SocialGraphTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.alice = User.objects.create_user(username="alice", password="pass12345")
+        self.bob = User.objects.create_user(username="bob", password="pass12345")
+        self.carol = User.objects.create_user(username="carol", password="pass12345")
+        for user in (self.alice, self.bob, self.carol):
+            Profile.objects.create(user=user)
+
+        Follow.objects.create(user_from=self.alice.profile, user_to=self.bob.profile)
+        Follow.objects.create(user_from=self.bob.profile, user_to=self.alice.profile)
+        Follow.objects.create(user_from=self.alice.profile, user_to=self.carol.profile)
+
+    def test_sets_are_cached(self):
+        graph.friend_ids(self.alice.pk)
+        graph.friend_ids(self.carol.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(graph.following_ids(self.alice.pk), {self.bob.pk, self.carol.pk})
+            self.assertEqual(graph.follower_ids(self.alice.pk), {self.bob.pk})
+            self.assertEqual(graph.friend_ids(self.alice.pk), {self.bob.pk})
+            self.assertEqual(
+                graph.friends_among(self.alice.pk, [self.bob.pk, self.carol.pk]),
+                {self.bob.pk},
+            )
+            self.assertEqual(graph.follow_state(self.alice.pk, self.carol.pk), "following")
+            self.assertEqual(graph.follow_state(self.carol.pk, self.alice.pk), "mutual")
+
+    def test_follow_toggle_invalidates_both_sides(self):
+        self.assertEqual(graph.friend_ids(self.carol.pk), set())
+        self.assertFalse(graph.are_friends(self.alice.pk, self.carol.pk))
+
+        self.client.login(username="carol", password="pass12345")
+        self.client.post(reverse("relationships:follow_toggle", args=["alice"]))
+        self.assertTrue(graph.are_friends(self.alice.pk, self.carol.pk))
+        self.assertTrue(graph.are_friends(self.carol.pk, self.alice.pk))
+
+        self.client.post(reverse("relationships:follow_toggle", args=["alice"]))
+        self.assertFalse(graph.are_friends(self.alice.pk, self.carol.pk))
+        self.assertEqual(graph.follower_ids(self.alice.pk), {self.bob.pk})
@@ -0,0 +1,29 @@
+from functools import cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connection
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+# Used when SEARCH_BACKEND is not set: the index the search migration
+# creates for the database in use, else the unindexed fallback.
+VENDOR_BACKENDS = {"sqlite": "search.backends.sqlite_fts.SQLiteFTSBackend"}
+DEFAULT_BACKEND = "search.backends.database.DatabaseBackend"
+
+
+def default_backend(vendor):
+    return VENDOR_BACKENDS.get(vendor, DEFAULT_BACKEND)
+
+
+@cache
+def get_backend():
+    """The configured ``SEARCH_BACKEND`` instance."""
+    path = getattr(settings, "SEARCH_BACKEND", None) or default_backend(connection.vendor)
+    return import_string(path)()
+
+
+@receiver(setting_changed)
+def reset_backend(setting, **kwargs):
+    if setting == "SEARCH_BACKEND":
+        get_backend.cache_clear()
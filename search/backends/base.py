@@ -0,0 +1,49 @@
+import re
+
+WORD_RE = re.compile(r"\w+")
+
+
+def query_terms(query):
+    """Split a user's query into plain search terms (no operators)."""
+    return WORD_RE.findall(query.lower())
+
+
+class SearchBackend:
+    """Interface of a post search index.
+
+    Results are ``(post_id, rank)`` pairs ordered by ascending rank, then
+    ascending id, so ``(rank, id)`` of the last row is a keyset cursor for
+    the next page.  Every term of the query must match; the last one may
+    also match as a prefix.
+    """
+
+    def index(self, posts):
+        """Add or replace ``posts`` in the index."""
+        raise NotImplementedError
+
+    def remove(self, post_ids):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def search(self, query, limit, after=None):
+        """Return up to ``limit`` matches, starting after the ``(rank, id)`` pair."""
+        raise NotImplementedError
+
+    def count(self, query):
+        raise NotImplementedError
+
+    def rebuild(self, queryset, batch_size=1000):
+        """Re-index every post in ``queryset`` from scratch; returns the count."""
+        self.clear()
+        indexed = 0
+        last_pk = 0
+        queryset = queryset.only("pk", "content").order_by("pk")
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                return indexed
+            self.index(batch)
+            indexed += len(batch)
+            last_pk = batch[-1].pk
@@ -0,0 +1,44 @@
+"""Index-less fallback for databases without a full-text engine.
+
+Every term is an ``icontains`` filter over ``Post.content`` (a table scan),
+newest posts first.  Useful for development on other databases; use a real
+full-text backend in production.
+"""
+
+from django.db.models import Q
+
+from posts.models import Post
+from .base import SearchBackend, query_terms
+
+
+class DatabaseBackend(SearchBackend):
+    def index(self, posts):
+        pass
+
+    def remove(self, post_ids):
+        pass
+
+    def clear(self):
+        pass
+
+    def _filter(self, query):
+        terms = query_terms(query)
+        if not terms:
+            return Post.objects.none()
+        condition = Q()
+        for term in terms:
+            condition &= Q(content__icontains=term)
+        return Post.objects.filter(condition)
+
+    def search(self, query, limit, after=None):
+        queryset = self._filter(query)
+        if after is not None:
+            queryset = queryset.filter(pk__lt=-after[0])
+        # rank = -id keeps the ascending (rank, id) contract: newest first.
+        return [
+            (pk, -pk)
+            for pk in queryset.order_by("-pk").values_list("pk", flat=True)[:limit]
+        ]
+
+    def count(self, query):
+        return self._filter(query).count()
@@ -0,0 +1,80 @@
+"""SQLite FTS5 inverted index of post content.
+
+``search_post_fts`` (created by the search app's migration) stores each
+post's content under ``rowid = post.id``.  Matches are ranked with BM25;
+the lower the rank the better the match.
+"""
+
+from django.db import connection
+
+from .base import SearchBackend, query_terms
+
+FTS_TABLE = "search_post_fts"
+
+# Shorter prefixes match so much of the index that ranking them is slow.
+MIN_PREFIX_LENGTH = 3
+
+
+def match_expression(query):
+    """FTS5 MATCH string for ``query``: every term quoted, the last as a prefix."""
+    terms = query_terms(query)
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    if len(terms[-1]) >= MIN_PREFIX_LENGTH:
+        quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+class SQLiteFTSBackend(SearchBackend):
+    def index(self, posts):
+        rows = [(post.pk, post.content) for post in posts]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(pk,) for pk, _ in rows]
+            )
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, content) VALUES (%s, %s)", rows
+            )
+
+    def remove(self, post_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(pk,) for pk in post_ids]
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+
+    def search(self, query, limit, after=None):
+        expression = match_expression(query)
+        if expression is None:
+            return []
+
+        sql = (
+            f"SELECT rowid, bm25({FTS_TABLE}) AS score FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s"
+        )
+        params = [expression]
+        if after is not None:
+            rank, post_id = after
+            sql = f"SELECT rowid, score FROM ({sql}) WHERE score > %s OR (score = %s AND rowid > %s)"
+            params += [rank, rank, post_id]
+        sql += " ORDER BY score, rowid LIMIT %s"
+        params.append(limit)
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def count(self, query):
+        expression = match_expression(query)
+        if expression is None:
+            return 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT COUNT(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+                [expression],
+            )
+            return cursor.fetchone()[0]
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import Post
+from search.backends import get_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the post search index from the posts table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="How many posts to index per batch (default: 1000).",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            indexed = get_backend().rebuild(
+                Post.objects.all(), batch_size=options["batch_size"]
+            )
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} posts."))
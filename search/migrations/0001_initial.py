@@ -0,0 +1,31 @@
+from django.db import migrations
+
+
+def create_index(apps, schema_editor):
+    # The FTS5 index is only used by the SQLite backend.
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS search_post_fts USING fts5("
+        "content, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    )
+    schema_editor.execute(
+        "INSERT INTO search_post_fts (rowid, content) SELECT id, content FROM posts_post"
+    )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS search_post_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0007_post_version"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
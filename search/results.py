@@ -0,0 +1,45 @@
+from posts.models import Post
+from .backends import get_backend
+
+
+class SearchResults:
+    """Sliceable, ranked search results over ``queryset``.
+
+    Rows come from the search backend as ``(post_id, rank)`` and are loaded
+    with one ``in_bulk`` on ``queryset`` (which carries the select_related
+    and per-viewer annotations).  Each post gets ``search_rank``, so
+    ``CursorPaginator`` can page by ``("search_rank", "id")`` through
+    ``after()``.
+    """
+
+    model = Post
+
+    def __init__(self, query, queryset, cursor=None, backend=None):
+        self.query = query
+        self.queryset = queryset
+        self.cursor = cursor
+        self.backend = backend or get_backend()
+
+    def after(self, values):
+        return SearchResults(self.query, self.queryset, tuple(values), self.backend)
+
+    def count(self):
+        return self.backend.count(self.query)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index : index + 1][0]
+
+        start = index.start or 0
+        stop = index.stop if index.stop is not None else self.count()
+        rows = self.backend.search(self.query, limit=stop, after=self.cursor)[start:]
+
+        posts = self.queryset.in_bulk([post_id for post_id, _ in rows])
+        result = []
+        for post_id, rank in rows:
+            post = posts.get(post_id)
+            if post is None:
+                continue
+            post.search_rank = rank
+            result.append(post)
+        return result
@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import Profile
+from core.pagination import encode_cursor
+from likes.models import Like
+from posts.models import Post
+from .backends import DEFAULT_BACKEND, default_backend, get_backend
+from .backends.database import DatabaseBackend
+from .backends.sqlite_fts import SQLiteFTSBackend
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="searcher", password="pass12345"
+        )
+        Profile.objects.create(user=self.user)
+        self.cat = Post.objects.create(author=self.user, content="Мій кіт спить на дивані")
+        self.cats = Post.objects.create(
+            author=self.user, content="Кіт і ще один кіт, котики всюди"
+        )
+        self.dog = Post.objects.create(author=self.user, content="Собака гавкає")
+
+    def search_ids(self, query, **params):
+        response = self.client.get(reverse("search:results"), {"q": query, **params})
+        return [post.id for post in response.context["posts"]], response
+
+    def test_index_follows_create_edit_and_delete(self):
+        backend = get_backend()
+        self.assertEqual(backend.count("кіт"), 2)
+
+        self.dog.content = "Собака і кіт дружать"
+        self.dog.save()
+        self.assertEqual(backend.count("кіт"), 3)
+        self.assertEqual(backend.count("гавкає"), 0)
+
+        self.cat.delete()
+        self.assertEqual(backend.count("кіт"), 2)
+
+    def test_backend_follows_setting_changes(self):
+        default = get_backend()
+        with override_settings(SEARCH_BACKEND="search.backends.database.DatabaseBackend"):
+            self.assertIsInstance(get_backend(), DatabaseBackend)
+        self.assertIs(type(get_backend()), type(default))
+
+    def test_cursor_without_query_is_an_empty_page(self):
+        cursor = encode_cursor(("search_rank", "id"), [-1.0, self.cat.id])
+        response = self.client.get(reverse("search:results"), {"cursor": cursor})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context["posts"]), [])
+
+    def test_default_backend_follows_the_database(self):
+        with override_settings(SEARCH_BACKEND=None):
+            self.assertIsInstance(get_backend(), SQLiteFTSBackend)
+        self.assertEqual(default_backend("postgresql"), DEFAULT_BACKEND)
+
+    def test_results_are_ranked_and_prefix_matched(self):
+        ids, _ = self.search_ids("кіт")
+        self.assertEqual(ids, [self.cats.id, self.cat.id])
+
+        ids, _ = self.search_ids("кот")
+        self.assertEqual(ids, [self.cats.id])
+
+        ids, _ = self.search_ids('"*) OR (')
+        self.assertEqual(ids, [])
+
+    def test_results_are_cursor_paginated_and_annotated(self):
+        for index in range(12):
+            Post.objects.create(author=self.user, content=f"Кіт номер {index}")
+        Like.objects.create(user=self.user, post=self.cats)
+        self.client.login(username="searcher", password="pass12345")
+
+        first, response = self.search_ids("кіт")
+        page = response.context["page_obj"]
+        self.assertEqual(len(first), 10)
+        self.assertTrue(page.has_next())
+        self.assertTrue(response.context["posts"][0].is_liked)
+
+        second, response = self.search_ids("кіт", cursor=page.next_cursor)
+        self.assertEqual(len(second), 4)
+        self.assertFalse(response.context["page_obj"].has_next())
+        self.assertFalse(set(first) & set(second))
@@ -0,0 +1,42 @@
+from django.db.models import Exists, OuterRef
+from django.views.generic import ListView
+
+from bookmarks.models import Bookmark
+from core.pagination import CursorPaginationMixin
+from likes.models import Like
+from posts.models import Post
+from .results import SearchResults
+
+
+class SearchView(CursorPaginationMixin, ListView):
+    model = Post
+    template_name = "search/results.html"
+    context_object_name = "posts"
+    paginate_by = 10
+    cursor_ordering = ("search_rank", "id")
+
+    def get_search_query(self):
+        return self.request.GET.get("q", "").strip()
+
+    def get_queryset(self):
+        query = self.get_search_query()
+        if not query:
+            # Still SearchResults, so a stray ?cursor= pages through nothing.
+            return SearchResults(query, Post.objects.none())
+
+        queryset = Post.objects.select_related("author", "author__profile")
+        if self.request.user.is_authenticated:
+            queryset = queryset.annotate(
+                is_liked=Exists(
+                    Like.objects.filter(user=self.request.user, post=OuterRef("pk"))
+                ),
+                is_bookmarked=Exists(
+                    Bookmark.objects.filter(user=self.request.user, post=OuterRef("pk"))
+                ),
+            )
+        return SearchResults(query, queryset)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["query"] = self.get_search_query()
+        return context
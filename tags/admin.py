@@ -0,0 +1,10 @@
+from django.contrib import admin
+
+from .models import Hashtag
+
+
+@admin.register(Hashtag)
+class HashtagAdmin(admin.ModelAdmin):
+    list_display = ("name", "posts_count", "created_at")
+    search_fields = ("name",)
+    ordering = ("-posts_count",)
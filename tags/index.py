@@ -0,0 +1,128 @@
+"""Hashtag and @mention index of post content.
+
+``index_post`` parses a post once when it is written and brings its
+``PostHashtag`` / ``Mention`` rows in line with the content, so "posts
+with #tag" and "posts mentioning me" are lookups over indexed tables.
+
+``Hashtag.posts_count`` follows the number of tagged posts, and every
+new tagging bumps the tag's ``HashtagHourlyCount`` for the current hour;
+``trending_hashtags`` sums those counters over a recent window.
+"""
+
+import re
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db.models import F, Sum
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from .models import Hashtag, HashtagHourlyCount, Mention, PostHashtag
+
+# Longer words aren't tags (rather than a tag of their first 64 characters).
+HASHTAG_RE = re.compile(r"(?<![\w#&])#(\w{1,64})(?!\w)")
+MENTION_RE = re.compile(r"(?<![\w@])@(\w(?:[\w.+-]*\w)?)")
+
+TRENDING_HOURS = 24
+TRENDING_LIMIT = 10
+
+
+def extract_hashtags(content):
+    return {name.lower() for name in HASHTAG_RE.findall(content or "")}
+
+
+def extract_mentions(content):
+    return {username.lower() for username in MENTION_RE.findall(content or "")}
+
+
+def _sync_hashtags(post, names):
+    current = dict(
+        PostHashtag.objects.filter(post=post).values_list("hashtag__name", "hashtag_id")
+    )
+    removed = [hashtag_id for name, hashtag_id in current.items() if name not in names]
+    added = names - current.keys()
+
+    if removed:
+        PostHashtag.objects.filter(post=post, hashtag_id__in=removed).delete()
+        Hashtag.objects.filter(pk__in=removed, posts_count__gt=0).update(
+            posts_count=F("posts_count") - 1
+        )
+    if not added:
+        return
+
+    Hashtag.objects.bulk_create(
+        [Hashtag(name=name) for name in added], ignore_conflicts=True
+    )
+    hashtag_ids = list(
+        Hashtag.objects.filter(name__in=added).values_list("pk", flat=True)
+    )
+    PostHashtag.objects.bulk_create(
+        [
+            PostHashtag(post=post, hashtag_id=hashtag_id, created_at=post.created_at)
+            for hashtag_id in hashtag_ids
+        ],
+        ignore_conflicts=True,
+    )
+    Hashtag.objects.filter(pk__in=hashtag_ids).update(posts_count=F("posts_count") + 1)
+
+    hour = timezone.now().replace(minute=0, second=0, microsecond=0)
+    HashtagHourlyCount.objects.bulk_create(
+        [HashtagHourlyCount(hashtag_id=hashtag_id, hour=hour) for hashtag_id in hashtag_ids],
+        ignore_conflicts=True,
+    )
+    HashtagHourlyCount.objects.filter(hashtag_id__in=hashtag_ids, hour=hour).update(
+        count=F("count") + 1
+    )
+
+
+def _sync_mentions(post, usernames):
+    user_ids = set()
+    if usernames:
+        user_ids = set(
+            get_user_model()
+            .objects.annotate(username_lower=Lower("username"))
+            .filter(username_lower__in=usernames)
+            .exclude(pk=post.author_id)
+            .values_list("pk", flat=True)
+        )
+
+    current = set(Mention.objects.filter(post=post).values_list("user_id", flat=True))
+    if current - user_ids:
+        Mention.objects.filter(post=post, user_id__in=current - user_ids).delete()
+    Mention.objects.bulk_create(
+        [
+            Mention(post=post, user_id=user_id, created_at=post.created_at)
+            for user_id in user_ids - current
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def index_post(post):
+    """Bring the post's hashtag and mention rows in line with its content."""
+    _sync_hashtags(post, extract_hashtags(post.content))
+    _sync_mentions(post, extract_mentions(post.content))
+
+
+def unindex_post(post):
+    """Release the post's hashtags; the rows themselves go with the post."""
+    hashtag_ids = list(
+        PostHashtag.objects.filter(post=post).values_list("hashtag_id", flat=True)
+    )
+    if hashtag_ids:
+        Hashtag.objects.filter(pk__in=hashtag_ids, posts_count__gt=0).update(
+            posts_count=F("posts_count") - 1
+        )
+
+
+def trending_hashtags(hours=TRENDING_HOURS, limit=TRENDING_LIMIT, now=None):
+    """Return ``[(name, uses)]`` of the most used hashtags in the last ``hours``."""
+    now = now or timezone.now()
+    since = now.replace(minute=0, second=0, microsecond=0) - timedelta(hours=hours - 1)
+    return list(
+        HashtagHourlyCount.objects.filter(hour__gte=since)
+        .values("hashtag__name")
+        .annotate(uses=Sum("count"))
+        .order_by("-uses", "hashtag__name")
+        .values_list("hashtag__name", "uses")[:limit]
+    )
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import Post
+from tags.index import index_post
+
+
+class Command(BaseCommand):
+    help = "Parse hashtags and mentions of existing posts into the tag index."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="How many posts to load per query (default: 1000).",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        queryset = Post.objects.only("pk", "author_id", "content", "created_at")
+
+        indexed = 0
+        last_pk = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk).order_by("pk")[:batch_size])
+            if not batch:
+                break
+            with transaction.atomic():
+                for post in batch:
+                    index_post(post)
+            indexed += len(batch)
+            last_pk = batch[-1].pk
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} posts."))
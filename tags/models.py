@@ -0,0 +1,88 @@
+from django.conf import settings
+from django.db import models
+
+
+class Hashtag(models.Model):
+    name = models.CharField(max_length=64, unique=True)
+    posts_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"#{self.name}"
+
+
+class PostHashtag(models.Model):
+    post = models.ForeignKey(
+        "posts.Post",
+        on_delete=models.CASCADE,
+        related_name="hashtag_links"
+    )
+
+    hashtag = models.ForeignKey(
+        Hashtag,
+        on_delete=models.CASCADE,
+        related_name="post_links"
+    )
+
+    # Copy of post.created_at, so "newest posts with #tag" is a range scan
+    # over (hashtag, -created_at) without touching posts_post.
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ("post", "hashtag")
+        indexes = [
+            models.Index(
+                fields=["hashtag", "-created_at", "-post"],
+                name="tags_hashtag_posts_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Post {self.post_id} tagged #{self.hashtag}"
+
+
+class Mention(models.Model):
+    post = models.ForeignKey(
+        "posts.Post",
+        on_delete=models.CASCADE,
+        related_name="mentions"
+    )
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="mentions"
+    )
+
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ("post", "user")
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at", "-post"],
+                name="tags_mention_posts_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Post {self.post_id} mentions {self.user_id}"
+
+
+class HashtagHourlyCount(models.Model):
+    """How many posts were tagged with a hashtag during one hour."""
+
+    hashtag = models.ForeignKey(
+        Hashtag,
+        on_delete=models.CASCADE,
+        related_name="hourly_counts"
+    )
+
+    hour = models.DateTimeField(db_index=True)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("hashtag", "hour")
+
+    def __str__(self):
+        return f"#{self.hashtag} {self.hour:%Y-%m-%d %H}:00 x{self.count}"
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+
+from posts.models import Post
+from .index import index_post, unindex_post
+
+
+@receiver(post_save, sender=Post)
+def index_post_tags(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and "content" not in update_fields:
+        return
+    index_post(instance)
+
+
+@receiver(pre_delete, sender=Post)
+def unindex_post_tags(sender, instance, **kwargs):
+    unindex_post(instance)
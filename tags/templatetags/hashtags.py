@@ -0,0 +1,23 @@
+from django import template
+from django.urls import reverse
+from django.utils.html import escape, format_html
+from django.utils.safestring import mark_safe
+
+from tags.index import HASHTAG_RE
+
+register = template.Library()
+
+
+@register.filter
+def link_hashtags(content):
+    """Escape ``content`` and turn every #hashtag into a link to its page."""
+
+    def link(match):
+        name = match.group(1)
+        return format_html(
+            '<a href="{}" class="hashtag-link">#{}</a>',
+            reverse("tags:hashtag", args=[name.lower()]),
+            name,
+        )
+
+    return mark_safe(HASHTAG_RE.sub(link, escape(content)))
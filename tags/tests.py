@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Profile
+from posts.models import Post
+from .index import extract_hashtags, extract_mentions, trending_hashtags
+from .models import Hashtag, HashtagHourlyCount, Mention, PostHashtag
+
+
+class TagIndexTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.author = User.objects.create_user(username="author", password="pass12345")
+        self.reader = User.objects.create_user(username="Reader", password="pass12345")
+        for user in (self.author, self.reader):
+            Profile.objects.create(user=user)
+
+    def test_extraction(self):
+        self.assertEqual(
+            extract_hashtags("#Kyiv and #київ, not a#b or &#39; #kyiv"), {"kyiv", "київ"}
+        )
+        self.assertEqual(extract_hashtags(f"#{'a' * 64} #{'b' * 65}"), {"a" * 64})
+        self.assertEqual(
+            extract_mentions("hi @reader. mail a@b.c and @bob_1!"), {"reader", "bob_1"}
+        )
+
+    def test_tags_and_mentions_follow_edits_and_deletes(self):
+        post = Post.objects.create(author=self.author, content="#cats #dogs hi @reader")
+        self.assertEqual(
+            set(post.hashtag_links.values_list("hashtag__name", flat=True)),
+            {"cats", "dogs"},
+        )
+        self.assertTrue(Mention.objects.filter(post=post, user=self.reader).exists())
+
+        post.content = "#cats only"
+        post.save()
+        self.assertEqual(Hashtag.objects.get(name="dogs").posts_count, 0)
+        self.assertEqual(Hashtag.objects.get(name="cats").posts_count, 1)
+        self.assertFalse(Mention.objects.filter(post=post).exists())
+
+        post.delete()
+        self.assertEqual(Hashtag.objects.get(name="cats").posts_count, 0)
+        self.assertFalse(PostHashtag.objects.exists())
+
+    def test_hashtag_and_mentions_pages(self):
+        tagged = [
+            Post.objects.create(author=self.author, content=f"#news {index} @reader")
+            for index in range(12)
+        ]
+        Post.objects.create(author=self.author, content="untagged")
+
+        first = self.client.get(reverse("tags:hashtag", args=["NEWS"])).context["page_obj"]
+        self.assertEqual([post.id for post in first], [post.id for post in tagged[::-1][:10]])
+        second = self.client.get(
+            reverse("tags:hashtag", args=["news"]), {"cursor": first.next_cursor}
+        ).context["page_obj"]
+        self.assertEqual([post.id for post in second], [tagged[1].id, tagged[0].id])
+
+        self.client.login(username="Reader", password="pass12345")
+        response = self.client.get(reverse("tags:mentions"))
+        self.assertEqual(len(response.context["posts"]), 10)
+        self.assertContains(response, f'href="{reverse("tags:hashtag", args=["news"])}"')
+
+        response = self.client.get(reverse("posts:post_detail", args=[tagged[0].id]))
+        self.assertContains(response, f'href="{reverse("tags:hashtag", args=["news"])}"')
+        Post.objects.create(author=self.reader, content="#replies too", parent_post=tagged[0])
+        response = self.client.get(reverse("posts:post_detail", args=[tagged[0].id]))
+        self.assertContains(response, f'href="{reverse("tags:hashtag", args=["replies"])}"')
+
+    def test_trending_uses_hourly_counters(self):
+        for index in range(3):
+            Post.objects.create(author=self.author, content=f"#hot {index}")
+        Post.objects.create(author=self.author, content="#warm")
+        old = Hashtag.objects.create(name="old", posts_count=50)
+        HashtagHourlyCount.objects.create(
+            hashtag=old, hour=timezone.now() - timedelta(days=2), count=50
+        )
+
+        self.assertEqual(trending_hashtags(), [("hot", 3), ("warm", 1)])
+        data = self.client.get(reverse("tags:trending"), {"limit": 1}).json()
+        self.assertEqual(
+            data["tags"],
+            [{"name": "hot", "uses": 3, "url": reverse("tags:hashtag", args=["hot"])}],
+        )
@@ -0,0 +1,11 @@
+from django.urls import path
+
+from .views import HashtagPostsView, MentionsView, trending_tags
+
+app_name = "tags"
+
+urlpatterns = [
+    path("tags/trending/", trending_tags, name="trending"),
+    path("tags/<str:name>/", HashtagPostsView.as_view(), name="hashtag"),
+    path("mentions/", MentionsView.as_view(), name="mentions"),
+]
@@ -0,0 +1,109 @@
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.cache import cache
+from django.db.models import Exists, F, OuterRef
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.views.decorators.http import require_GET
+from django.views.generic import ListView
+
+from bookmarks.models import Bookmark
+from core.pagination import CursorPaginationMixin
+from likes.models import Like
+from posts.models import Post
+from .index import TRENDING_HOURS, TRENDING_LIMIT, trending_hashtags
+from .models import Hashtag
+
+TRENDING_CACHE_TIMEOUT = 60
+
+
+class IndexedPostsMixin(CursorPaginationMixin):
+    """Posts listed through an index table, newest first.
+
+    Subclasses return the index rows' relation (``hashtag_links`` or
+    ``mentions``) filtered to one tag or user; ordering by the index rows'
+    own ``created_at`` / ``post_id`` keeps every page a range scan of the
+    index.
+    """
+
+    template_name = "tags/post_list.html"
+    context_object_name = "posts"
+    paginate_by = 10
+    cursor_ordering = ("-indexed_at", "-indexed_post")
+    relation = None
+
+    def get_index_filter(self):
+        raise NotImplementedError
+
+    def get_queryset(self):
+        queryset = (
+            Post.objects.filter(**self.get_index_filter())
+            .annotate(
+                indexed_at=F(f"{self.relation}__created_at"),
+                indexed_post=F(f"{self.relation}__post_id"),
+            )
+            .select_related("author", "author__profile")
+        )
+        if self.request.user.is_authenticated:
+            queryset = queryset.annotate(
+                is_liked=Exists(
+                    Like.objects.filter(user=self.request.user, post=OuterRef("pk"))
+                ),
+                is_bookmarked=Exists(
+                    Bookmark.objects.filter(user=self.request.user, post=OuterRef("pk"))
+                ),
+            )
+        return queryset.order_by(*self.get_cursor_ordering())
+
+
+class HashtagPostsView(IndexedPostsMixin, ListView):
+    relation = "hashtag_links"
+
+    def get_index_filter(self):
+        self.hashtag = get_object_or_404(Hashtag, name=self.kwargs["name"].lower())
+        return {"hashtag_links__hashtag": self.hashtag}
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["title"] = f"#{self.hashtag.name}"
+        return context
+
+
+class MentionsView(LoginRequiredMixin, IndexedPostsMixin, ListView):
+    relation = "mentions"
+
+    def get_index_filter(self):
+        return {"mentions__user": self.request.user}
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["title"] = "Згадки"
+        return context
+
+
+def _positive_int(value, default, maximum):
+    try:
+        return min(max(int(value), 1), maximum)
+    except (TypeError, ValueError):
+        return default
+
+
+@require_GET
+def trending_tags(request):
+    hours = _positive_int(request.GET.get("hours"), TRENDING_HOURS, 24 * 7)
+    limit = _positive_int(request.GET.get("limit"), TRENDING_LIMIT, 50)
+
+    cache_key = f"tags:trending:{hours}:{limit}"
+    tags = cache.get(cache_key)
+    if tags is None:
+        tags = [
+            {
+                "name": name,
+                "uses": uses,
+                "url": reverse("tags:hashtag", args=[name]),
+            }
+            for name, uses in trending_hashtags(hours, limit)
+        ]
+        cache.set(cache_key, tags, TRENDING_CACHE_TIMEOUT)
+
+    return JsonResponse({"hours": hours, "tags": tags})
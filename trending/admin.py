@@ -0,0 +1,9 @@
+from django.contrib import admin
+
+from .models import EngagementBucket
+
+
+@admin.register(EngagementBucket)
+class EngagementBucketAdmin(admin.ModelAdmin):
+    list_display = ("post", "bucket", "likes", "replies", "bookmarks")
+    ordering = ("-bucket",)
@@ -0,0 +1,140 @@
+"""Sliding-window "hot right now" ranking of posts.
+
+Every like, reply and bookmark is counted in the post's
+``EngagementBucket`` for the current 5-minute bucket (an unlike or a
+removed bookmark takes its count back out of the bucket it was added
+to).  A post's ``trending_score`` is the weighted engagement of its
+buckets inside the last ``TRENDING_WINDOW_HOURS``, each bucket fading
+linearly to zero as it ages out of the window:
+
+    score = sum((likes * 1.0 + replies * 2.0 + bookmarks * 1.5)
+                * (1 - bucket_age / window))
+
+Scores are kept up to date incrementally: engagement marks the post dirty
+and a background worker recomputes each dirty post once per
+``TRENDING_UPDATE_DELAY`` window, reading only that post's buckets.
+``refresh_trending`` (the ``refresh_trending`` command, meant to run
+every few minutes) applies the decay to posts still in the window, zeroes
+the ones that fell out of it and drops expired buckets.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.background import CoalescingQueue
+from posts.models import Post
+from .models import EngagementBucket
+
+BUCKET_MINUTES = 5
+LIKE_WEIGHT = 1.0
+REPLY_WEIGHT = 2.0
+BOOKMARK_WEIGHT = 1.5
+
+KINDS = ("likes", "replies", "bookmarks")
+DEFAULT_BATCH_SIZE = 2000
+
+
+def window():
+    return timedelta(hours=getattr(settings, "TRENDING_WINDOW_HOURS", 6))
+
+
+def bucket_start(moment):
+    return moment.replace(
+        minute=moment.minute - moment.minute % BUCKET_MINUTES, second=0, microsecond=0
+    )
+
+
+def record(post_id, kind, delta=1, at=None):
+    """Add ``delta`` (+1 or -1) ``kind`` engagement to the post's bucket at ``at``."""
+    bucket = bucket_start(at or timezone.now())
+    if bucket < bucket_start(timezone.now()) - window():
+        return
+    if delta > 0:
+        EngagementBucket.objects.bulk_create(
+            [EngagementBucket(post_id=post_id, bucket=bucket)], ignore_conflicts=True
+        )
+        EngagementBucket.objects.filter(post_id=post_id, bucket=bucket).update(
+            **{kind: F(kind) + delta}
+        )
+    else:
+        EngagementBucket.objects.filter(
+            post_id=post_id, bucket=bucket, **{f"{kind}__gte": -delta}
+        ).update(**{kind: F(kind) + delta})
+    schedule_trending_update(post_id)
+
+
+def compute_scores(post_ids, now=None):
+    """Return ``{post_id: score}`` for the posts with engagement in the window."""
+    now = now or timezone.now()
+    span = window().total_seconds()
+    rows = EngagementBucket.objects.filter(
+        post_id__in=post_ids, bucket__gt=now - window()
+    ).values_list("post_id", "bucket", *KINDS)
+
+    scores = {}
+    for post_id, bucket, likes, replies, bookmarks in rows:
+        age = max((now - bucket).total_seconds(), 0)
+        weight = likes * LIKE_WEIGHT + replies * REPLY_WEIGHT + bookmarks * BOOKMARK_WEIGHT
+        scores[post_id] = scores.get(post_id, 0.0) + weight * max(1 - age / span, 0)
+    return scores
+
+
+def update_batch(posts, now=None):
+    """Recompute ``trending_score`` of ``posts``; returns the number written."""
+    scores = compute_scores([post.pk for post in posts], now)
+    changed = []
+    for post in posts:
+        score = scores.get(post.pk, 0.0)
+        if abs(score - post.trending_score) > 1e-9:
+            post.trending_score = score
+            changed.append(post)
+    if changed:
+        Post.objects.bulk_update(changed, ["trending_score"])
+    return len(changed)
+
+
+def update_trending(post_ids):
+    update_batch(list(Post.objects.filter(pk__in=post_ids).only("pk", "trending_score")))
+
+
+def refresh_trending(now=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Decay every post that is trending or has engagement in the window.
+
+    Returns ``(checked, updated, purged_buckets)``.
+    """
+    now = now or timezone.now()
+    since = now - window()
+    queryset = (
+        Post.objects.filter(
+            Q(trending_score__gt=0)
+            | Q(pk__in=EngagementBucket.objects.filter(bucket__gt=since).values("post_id"))
+        )
+        .only("pk", "trending_score")
+        .order_by("pk")
+    )
+
+    checked = updated = 0
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            break
+        checked += len(batch)
+        updated += update_batch(batch, now)
+        last_pk = batch[-1].pk
+
+    purged, _ = EngagementBucket.objects.filter(bucket__lte=since).delete()
+    return checked, updated, purged
+
+
+trending_updates = CoalescingQueue(
+    update_trending,
+    delay=lambda: getattr(settings, "TRENDING_UPDATE_DELAY", 2.0),
+)
+
+
+def schedule_trending_update(post_id):
+    trending_updates.add(post_id)
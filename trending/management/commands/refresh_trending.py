@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from trending.engine import DEFAULT_BATCH_SIZE, refresh_trending
+
+
+class Command(BaseCommand):
+    help = (
+        "Decay trending scores over the sliding window and drop expired "
+        "engagement buckets; run every few minutes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f"Posts per batch (default: {DEFAULT_BATCH_SIZE}).",
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        checked, updated, purged = refresh_trending(batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Checked {checked} posts, updated {updated}, purged {purged} "
+                f"buckets in {time.perf_counter() - started:.2f}s."
+            )
+        )
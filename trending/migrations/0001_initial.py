@@ -0,0 +1,31 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('posts', '0009_post_trending_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EngagementBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField()),
+                ('likes', models.PositiveIntegerField(default=0)),
+                ('replies', models.PositiveIntegerField(default=0)),
+                ('bookmarks', models.PositiveIntegerField(default=0)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='engagement_buckets', to='posts.post')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['bucket'], name='trending_bucket_idx')],
+                'unique_together': {('post', 'bucket')},
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import models
+
+
+class EngagementBucket(models.Model):
+    """Likes, replies and bookmarks a post got during one 5-minute bucket."""
+
+    post = models.ForeignKey(
+        "posts.Post",
+        on_delete=models.CASCADE,
+        related_name="engagement_buckets"
+    )
+
+    # Start of the bucket (see trending.engine.bucket_start).
+    bucket = models.DateTimeField()
+    likes = models.PositiveIntegerField(default=0)
+    replies = models.PositiveIntegerField(default=0)
+    bookmarks = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("post", "bucket")
+        indexes = [
+            models.Index(fields=["bucket"], name="trending_bucket_idx"),
+        ]
+
+    def __str__(self):
+        return (
+            f"Post {self.post_id} {self.bucket:%Y-%m-%d %H:%M}: "
+            f"{self.likes}/{self.replies}/{self.bookmarks}"
+        )
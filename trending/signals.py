@@ -0,0 +1,53 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from bookmarks.models import Bookmark
+from bookmarks.signals import bookmarks_changed
+from likes.models import Like
+from likes.signals import likes_changed
+from posts.models import Post
+from .engine import record
+
+
+@receiver(post_save, sender=Like)
+def count_like(sender, instance, created, **kwargs):
+    if created:
+        record(instance.post_id, "likes", at=instance.created_at)
+
+
+@receiver(post_delete, sender=Like)
+def uncount_like(sender, instance, **kwargs):
+    record(instance.post_id, "likes", -1, at=instance.created_at)
+
+
+@receiver(likes_changed)
+def count_like_toggle(sender, post_id, liked, created_at, **kwargs):
+    record(post_id, "likes", 1 if liked else -1, at=created_at)
+
+
+@receiver(post_save, sender=Post)
+def count_reply(sender, instance, created, **kwargs):
+    if created and instance.parent_post_id:
+        record(instance.parent_post_id, "replies", at=instance.created_at)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_reply(sender, instance, **kwargs):
+    if instance.parent_post_id:
+        record(instance.parent_post_id, "replies", -1, at=instance.created_at)
+
+
+@receiver(post_save, sender=Bookmark)
+def count_bookmark(sender, instance, created, **kwargs):
+    if created:
+        record(instance.post_id, "bookmarks", at=instance.created_at)
+
+
+@receiver(post_delete, sender=Bookmark)
+def uncount_bookmark(sender, instance, **kwargs):
+    record(instance.post_id, "bookmarks", -1, at=instance.created_at)
+
+
+@receiver(bookmarks_changed)
+def count_bookmark_toggle(sender, post_id, bookmarked, created_at, **kwargs):
+    record(post_id, "bookmarks", 1 if bookmarked else -1, at=created_at)
@@ -0,0 +1,83 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Profile
+from bookmarks.models import Bookmark
+from likes.models import Like
+from posts.models import Post
+from .engine import bucket_start, compute_scores, refresh_trending
+from .models import EngagementBucket
+
+
+class TrendingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.author = User.objects.create_user(username="author", password="pass12345")
+        self.fan = User.objects.create_user(username="fan", password="pass12345")
+        Profile.objects.create(user=self.author)
+        Profile.objects.create(user=self.fan)
+        self.hot = Post.objects.create(author=self.author, content="Hot")
+        self.cold = Post.objects.create(author=self.author, content="Cold")
+
+    def test_engagement_is_bucketed_and_scored(self):
+        Like.objects.create(user=self.fan, post=self.hot)
+        Bookmark.objects.create(user=self.fan, post=self.hot)
+        Post.objects.create(author=self.fan, content="Reply", parent_post=self.hot)
+
+        bucket = EngagementBucket.objects.get(post=self.hot)
+        self.assertEqual(bucket.bucket, bucket_start(timezone.now()))
+        self.assertEqual((bucket.likes, bucket.replies, bucket.bookmarks), (1, 1, 1))
+        self.hot.refresh_from_db()
+        self.assertAlmostEqual(self.hot.trending_score, 4.5, delta=0.1)
+
+        Like.objects.filter(post=self.hot).delete()
+        self.hot.refresh_from_db()
+        self.assertAlmostEqual(self.hot.trending_score, 3.5, delta=0.1)
+
+    def test_buckets_fade_out_of_the_window(self):
+        now = timezone.now()
+        EngagementBucket.objects.create(
+            post=self.hot, bucket=bucket_start(now - timedelta(hours=3)), likes=4
+        )
+        EngagementBucket.objects.create(
+            post=self.cold, bucket=bucket_start(now - timedelta(hours=7)), likes=9
+        )
+        Post.objects.filter(pk=self.cold.pk).update(trending_score=9.0)
+
+        scores = compute_scores([self.hot.pk, self.cold.pk], now)
+        self.assertAlmostEqual(scores[self.hot.pk], 2.0, delta=0.1)
+        self.assertNotIn(self.cold.pk, scores)
+
+        checked, updated, purged = refresh_trending(now)
+        self.assertEqual((checked, updated, purged), (2, 2, 1))
+        self.cold.refresh_from_db()
+        self.assertEqual(self.cold.trending_score, 0.0)
+
+    def test_trending_view_and_command(self):
+        Like.objects.create(user=self.fan, post=self.hot)
+
+        response = self.client.get(reverse("trending:posts"))
+        self.assertContains(response, "Hot")
+        self.assertNotContains(response, "Cold")
+
+        out = StringIO()
+        call_command("refresh_trending", stdout=out)
+        self.assertIn("Checked 1 posts", out.getvalue())
+
+    @override_settings(FEED_DISCOVERY_ORDER="trending")
+    def test_feed_can_order_discovery_by_trending(self):
+        Post.objects.filter(pk=self.hot.pk).update(recommendation_score=0.0)
+        Post.objects.filter(pk=self.cold.pk).update(recommendation_score=5.0)
+        Like.objects.create(user=self.fan, post=self.hot)
+
+        self.client.login(username="fan", password="pass12345")
+        posts = list(self.client.get(reverse("posts:home")).context["posts"])
+        self.assertEqual(posts[0], self.hot)
@@ -0,0 +1,9 @@
+from django.urls import path
+
+from .views import TrendingPostsView
+
+app_name = "trending"
+
+urlpatterns = [
+    path("trending/", TrendingPostsView.as_view(), name="posts"),
+]
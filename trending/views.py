@@ -0,0 +1,36 @@
+from django.db.models import Exists, OuterRef
+from django.views.generic import ListView
+
+from bookmarks.models import Bookmark
+from core.pagination import CursorPaginationMixin
+from likes.models import Like
+from posts.models import Post
+
+
+class TrendingPostsView(CursorPaginationMixin, ListView):
+    """Posts with the most engagement in the trending window, hottest first."""
+
+    template_name = "tags/post_list.html"
+    context_object_name = "posts"
+    paginate_by = 10
+    cursor_ordering = ("-trending_score", "-id")
+
+    def get_queryset(self):
+        queryset = Post.objects.filter(trending_score__gt=0).select_related(
+            "author", "author__profile"
+        )
+        if self.request.user.is_authenticated:
+            queryset = queryset.annotate(
+                is_liked=Exists(
+                    Like.objects.filter(user=self.request.user, post=OuterRef("pk"))
+                ),
+                is_bookmarked=Exists(
+                    Bookmark.objects.filter(user=self.request.user, post=OuterRef("pk"))
+                ),
+            )
+        return queryset.order_by(*self.get_cursor_ordering())
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["title"] = "Популярне"
+        return context